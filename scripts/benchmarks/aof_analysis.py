@@ -0,0 +1,167 @@
+import csv
+import os
+import time
+
+import redis
+
+from aof_reader import iter_commands, read_manifest
+
+ANALYSIS_FIELDS = [
+    "requests",
+    "aof_commands",
+    "base_bytes_before",
+    "incr_bytes_before",
+    "total_bytes_before",
+    "base_bytes_after",
+    "incr_bytes_after",
+    "total_bytes_after",
+    "compaction_ratio",
+    "bytes_per_request",
+    "write_syscalls",
+    "write_syscall_source",
+    "bytes_per_write_syscall",
+]
+COMMAND_FIELDS = ["command", "count", "bytes", "avg_bytes"]
+
+
+def resp_size(args):
+    """Bytes the command takes in the AOF as a RESP array."""
+    size = len(b"*%d\r\n" % len(args))
+    for arg in args:
+        size += len(b"$%d\r\n" % len(arg)) + len(arg) + 2
+    return size
+
+
+def aof_sizes(appendonlydir):
+    sizes = {"base": 0, "incr": 0}
+    for entry in read_manifest(appendonlydir):
+        kind = {"b": "base", "i": "incr"}.get(entry.get("type"))
+        path = os.path.join(appendonlydir, entry["file"])
+        if kind and os.path.exists(path):
+            sizes[kind] += os.path.getsize(path)
+    return sizes
+
+
+def command_mix(appendonlydir, skip=0):
+    """Count and bytes per command, leaving out the first `skip` commands
+    (other than the SELECTs the server adds)."""
+    mix = {}
+    for _, args in iter_commands(appendonlydir):
+        command = bytes(args[0]).upper().decode(errors="replace")
+        if skip and command != "SELECT":
+            skip -= 1
+            continue
+        entry = mix.setdefault(command, [0, 0])
+        entry[0] += 1
+        entry[1] += resp_size(args)
+    return mix
+
+
+def rewrite_aof(port, timeout=600):
+    """Run BGREWRITEAOF and wait until the rewritten base is in place."""
+    client = redis.Redis(port=port)
+    client.bgrewriteaof()
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        time.sleep(0.1)
+        info = client.info("persistence")
+        if not info["aof_rewrite_in_progress"] and not info["aof_rewrite_scheduled"]:
+            return
+    raise TimeoutError("BGREWRITEAOF did not finish in time")
+
+
+def read_write_syscalls(output_dir, prefix):
+    """AOF write syscalls of the run: write + io_uring_enter from the strace
+    pass, or all write syscalls from /proc accounting (which also counts
+    client replies)."""
+    strace_path = os.path.join(output_dir, f"{prefix}syscalls.csv")
+    if os.path.exists(strace_path):
+        with open(strace_path, newline="") as syscalls_csv:
+            rows = list(csv.DictReader(syscalls_csv))
+        return (
+            sum(int(row["write"]) + int(row["io_uring_enter"]) for row in rows),
+            "strace",
+        )
+    accounting_path = os.path.join(output_dir, f"{prefix}thread_accounting.csv")
+    if os.path.exists(accounting_path):
+        with open(accounting_path, newline="") as accounting_csv:
+            for row in csv.DictReader(accounting_csv):
+                if row["thread_name"] == "total":
+                    return int(float(row["syscw"])), "proc"
+    return None, ""
+
+
+def analyze_aof(
+    appendonlydir,
+    port,
+    requests,
+    output_dir,
+    name="",
+    rewrite=True,
+    start_sizes=None,
+    skip_commands=0,
+    syscall_window_incr_bytes=None,
+):
+    """Write <prefix>aof_analysis.csv and <prefix>aof_commands.csv for the
+    AOF a benchmark left behind, rewriting it to measure the compaction.
+
+    `start_sizes` are the AOF sizes when the measured requests started and
+    `skip_commands` the commands written before that (a workload preload);
+    both are left out of the per-request figures and the command mix.
+    `syscall_window_incr_bytes` is the incr size when the pass the write
+    syscalls were counted over started (the strace pass runs after the
+    combined pass on the same server), by default the start size."""
+    prefix = f"{name}_" if name else ""
+    start_sizes = start_sizes or {"base": 0, "incr": 0}
+    if syscall_window_incr_bytes is None:
+        syscall_window_incr_bytes = start_sizes["incr"]
+    before = aof_sizes(appendonlydir)
+    mix = command_mix(appendonlydir, skip_commands)
+    if rewrite:
+        rewrite_aof(port)
+        after = aof_sizes(appendonlydir)
+    else:
+        after = {"base": "", "incr": ""}
+    total_before = before["base"] + before["incr"]
+    total_after = after["base"] + after["incr"] if rewrite else ""
+    syscalls, source = read_write_syscalls(output_dir, prefix)
+    window_bytes = before["incr"] - syscall_window_incr_bytes
+
+    row = {
+        "requests": requests,
+        "aof_commands": sum(count for count, _ in mix.values()),
+        "base_bytes_before": before["base"],
+        "incr_bytes_before": before["incr"],
+        "total_bytes_before": total_before,
+        "base_bytes_after": after["base"],
+        "incr_bytes_after": after["incr"],
+        "total_bytes_after": total_after,
+        "compaction_ratio": (
+            round(total_after / total_before, 4) if rewrite and total_before else ""
+        ),
+        "bytes_per_request": (
+            round((total_before - sum(start_sizes.values())) / requests, 2)
+            if requests
+            else ""
+        ),
+        "write_syscalls": syscalls if syscalls is not None else "",
+        "write_syscall_source": source,
+        # A rewrite during the window leaves no comparable incr growth.
+        "bytes_per_write_syscall": (
+            round(window_bytes / syscalls, 2) if syscalls and window_bytes > 0 else ""
+        ),
+    }
+    with open(
+        os.path.join(output_dir, f"{prefix}aof_analysis.csv"), "w", newline=""
+    ) as analysis_csv:
+        writer = csv.DictWriter(analysis_csv, fieldnames=ANALYSIS_FIELDS)
+        writer.writeheader()
+        writer.writerow(row)
+    with open(
+        os.path.join(output_dir, f"{prefix}aof_commands.csv"), "w", newline=""
+    ) as commands_csv:
+        writer = csv.writer(commands_csv)
+        writer.writerow(COMMAND_FIELDS)
+        for command, (count, size) in sorted(mix.items(), key=lambda item: -item[1][1]):
+            writer.writerow([command, count, size, round(size / count, 2)])
+    return row
@@ -0,0 +1,234 @@
+import argparse
+import collections
+import mmap
+import os
+import re
+
+# Key state is kept per (db, key) for the commands the benchmarks and the
+# correctness tests issue; anything else is only counted.
+INCR_COMMANDS = {b"INCR": 1, b"DECR": -1}
+INCRBY_COMMANDS = {b"INCRBY": 1, b"DECRBY": -1}
+
+ARRAY_HEADER = re.compile(rb"\*(\d+)\r\n")
+BULK_HEADER = re.compile(rb"\$(\d+)\r\n")
+
+
+def read_manifest(appendonlydir):
+    """Entries of the appendonlydir manifest as dicts (file, seq, type)."""
+    manifests = [
+        name for name in os.listdir(appendonlydir) if name.endswith(".manifest")
+    ]
+    if not manifests:
+        raise FileNotFoundError(f"No AOF manifest in {appendonlydir}")
+    entries = []
+    with open(os.path.join(appendonlydir, manifests[0])) as manifest:
+        for line in manifest:
+            fields = line.split()
+            entries.append(dict(zip(fields[::2], fields[1::2])))
+    return entries
+
+
+def aof_files(path):
+    """AOF files to read, in order: the base file then the incr files of an
+    appendonlydir manifest (history files are skipped), or a single file."""
+    if os.path.isfile(path):
+        return [path]
+    files = [
+        (entry["type"] != "b", int(entry["seq"]), entry["file"])
+        for entry in read_manifest(path)
+        if entry.get("type") in ("b", "i")
+    ]
+    return [os.path.join(path, name) for _, _, name in sorted(files)]
+
+
+class AofFile:
+    """Memory-mapped AOF file whose commands are parsed lazily.
+
+    Arguments are memoryviews into the mapping, so nothing is copied unless
+    the caller keeps them (call bytes() on them first). `truncated` is set
+    when the file ends inside a command, like redis-check-aof reports.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.truncated = False
+        self.rdb_preamble = False
+        self.file = open(path, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        self.map = None
+        if size:
+            self.map = mmap.mmap(self.file.fileno(), size, access=mmap.ACCESS_READ)
+
+    def close(self):
+        if self.map is not None:
+            try:
+                self.map.close()
+            except BufferError:
+                # A caller still holds argument views; the mapping is
+                # released together with them.
+                pass
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def commands(self):
+        """Yield (timestamp_s or None, args) per command; #TS annotations
+        give the timestamps."""
+        data = self.map
+        if data is None:
+            return
+        if data[:5] == b"REDIS":
+            self.rdb_preamble = True
+            return
+        view = memoryview(data)
+        size = len(data)
+        pos = 0
+        timestamp = None
+        try:
+            while pos < size:
+                match = ARRAY_HEADER.match(data, pos)
+                if not match:
+                    end = data.find(b"\r\n", pos)
+                    if end == -1:
+                        self.truncated = True
+                        return
+                    if data[pos] != 35:  # '#': annotation
+                        raise ValueError(f"Bad AOF format at offset {pos} in {self.path}")
+                    if data[pos : pos + 4] == b"#TS:":
+                        timestamp = int(data[pos + 4 : end])
+                    pos = end + 2
+                    continue
+                pos = match.end()
+                args = []
+                for _ in range(int(match.group(1))):
+                    match = BULK_HEADER.match(data, pos)
+                    if not match:
+                        if data.find(b"\r\n", pos) == -1:
+                            self.truncated = True
+                            return
+                        raise ValueError(f"Bad AOF format at offset {pos} in {self.path}")
+                    start = match.end()
+                    length = int(match.group(1))
+                    pos = start + length + 2
+                    if pos > size:
+                        self.truncated = True
+                        return
+                    args.append(view[start : start + length])
+                yield timestamp, args
+        finally:
+            view.release()
+
+
+def iter_commands(path):
+    """Yield (timestamp_s or None, args) for every command of an AOF file or
+    appendonlydir, in replay order."""
+    for aof_path in aof_files(path):
+        with AofFile(aof_path) as aof:
+            yield from aof.commands()
+            if aof.rdb_preamble:
+                print(f"Skipping {aof_path}: RDB preamble")
+            if aof.truncated:
+                print(f"{aof_path} ends with a truncated command")
+
+
+def command_counts(path):
+    counts = collections.Counter()
+    for _, args in iter_commands(path):
+        counts[bytes(args[0]).upper().decode(errors="replace")] += 1
+    return counts
+
+
+class AofState:
+    """Final key state obtained by applying the commands of an AOF.
+
+    Strings, counters, hashes, lists and sets are modelled; other commands
+    are counted in `unsupported`. A base file with an RDB preamble cannot be
+    applied, in which case `complete` is False.
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.db = 0
+        self.commands = 0
+        self.unsupported = collections.Counter()
+        self.complete = True
+
+    def get(self, key, db=0):
+        if isinstance(key, str):
+            key = key.encode()
+        return self.data.get((db, key))
+
+    def apply(self, args):
+        self.commands += 1
+        command = bytes(args[0]).upper()
+        data = self.data
+        if command in (b"MULTI", b"EXEC"):
+            return
+        if command == b"SELECT":
+            self.db = int(args[1])
+            return
+        key = (self.db, bytes(args[1])) if len(args) > 1 else None
+        if command == b"SET":
+            data[key] = bytes(args[2])
+        elif command in INCR_COMMANDS or command in INCRBY_COMMANDS:
+            delta = (
+                INCR_COMMANDS[command]
+                if command in INCR_COMMANDS
+                else INCRBY_COMMANDS[command] * int(args[2])
+            )
+            data[key] = b"%d" % (int(data.get(key, b"0")) + delta)
+        elif command == b"DEL":
+            for name in args[1:]:
+                data.pop((self.db, bytes(name)), None)
+        elif command == b"HSET":
+            fields = data.setdefault(key, {})
+            for i in range(2, len(args) - 1, 2):
+                fields[bytes(args[i])] = bytes(args[i + 1])
+        elif command in (b"LPUSH", b"RPUSH"):
+            items = data.setdefault(key, collections.deque())
+            for value in args[2:]:
+                if command == b"LPUSH":
+                    items.appendleft(bytes(value))
+                else:
+                    items.append(bytes(value))
+        elif command == b"SADD":
+            data.setdefault(key, set()).update(bytes(member) for member in args[2:])
+        else:
+            self.unsupported[command.decode(errors="replace")] += 1
+
+
+def load_state(path):
+    state = AofState()
+    for aof_path in aof_files(path):
+        with AofFile(aof_path) as aof:
+            for _, args in aof.commands():
+                state.apply(args)
+            if aof.rdb_preamble:
+                state.complete = False
+    return state
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Parse an appendonlydir (or AOF file) without a server."
+    )
+    parser.add_argument("path", help="appendonlydir or a single AOF file.")
+    parser.add_argument(
+        "--state", action="store_true", help="Rebuild the key state and summarise it."
+    )
+    args = parser.parse_args()
+
+    if args.state:
+        state = load_state(args.path)
+        print(f"{state.commands} commands, {len(state.data)} keys")
+        if not state.complete:
+            print("Base file has an RDB preamble: the state only covers the incr files.")
+        for command, count in state.unsupported.most_common():
+            print(f"\tnot modelled: {command} x{count}")
+    else:
+        for command, count in command_counts(args.path).most_common():
+            print(f"{command},{count}")
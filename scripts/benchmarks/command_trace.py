@@ -0,0 +1,358 @@
+import argparse
+import asyncio
+import collections
+import gzip
+import os
+import re
+import socket
+import struct
+import time
+from array import array
+
+from aof_reader import iter_commands
+from loadgen import (
+    ReplyParser,
+    encode_command,
+    read_replies,
+    summarize,
+    write_histograms,
+    write_performance_csv,
+)
+
+MAGIC = b"REDISTRACE1\n"
+# Per command: capture time (us since the epoch, 0 if unknown), client id
+# and length of the RESP-encoded command that follows.
+RECORD = struct.Struct("<qII")
+
+# Commands that would stop or change the connection instead of loading it.
+UNREPLAYABLE = {
+    "MONITOR",
+    "SYNC",
+    "PSYNC",
+    "REPLCONF",
+    "SUBSCRIBE",
+    "PSUBSCRIBE",
+    "SSUBSCRIBE",
+    "SHUTDOWN",
+    "QUIT",
+    "RESET",
+    "HELLO",
+    "AUTH",
+}
+
+MONITOR_LINE = re.compile(rb"^(\d+)\.(\d+) \[(\d+) ([^\]]*)\] (.*)$")
+MONITOR_ESCAPES = {
+    ord("n"): b"\n",
+    ord("r"): b"\r",
+    ord("t"): b"\t",
+    ord("a"): b"\a",
+    ord("b"): b"\b",
+}
+
+
+def command_name(payload):
+    # Name of the first bulk string of a RESP array: "*N\r\n$L\r\nNAME\r\n".
+    return payload.split(b"\r\n", 3)[2].decode(errors="replace").upper()
+
+
+def open_trace(path, mode):
+    return gzip.open(path, mode) if path.endswith(".gz") else open(path, mode)
+
+
+class TraceWriter:
+    """Writes commands to a binary trace (gzip-compressed if the path ends
+    in .gz)."""
+
+    def __init__(self, path):
+        self.file = open_trace(path, "wb")
+        self.file.write(MAGIC)
+        self.count = 0
+
+    def write(self, timestamp_us, client, args):
+        payload = encode_command(args)
+        self.file.write(RECORD.pack(timestamp_us, client, len(payload)))
+        self.file.write(payload)
+        self.count += 1
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_trace(path):
+    """Yield (timestamp_us, client, payload) for every command in a trace."""
+    with open_trace(path, "rb") as trace:
+        if trace.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a command trace")
+        while True:
+            header = trace.read(RECORD.size)
+            if len(header) < RECORD.size:
+                return
+            timestamp_us, client, length = RECORD.unpack(header)
+            yield timestamp_us, client, trace.read(length)
+
+
+def parse_monitor_args(text):
+    """Split the quoted, escaped arguments of a MONITOR line."""
+    args = []
+    i = 0
+    while i < len(text):
+        if text[i] != ord('"'):
+            i += 1
+            continue
+        i += 1
+        arg = bytearray()
+        while text[i] != ord('"'):
+            if text[i] == ord("\\"):
+                escaped = text[i + 1]
+                if escaped == ord("x"):
+                    arg.append(int(text[i + 2 : i + 4], 16))
+                    i += 4
+                    continue
+                arg += MONITOR_ESCAPES.get(escaped, bytes([escaped]))
+                i += 2
+                continue
+            arg.append(text[i])
+            i += 1
+        args.append(bytes(arg))
+        i += 1
+    return args
+
+
+def capture_monitor(output, port, duration, host="localhost", max_commands=0):
+    """Record the commands a live server receives, via MONITOR, for
+    `duration` seconds (or until `max_commands` are captured)."""
+    clients = {}
+    deadline = time.monotonic() + duration
+    buffer = b""
+    with socket.create_connection((host, port)) as sock, TraceWriter(output) as trace:
+        sock.sendall(encode_command([b"MONITOR"]))
+        while time.monotonic() < deadline:
+            sock.settimeout(max(0.01, deadline - time.monotonic()))
+            try:
+                data = sock.recv(65536)
+            except socket.timeout:
+                break
+            if not data:
+                break
+            buffer += data
+            *lines, buffer = buffer.split(b"\r\n")
+            for line in lines:
+                match = MONITOR_LINE.match(line[1:]) if line[:1] == b"+" else None
+                if not match:
+                    continue
+                seconds, micros, _, address, args = match.groups()
+                client = clients.setdefault(address, len(clients))
+                trace.write(
+                    int(seconds) * 1000000 + int(micros),
+                    client,
+                    parse_monitor_args(args),
+                )
+                if max_commands and trace.count >= max_commands:
+                    return trace.count
+    return trace.count
+
+
+def capture_aof(output, path):
+    """Convert the commands of an AOF (file or appendonlydir) into a trace.
+
+    The AOF records no clients, so commands get round-robin client ids,
+    except that a MULTI ... EXEC block keeps a single one. A SELECT therefore
+    only applies to one replay connection.
+    """
+    client = 0
+    in_multi = False
+    with TraceWriter(output) as trace:
+        for timestamp, args in iter_commands(path):
+            args = [bytes(arg) for arg in args]
+            name = args[0].upper()
+            trace.write(
+                timestamp * 1000000 if timestamp is not None else 0, client, args
+            )
+            if name == b"MULTI":
+                in_multi = True
+            elif name in (b"EXEC", b"DISCARD"):
+                in_multi = False
+            if not in_multi:
+                client += 1
+    return trace.count
+
+
+def load_trace(path, connections):
+    """Split a trace over `connections` queues of (due_s, label, payload),
+    keeping each captured client on one connection; due_s is the time since
+    the first command."""
+    queues = [[] for _ in range(connections)]
+    first = None
+    due = 0.0
+    for timestamp_us, client, payload in read_trace(path):
+        label = command_name(payload)
+        if label in UNREPLAYABLE:
+            continue
+        # Commands without a timestamp are due with the previous one.
+        if timestamp_us:
+            if first is None:
+                first = timestamp_us
+            due = (timestamp_us - first) / 1e6
+        queues[client % connections].append((due, label, payload))
+    return [queue for queue in queues if queue]
+
+
+async def _replay_connection(host, port, queue, start, speed, pipeline, results):
+    reader, writer = await asyncio.open_connection(host, port)
+    parser = ReplyParser()
+
+    def record(label, reply, latency):
+        result = results.setdefault(
+            label, {"test": label, "errors": 0, "latencies": array("d")}
+        )
+        if not reply:
+            result["errors"] += 1
+        result["latencies"].append(latency * 1000)
+
+    try:
+        if start is None:
+            # As fast as possible: closed-loop, `pipeline` commands at a time.
+            for offset in range(0, len(queue), pipeline):
+                batch = queue[offset : offset + pipeline]
+                writer.write(b"".join(payload for _, _, payload in batch))
+                sent = time.perf_counter()
+                await read_replies(
+                    reader,
+                    parser,
+                    len(batch),
+                    lambda i, reply, now: record(batch[i][1], reply, now - sent),
+                )
+            return
+
+        # Original inter-arrival times: open-loop, latency from the due time.
+        intended = collections.deque()
+
+        async def send():
+            for due, label, payload in queue:
+                due = start + due / speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                writer.write(payload)
+                intended.append((due, label))
+
+        def on_reply(index, reply, now):
+            due, label = intended.popleft()
+            record(label, reply, now - due)
+
+        await asyncio.gather(
+            send(), read_replies(reader, parser, len(queue), on_reply)
+        )
+    finally:
+        writer.close()
+
+
+async def _replay(host, port, queues, timed, speed, pipeline):
+    results = {}
+    begin = time.monotonic()
+    start = time.perf_counter() + 0.01 if timed else None
+    await asyncio.gather(
+        *(
+            _replay_connection(host, port, queue, start, speed, pipeline, results)
+            for queue in queues
+        )
+    )
+    end = time.monotonic()
+    for result in results.values():
+        result.update(requests=len(result["latencies"]), start=begin, end=end)
+    return sorted(results.values(), key=lambda result: -result["requests"])
+
+
+def replay(
+    path,
+    port,
+    connections=50,
+    timed=False,
+    speed=1.0,
+    pipeline=1,
+    host="localhost",
+):
+    """Replay a trace and return one result per command, like run_load().
+
+    By default commands are sent as fast as the server answers; with `timed`
+    they keep their captured inter-arrival times (divided by `speed`).
+    """
+    queues = load_trace(path, connections)
+    results = asyncio.run(_replay(host, port, queues, timed, speed, pipeline))
+    for result in results:
+        if result["errors"]:
+            print(f"\t{result['test']}: {result['errors']} error replies")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Capture Redis command traces and replay them."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    monitor = commands.add_parser("monitor", help="Capture a live server via MONITOR.")
+    monitor.add_argument("output", help="Trace file to write (.gz to compress).")
+    monitor.add_argument("-H", "--host", default="localhost")
+    monitor.add_argument("-p", "--port", type=int, default=6379)
+    monitor.add_argument(
+        "--duration", type=float, default=60, help="Seconds to capture."
+    )
+    monitor.add_argument(
+        "--max-commands", type=int, default=0, help="Stop after this many commands."
+    )
+    aof = commands.add_parser("aof", help="Convert an AOF or appendonlydir.")
+    aof.add_argument("output", help="Trace file to write (.gz to compress).")
+    aof.add_argument("path", help="appendonlydir or a single AOF file.")
+    play = commands.add_parser("replay", help="Replay a trace against a server.")
+    play.add_argument("trace")
+    play.add_argument("-H", "--host", default="localhost")
+    play.add_argument("-p", "--port", type=int, default=6379)
+    play.add_argument("-c", "--clients", type=int, default=50)
+    play.add_argument("-P", "--pipeline", type=int, default=1)
+    play.add_argument(
+        "--timed", action="store_true", help="Keep the captured inter-arrival times."
+    )
+    play.add_argument(
+        "--speed", type=float, default=1.0, help="Time scale for --timed replay."
+    )
+    play.add_argument("--csv", help="Write the performance CSV to this path.")
+    play.add_argument(
+        "--histograms", help="Write one latency histogram per command into this directory."
+    )
+    args = parser.parse_args()
+
+    if args.command == "monitor":
+        count = capture_monitor(
+            args.output, args.port, args.duration, args.host, args.max_commands
+        )
+        print(f"Captured {count} commands into {args.output}")
+    elif args.command == "aof":
+        count = capture_aof(args.output, args.path)
+        print(f"Captured {count} commands into {args.output}")
+    else:
+        results = replay(
+            args.trace,
+            args.port,
+            args.clients,
+            args.timed,
+            args.speed,
+            args.pipeline,
+            args.host,
+        )
+        if args.csv:
+            write_performance_csv(args.csv, results)
+        if args.histograms:
+            os.makedirs(args.histograms, exist_ok=True)
+            write_histograms(args.histograms, "", results)
+        for result in results:
+            summary = summarize(result)
+            print(
+                f"{summary['test']}: {summary['rps']:.2f} requests per second, "
+                f"p50={summary['p50_latency_ms']:.3f} msec"
+            )
@@ -0,0 +1,168 @@
+import os
+import time
+
+from procfs import read_file, read_key_values
+from sampling import RingBuffer, RunningStats, append_rows
+
+SECTOR_BYTES = 512
+DISK_FIELDS = [
+    "timestamp",
+    "phase",
+    "write_ios",
+    "write_iops",
+    "write_bytes",
+    "write_ms",
+    "avg_write_wait_ms",
+    "in_flight",
+    "flushes",
+    "dirty_kb",
+    "writeback_kb",
+]
+DISK_SUMMARY_FIELDS = [
+    "phase",
+    "device",
+    "duration_s",
+    "write_ios",
+    "write_bytes",
+    "flushes",
+    "avg_write_wait_ms",
+    "mean_in_flight",
+    "max_in_flight",
+    "max_dirty_kb",
+    "max_writeback_kb",
+    "requests",
+    "device_bytes_per_request",
+]
+
+
+def block_device(path):
+    """Name of the block device (or partition) holding `path`, or None when
+    it is not on one (tmpfs, overlayfs)."""
+    device = os.stat(path).st_dev
+    uevent = read_key_values(
+        f"/sys/dev/block/{os.major(device)}:{os.minor(device)}/uevent", "="
+    )
+    return uevent.get("DEVNAME")
+
+
+def read_diskstats(device):
+    """Cumulative write counters of `device` from /proc/diskstats."""
+    for line in (read_file("/proc/diskstats") or "").splitlines():
+        fields = line.split()
+        if len(fields) < 14 or fields[2] != device:
+            continue
+        return {
+            "write_ios": int(fields[7]),
+            "write_sectors": int(fields[9]),
+            "write_ms": int(fields[10]),
+            "in_flight": int(fields[11]),
+            # Flush counters exist from Linux 5.5 on.
+            "flushes": int(fields[18]) if len(fields) > 18 else 0,
+        }
+    return None
+
+
+def read_page_cache():
+    meminfo = read_key_values("/proc/meminfo")
+    return {
+        "dirty_kb": int(meminfo.get("Dirty", "0 kB").split()[0]),
+        "writeback_kb": int(meminfo.get("Writeback", "0 kB").split()[0]),
+    }
+
+
+class DiskSampler:
+    """Samples write activity of the block device under `path` from
+    /proc/diskstats, with Dirty/Writeback from /proc/meminfo.
+
+    The counters are device-wide, so other writers on the same device are
+    included. Nothing is recorded when `path` is not on a block device.
+    Samples are kept in a ring buffer that spills to
+    <output_dir>/<prefix>diskstats.csv when full, and the summary comes from
+    running statistics over all of them.
+    """
+
+    def __init__(self, path, output_dir, name="", phase="", capacity=4096):
+        prefix = f"{name}_" if name else ""
+        self.phase = phase
+        self.device = block_device(path)
+        self.summary_path = os.path.join(output_dir, f"{prefix}diskstats_summary.csv")
+        self.buffer = RingBuffer(
+            DISK_FIELDS,
+            capacity,
+            typecode=None,
+            path=os.path.join(output_dir, f"{prefix}diskstats.csv"),
+        )
+        self.stats = {field: RunningStats() for field in DISK_FIELDS[2:]}
+        self.first_timestamp = None
+        self.last_timestamp = None
+        self.previous = None
+        self.previous_time = None
+
+    def sample(self):
+        if self.device is None:
+            return
+        stats = read_diskstats(self.device)
+        if stats is None:
+            return
+        timestamp = time.time()
+        if self.previous is not None:
+            elapsed = timestamp - self.previous_time
+            write_ios = stats["write_ios"] - self.previous["write_ios"]
+            write_ms = stats["write_ms"] - self.previous["write_ms"]
+            values = [
+                write_ios,
+                round(write_ios / elapsed, 2) if elapsed else 0,
+                (stats["write_sectors"] - self.previous["write_sectors"])
+                * SECTOR_BYTES,
+                write_ms,
+                round(write_ms / write_ios, 3) if write_ios else 0,
+                stats["in_flight"],
+                stats["flushes"] - self.previous["flushes"],
+            ] + list(read_page_cache().values())
+            self.buffer.append([timestamp, self.phase] + values)
+            for field, value in zip(DISK_FIELDS[2:], values):
+                self.stats[field].add(value)
+            if self.first_timestamp is None:
+                self.first_timestamp = timestamp
+            self.last_timestamp = timestamp
+        self.previous = stats
+        self.previous_time = timestamp
+
+    def summary(self, requests=None):
+        if not self.stats["write_ios"].count:
+            return None
+        write_ios = self.stats["write_ios"].total
+        write_bytes = self.stats["write_bytes"].total
+        return {
+            "phase": self.phase,
+            "device": self.device,
+            "duration_s": round(self.last_timestamp - self.first_timestamp, 3),
+            "write_ios": write_ios,
+            "write_bytes": write_bytes,
+            "flushes": self.stats["flushes"].total,
+            "avg_write_wait_ms": (
+                round(self.stats["write_ms"].total / write_ios, 3) if write_ios else 0
+            ),
+            "mean_in_flight": round(self.stats["in_flight"].mean, 3),
+            "max_in_flight": self.stats["in_flight"].max,
+            "max_dirty_kb": self.stats["dirty_kb"].max,
+            "max_writeback_kb": self.stats["writeback_kb"].max,
+            "requests": requests or "",
+            "device_bytes_per_request": (
+                round(write_bytes / requests, 2) if requests else ""
+            ),
+        }
+
+    def write_csv(self, requests=None):
+        """Spill the remaining samples to <prefix>diskstats.csv and append the
+        phase summary, with device bytes written per logical request, to
+        <prefix>diskstats_summary.csv."""
+        summary = self.summary(requests)
+        if summary is None:
+            return
+        self.buffer.spill()
+        append_rows(
+            self.summary_path,
+            DISK_SUMMARY_FIELDS,
+            [[summary[field] for field in DISK_SUMMARY_FIELDS]],
+        )
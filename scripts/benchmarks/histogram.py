@@ -0,0 +1,121 @@
+import json
+import math
+
+# Log-linear buckets in the style of HdrHistogram: values below
+# SUB_BUCKET_COUNT are stored exactly, larger values keep 11 significant
+# bits (better than 3 significant decimal digits) per power of two.
+SUB_BUCKET_BITS = 11
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+SUB_BUCKET_HALF = SUB_BUCKET_COUNT >> 1
+FORMAT_VERSION = 1
+
+
+def bucket_index(value):
+    if value < SUB_BUCKET_COUNT:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    return SUB_BUCKET_COUNT + (shift - 1) * SUB_BUCKET_HALF + (value >> shift) - SUB_BUCKET_HALF
+
+
+def bucket_range(index):
+    if index < SUB_BUCKET_COUNT:
+        return index, index
+    offset = index - SUB_BUCKET_COUNT
+    shift = offset // SUB_BUCKET_HALF + 1
+    lowest = (offset % SUB_BUCKET_HALF + SUB_BUCKET_HALF) << shift
+    return lowest, lowest + (1 << shift) - 1
+
+
+class LatencyHistogram:
+    """Mergeable latency histogram with integer microsecond resolution."""
+
+    def __init__(self):
+        self.counts = {}
+        self.total = 0
+        self.sum = 0
+        self.min = None
+        self.max = None
+
+    def record(self, value_us, count=1):
+        value_us = max(0, int(value_us))
+        index = bucket_index(value_us)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.total += count
+        self.sum += value_us * count
+        if self.min is None or value_us < self.min:
+            self.min = value_us
+        if self.max is None or value_us > self.max:
+            self.max = value_us
+
+    def record_latencies_ms(self, latencies_ms):
+        for latency in latencies_ms:
+            self.record(latency * 1000)
+
+    def merge(self, other):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total += other.total
+        self.sum += other.sum
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+        return self
+
+    def mean(self):
+        return self.sum / self.total if self.total else 0.0
+
+    def value_at_percentile(self, percentile):
+        if not self.total:
+            return 0
+        target = max(1, math.ceil(percentile * self.total / 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(bucket_range(index)[1], self.max)
+        return self.max
+
+    def cumulative_distribution(self):
+        """Yield (value_us, fraction of samples <= value_us) per bucket."""
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            yield min(bucket_range(index)[1], self.max), seen / self.total
+
+    def to_dict(self):
+        return {
+            "version": FORMAT_VERSION,
+            "unit": "us",
+            "sub_bucket_bits": SUB_BUCKET_BITS,
+            "total": self.total,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max,
+            "counts": sorted(self.counts.items()),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("sub_bucket_bits") != SUB_BUCKET_BITS:
+            raise ValueError("Histogram was written with a different bucket layout")
+        histogram = cls()
+        histogram.counts = {int(index): count for index, count in data["counts"]}
+        histogram.total = data["total"]
+        histogram.sum = data["sum"]
+        histogram.min = data["min"]
+        histogram.max = data["max"]
+        return histogram
+
+    def save(self, path):
+        with open(path, "w") as histfile:
+            json.dump(self.to_dict(), histfile, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as histfile:
+            return cls.from_dict(json.load(histfile))
+
+
+def histogram_filename(name, test):
+    return f"{name}_{test}_histogram.json" if name else f"{test}_histogram.json"
@@ -0,0 +1,715 @@
+import asyncio
+import argparse
+import collections
+import csv
+import itertools
+import math
+import os
+import random
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from histogram import LatencyHistogram, histogram_filename
+from workloads import WORKLOADS, Workload
+
+PERFORMANCE_FIELDS = [
+    "test",
+    "rps",
+    "avg_latency_ms",
+    "min_latency_ms",
+    "p50_latency_ms",
+    "p95_latency_ms",
+    "p99_latency_ms",
+    "max_latency_ms",
+]
+
+DEFAULT_TESTS = ["set", "hset", "incr", "lpush"]
+
+# Same commands redis-benchmark issues for these tests (without -r the
+# __rand_int__ placeholder is sent literally, so each test hits one key).
+TEST_COMMANDS = {
+    "set": ("SET", ["SET", "key:__rand_int__", "xxx"]),
+    "get": ("GET", ["GET", "key:__rand_int__"]),
+    "hset": ("HSET", ["HSET", "myhash", "element:__rand_int__", "xxx"]),
+    "incr": ("INCR", ["INCR", "counter:__rand_int__"]),
+    "lpush": ("LPUSH", ["LPUSH", "mylist", "xxx"]),
+    "rpush": ("RPUSH", ["RPUSH", "mylist", "xxx"]),
+    "lpop": ("LPOP", ["LPOP", "mylist"]),
+    "sadd": ("SADD", ["SADD", "myset", "element:__rand_int__"]),
+}
+
+RAND_PLACEHOLDER = b"__rand_int__"
+INCOMPLETE = object()
+
+
+def encode_command(args):
+    out = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if not isinstance(arg, bytes):
+            arg = str(arg).encode()
+        out.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(out)
+
+
+class ReplyParser:
+    """Incremental RESP2 reply parser that only tracks reply boundaries."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.pos = 0
+
+    def feed(self, data):
+        if self.pos:
+            del self.buffer[: self.pos]
+            self.pos = 0
+        self.buffer += data
+
+    def _parse(self, pos):
+        end = self.buffer.find(b"\r\n", pos)
+        if end == -1:
+            return INCOMPLETE, pos
+        prefix = self.buffer[pos]
+        if prefix == 43 or prefix == 58:  # '+' ':'
+            return True, end + 2
+        if prefix == 45:  # '-'
+            return False, end + 2
+        length = int(self.buffer[pos + 1 : end])
+        if prefix == 36:  # '$'
+            if length < 0:
+                return True, end + 2
+            stop = end + 2 + length + 2
+            if stop > len(self.buffer):
+                return INCOMPLETE, pos
+            return True, stop
+        if prefix == 42:  # '*'
+            ok = True
+            pos = end + 2
+            for _ in range(max(length, 0)):
+                reply, pos = self._parse(pos)
+                if reply is INCOMPLETE:
+                    return INCOMPLETE, pos
+                ok = ok and reply
+            return ok, pos
+        raise ValueError(f"Unexpected RESP type byte {chr(prefix)!r}")
+
+    def get_reply(self):
+        reply, pos = self._parse(self.pos)
+        if reply is not INCOMPLETE:
+            self.pos = pos
+        return reply
+
+
+class CommandTemplate:
+    """Builds pipelined payloads for one test, like redis-benchmark -d/-r."""
+
+    def __init__(self, test, data_size=3, keyspace=0):
+        self.label, args = TEST_COMMANDS[test]
+        value = "x" * data_size
+        self.payload = encode_command([value if arg == "xxx" else arg for arg in args])
+        self.keyspace = keyspace
+
+    def keyed(self, index):
+        """Payload for key number `index` of the keyspace."""
+        # The placeholder is 12 bytes, so a 12-digit key keeps lengths valid.
+        return self.payload.replace(RAND_PLACEHOLDER, b"%012d" % index)
+
+    def batch(self, count):
+        if not self.keyspace:
+            return self.payload * count
+        return b"".join(
+            self.keyed(random.randrange(self.keyspace)) for _ in range(count)
+        )
+
+
+class _TestState:
+    def __init__(self, requests):
+        self.remaining = requests
+        self.errors = 0
+
+
+async def read_replies(reader, parser, count, on_reply):
+    """Read `count` replies, calling on_reply(index, ok, receive_time) each."""
+    received = 0
+    while received < count:
+        data = await reader.read(65536)
+        if not data:
+            raise ConnectionError("Server closed the connection")
+        now = time.perf_counter()
+        parser.feed(data)
+        while received < count:
+            reply = parser.get_reply()
+            if reply is INCOMPLETE:
+                break
+            on_reply(received, reply, now)
+            received += 1
+
+
+async def _closed_loop_client(host, port, template, state, latencies, pipeline):
+    reader, writer = await asyncio.open_connection(host, port)
+    parser = ReplyParser()
+    try:
+        while state.remaining > 0:
+            batch = min(pipeline, state.remaining)
+            state.remaining -= batch
+            writer.write(template.batch(batch))
+            start = time.perf_counter()
+
+            def on_reply(index, reply, now):
+                if not reply:
+                    state.errors += 1
+                latencies.append((now - start) * 1000)
+
+            await read_replies(reader, parser, batch, on_reply)
+    finally:
+        writer.close()
+
+
+async def _run_test(host, port, template, requests, clients, pipeline):
+    state = _TestState(requests)
+    latencies = array("d")
+    start = time.monotonic()
+    await asyncio.gather(
+        *(
+            _closed_loop_client(host, port, template, state, latencies, pipeline)
+            for _ in range(min(clients, requests))
+        )
+    )
+    end = time.monotonic()
+    return {
+        "test": template.label,
+        "requests": requests,
+        "errors": state.errors,
+        "start": start,
+        "end": end,
+        "latencies": latencies,
+    }
+
+
+async def _open_loop_client(
+    reader, writer, template, first, interval, count, state, latencies, completions
+):
+    """Send `count` requests at first, first + interval, ... and time each
+    reply from its intended send time, so server stalls are not hidden by
+    the client waiting (coordinated omission)."""
+    intended = collections.deque()
+
+    async def send():
+        sent = 0
+        while sent < count:
+            now = time.perf_counter()
+            due = min(count, int((now - first) / interval) + 1) if now >= first else 0
+            if due > sent:
+                writer.write(template.batch(due - sent))
+                intended.extend(first + i * interval for i in range(sent, due))
+                sent = due
+            await asyncio.sleep(max(0, first + sent * interval - time.perf_counter()))
+
+    def on_reply(index, reply, now):
+        if not reply:
+            state.errors += 1
+        latencies.append((now - intended.popleft()) * 1000)
+        completions.append(now)
+
+    try:
+        await asyncio.gather(
+            send(), read_replies(reader, ReplyParser(), count, on_reply)
+        )
+    finally:
+        writer.close()
+
+
+async def _run_open_loop_test(host, port, template, rate, duration, clients):
+    requests = max(1, int(rate * duration))
+    clients = min(clients, requests)
+    state = _TestState(requests)
+    latencies = array("d")
+    completions = array("d")
+    connections = [await asyncio.open_connection(host, port) for _ in range(clients)]
+    # Request i is due at start + i / rate; connections take turns.
+    start = time.perf_counter() + 0.01
+    await asyncio.gather(
+        *(
+            _open_loop_client(
+                reader,
+                writer,
+                template,
+                start + k / rate,
+                clients / rate,
+                count,
+                state,
+                latencies,
+                completions,
+            )
+            for k, ((reader, writer), count) in enumerate(
+                zip(connections, _split(requests, clients))
+            )
+        )
+    )
+    end = time.perf_counter()
+    return {
+        "test": template.label,
+        "requests": requests,
+        "errors": state.errors,
+        "start": start,
+        "end": end,
+        "latencies": latencies,
+        "completions": completions,
+        "offered_rps": rate,
+    }
+
+
+async def _workload_client(host, port, workload, state, results, pipeline):
+    reader, writer = await asyncio.open_connection(host, port)
+    parser = ReplyParser()
+
+    try:
+        while state.remaining > 0:
+            batch = min(pipeline, state.remaining)
+            state.remaining -= batch
+            requests = [workload.next() for _ in range(batch)]
+            writer.write(b"".join(encode_command(args) for _, args in requests))
+            start = time.perf_counter()
+
+            def on_reply(index, reply, now):
+                result = results[requests[index][0]]
+                if not reply:
+                    result["errors"] += 1
+                result["latencies"].append((now - start) * 1000)
+
+            await read_replies(reader, parser, batch, on_reply)
+    finally:
+        writer.close()
+
+
+async def _send_payloads(host, port, payloads, pipeline=256):
+    """Send encoded commands `pipeline` at a time on one connection and
+    return how many were sent."""
+    reader, writer = await asyncio.open_connection(host, port)
+    parser = ReplyParser()
+    payloads = iter(payloads)
+    sent = 0
+    try:
+        while True:
+            batch = list(itertools.islice(payloads, pipeline))
+            if not batch:
+                break
+            writer.write(b"".join(batch))
+            await read_replies(reader, parser, len(batch), lambda *reply: None)
+            sent += len(batch)
+    finally:
+        writer.close()
+    return sent
+
+
+async def _run_workload(host, port, workload, requests, clients, pipeline):
+    state = _TestState(requests)
+    results = {
+        label: {"test": label, "errors": 0, "latencies": array("d")}
+        for label in workload.labels()
+    }
+    start = time.monotonic()
+    await asyncio.gather(
+        *(
+            _workload_client(host, port, workload, state, results, pipeline)
+            for _ in range(min(clients, requests))
+        )
+    )
+    end = time.monotonic()
+    for result in results.values():
+        result.update(requests=len(result["latencies"]), start=start, end=end)
+    return list(results.values())
+
+
+async def _sequence_client(host, port, key, acked, index, pipeline):
+    """SET `key` to 1, 2, 3, ... recording the highest acknowledged value,
+    until the server goes away."""
+    reader, writer = await asyncio.open_connection(host, port)
+    parser = ReplyParser()
+    sequence = 0
+
+    def on_reply(offset, reply, now):
+        if reply:
+            acked[index] = sequence + offset + 1
+
+    try:
+        while True:
+            writer.write(
+                b"".join(
+                    encode_command(["SET", key, sequence + offset + 1])
+                    for offset in range(pipeline)
+                )
+            )
+            await read_replies(reader, parser, pipeline, on_reply)
+            sequence += pipeline
+    except OSError:
+        pass
+    finally:
+        writer.close()
+
+
+async def _run_until_killed(host, port, clients, kill_after, kill, pipeline):
+    keys = [f"crash:{index}" for index in range(clients)]
+    acked = [0] * clients
+    tasks = [
+        asyncio.ensure_future(
+            _sequence_client(host, port, key, acked, index, pipeline)
+        )
+        for index, key in enumerate(keys)
+    ]
+    start = time.perf_counter()
+    await asyncio.sleep(kill_after)
+    kill()
+    end = time.perf_counter()
+    await asyncio.wait_for(asyncio.gather(*tasks), timeout=30)
+    return {"keys": keys, "acked": acked, "start": start, "end": end}
+
+
+def _run_worker(host, port, template, requests, clients, pipeline):
+    return asyncio.run(_run_test(host, port, template, requests, clients, pipeline))
+
+
+def _split(total, parts):
+    return [total // parts + (1 if i < total % parts else 0) for i in range(parts)]
+
+
+def _merge_partials(partials):
+    merged = {
+        "test": partials[0]["test"],
+        "requests": sum(p["requests"] for p in partials),
+        "errors": sum(p["errors"] for p in partials),
+        "start": min(p["start"] for p in partials),
+        "end": max(p["end"] for p in partials),
+        "latencies": array("d"),
+    }
+    for p in partials:
+        merged["latencies"].extend(p["latencies"])
+    return merged
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an ascending list, clamped to its ends.
+
+    >>> percentile([1, 2, 3, 4, 5], 50)
+    3
+    >>> percentile([1, 2, 3, 4], 50)
+    2
+    >>> percentile([1, 2, 3, 4, 5, 6, 7], 50)
+    4
+    >>> percentile([1, 2, 3, 4], 100)
+    4
+    """
+    if not sorted_values:
+        return 0.0
+    index = math.ceil(pct * len(sorted_values) / 100) - 1
+    return sorted_values[max(0, min(len(sorted_values) - 1, index))]
+
+
+def summarize(result):
+    latencies = sorted(result["latencies"])
+    elapsed = result["end"] - result["start"]
+    count = len(latencies)
+    return {
+        "test": result["test"],
+        "rps": count / elapsed if elapsed > 0 else 0.0,
+        "avg_latency_ms": sum(latencies) / count if count else 0.0,
+        "min_latency_ms": latencies[0] if count else 0.0,
+        "p50_latency_ms": percentile(latencies, 50),
+        "p95_latency_ms": percentile(latencies, 95),
+        "p99_latency_ms": percentile(latencies, 99),
+        "max_latency_ms": latencies[-1] if count else 0.0,
+    }
+
+
+def run_load(
+    port,
+    requests_per_test,
+    tests=DEFAULT_TESTS,
+    clients=50,
+    pipeline=1,
+    processes=1,
+    host="localhost",
+    data_size=3,
+    keyspace=0,
+):
+    """Run each test in turn, closed-loop, and return one result per test.
+
+    Clients are spread over `processes` event loops; every result keeps the
+    raw per-request latencies (ms) next to its timing window.
+    """
+    # Each event loop needs at least one client connection.
+    processes = max(1, min(processes, clients))
+    results = []
+    for test in tests:
+        template = CommandTemplate(test, data_size, keyspace)
+        if processes <= 1:
+            result = _run_worker(
+                host, port, template, requests_per_test, clients, pipeline
+            )
+        else:
+            requests_split = _split(requests_per_test, processes)
+            clients_split = _split(clients, processes)
+            with ProcessPoolExecutor(max_workers=processes) as pool:
+                futures = [
+                    pool.submit(_run_worker, host, port, template, n, c, pipeline)
+                    for n, c in zip(requests_split, clients_split)
+                    if n and c
+                ]
+                result = _merge_partials([f.result() for f in futures])
+        if result["errors"]:
+            print(f"\t{result['test']}: {result['errors']} error replies")
+        results.append(result)
+    return results
+
+
+def run_workload(
+    port,
+    requests,
+    workload,
+    clients=50,
+    pipeline=1,
+    host="localhost",
+    seed=None,
+    preload=True,
+):
+    """Run a workload profile (see workloads.py) closed-loop, after creating
+    its keys unless `preload` is False (see preload_workload), and return one
+    result per command type.
+
+    All command types share the run's timing window, so each result's rps is
+    that command's share of the total throughput.
+    """
+    if not isinstance(workload, Workload):
+        workload = Workload(workload, seed)
+    if preload:
+        preload_workload(port, workload, host)
+    results = asyncio.run(
+        _run_workload(host, port, workload, requests, clients, pipeline)
+    )
+    for result in results:
+        if result["errors"]:
+            print(f"\t{result['test']}: {result['errors']} error replies")
+    return results
+
+
+def preload_workload(port, workload, host="localhost", pipeline=256):
+    """Create every key a workload profile can touch, so its reads hit, and
+    return the number of commands that took."""
+    if not isinstance(workload, Workload):
+        workload = Workload(workload)
+    payloads = (encode_command(args) for args in workload.preload())
+    return asyncio.run(_send_payloads(host, port, payloads, pipeline))
+
+
+def fill_keys(port, keys, data_size=3, host="localhost", pipeline=256):
+    """SET `keys` distinct keys to `data_size`-byte values, pipelined. The
+    keys are the ones the "set" test writes with keyspace=keys, so such a
+    load overwrites them instead of growing a second dataset."""
+    template = CommandTemplate("set", data_size, keys)
+    payloads = (template.keyed(index) for index in range(keys))
+    asyncio.run(_send_payloads(host, port, payloads, pipeline))
+
+
+def run_until_killed(port, kill_after, kill, clients=50, pipeline=1, host="localhost"):
+    """Write sequence numbers to one key per client, call kill() after
+    `kill_after` seconds and return the keys with the last value the server
+    acknowledged on each, next to the timing window up to the kill."""
+    return asyncio.run(
+        _run_until_killed(host, port, clients, kill_after, kill, pipeline)
+    )
+
+
+def run_open_loop(
+    port,
+    rate,
+    duration,
+    test="set",
+    clients=50,
+    host="localhost",
+    data_size=3,
+    keyspace=0,
+):
+    """Offer `rate` requests per second of one test for `duration` seconds,
+    regardless of how fast the server answers."""
+    template = CommandTemplate(test, data_size, keyspace)
+    result = asyncio.run(
+        _run_open_loop_test(host, port, template, rate, duration, clients)
+    )
+    if result["errors"]:
+        print(f"\t{result['test']}: {result['errors']} error replies")
+    return result
+
+
+def find_saturation(
+    port,
+    test="set",
+    start_rate=10000,
+    step=10000,
+    max_rate=200000,
+    p99_threshold_ms=5.0,
+    duration=5.0,
+    clients=50,
+    host="localhost",
+    data_size=3,
+    keyspace=0,
+    min_achieved=0.95,
+):
+    """Step the offered rate up until p99 exceeds `p99_threshold_ms` or the
+    server falls behind the schedule; return every step's result.
+
+    A step is sustainable when its p99 stays under the threshold and it
+    achieved at least `min_achieved` of the offered rate.
+    """
+    steps = []
+    rate = start_rate
+    while rate <= max_rate:
+        result = run_open_loop(
+            port, rate, duration, test, clients, host, data_size, keyspace
+        )
+        summary = summarize(result)
+        result["sustainable"] = (
+            summary["p99_latency_ms"] <= p99_threshold_ms
+            and summary["rps"] >= min_achieved * rate
+        )
+        steps.append(result)
+        print(
+            f"\t{result['test']} at {rate} rps offered: {summary['rps']:.0f} rps, "
+            f"p99={summary['p99_latency_ms']:.3f} msec"
+        )
+        if not result["sustainable"]:
+            break
+        rate += step
+    return steps
+
+
+def max_sustainable(steps):
+    """Summary of the sustainable step with the highest throughput, if any."""
+    sustainable = [summarize(result) for result in steps if result["sustainable"]]
+    if not sustainable:
+        return None
+    return max(sustainable, key=lambda summary: summary["rps"])
+
+
+def timeline(result, interval=1.0):
+    """Throughput and latency of an open-loop result per `interval` seconds
+    of reply time, as rows of (offset_s, rps, p50, p99, max latency ms).
+    A trailing partial interval is left out."""
+    buckets = collections.defaultdict(list)
+    for now, latency in zip(result["completions"], result["latencies"]):
+        buckets[int((now - result["start"]) // interval)].append(latency)
+    rows = []
+    for index in range(int((result["end"] - result["start"]) // interval)):
+        latencies = sorted(buckets.get(index, []))
+        rows.append(
+            [
+                index * interval,
+                len(latencies) / interval,
+                percentile(latencies, 50),
+                percentile(latencies, 99),
+                latencies[-1] if latencies else 0.0,
+            ]
+        )
+    return rows
+
+
+def write_performance_csv(path, results):
+    with open(path, "w", newline="") as csvfile:
+        writer = csv.writer(csvfile, quoting=csv.QUOTE_ALL)
+        writer.writerow(PERFORMANCE_FIELDS)
+        for result in results:
+            summary = summarize(result)
+            writer.writerow(
+                [summary["test"], f"{summary['rps']:.2f}"]
+                + [f"{summary[field]:.3f}" for field in PERFORMANCE_FIELDS[2:]]
+            )
+
+
+def build_histogram(result):
+    histogram = LatencyHistogram()
+    histogram.record_latencies_ms(result["latencies"])
+    return histogram
+
+
+def write_histograms(output_dir, name, results):
+    for result in results:
+        path = os.path.join(output_dir, histogram_filename(name, result["test"]))
+        build_histogram(result).save(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Asyncio Redis load generator.")
+    parser.add_argument("-H", "--host", default="localhost")
+    parser.add_argument("-p", "--port", type=int, default=6379)
+    parser.add_argument("-c", "--clients", type=int, default=50)
+    parser.add_argument("-n", "--requests", type=int, default=100000)
+    parser.add_argument("-P", "--pipeline", type=int, default=1)
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("-d", "--data-size", type=int, default=3)
+    parser.add_argument("-r", "--keyspace", type=int, default=0)
+    parser.add_argument("-t", "--tests", default=",".join(DEFAULT_TESTS))
+    parser.add_argument(
+        "-w",
+        "--workload",
+        choices=list(WORKLOADS),
+        help="Run this mixed workload profile instead of --tests.",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        help="Run open-loop at this many requests per second instead of closed-loop.",
+    )
+    parser.add_argument(
+        "--duration", type=float, default=10.0, help="Seconds per open-loop test."
+    )
+    parser.add_argument("--csv", help="Write the performance CSV to this path.")
+    parser.add_argument(
+        "--histograms", help="Write one latency histogram per test into this directory."
+    )
+    args = parser.parse_args()
+
+    if args.workload:
+        results = run_workload(
+            args.port,
+            args.requests,
+            args.workload,
+            args.clients,
+            args.pipeline,
+            args.host,
+        )
+    elif args.rate:
+        results = [
+            run_open_loop(
+                args.port,
+                args.rate,
+                args.duration,
+                test,
+                args.clients,
+                args.host,
+                args.data_size,
+                args.keyspace,
+            )
+            for test in args.tests.split(",")
+        ]
+    else:
+        results = run_load(
+            args.port,
+            args.requests,
+            args.tests.split(","),
+            args.clients,
+            args.pipeline,
+            args.processes,
+            args.host,
+            args.data_size,
+            args.keyspace,
+        )
+    if args.csv:
+        write_performance_csv(args.csv, results)
+    if args.histograms:
+        os.makedirs(args.histograms, exist_ok=True)
+        write_histograms(args.histograms, "", results)
+    for result in results:
+        summary = summarize(result)
+        print(
+            f"{summary['test']}: {summary['rps']:.2f} requests per second, "
+            f"p50={summary['p50_latency_ms']:.3f} msec"
+        )
@@ -0,0 +1,134 @@
+from datetime import datetime
+
+# Persistence modes the benchmarks can run. Each entry is started as a fresh
+# server from `implementation` on `port`, with `config` passed as
+# command-line overrides of that implementation's redis.conf. Results go to
+# benchmarks/<benchmark>/data/<run_prefix>-<timestamp>/ with file names
+# prefixed by `name` (the layout plot.py reads); workload and trace runs go
+# to <run_prefix>-<variant>-<timestamp>/. `tunables` lists the config
+# directives a sweep may vary for that mode. `legacy_run_prefix` names the
+# runs of the old per-benchmark scripts that covered several modes at once.
+MODES = {
+    "RDB": {
+        "benchmark": "RDB",
+        "implementation": "redis",
+        "port": 6381,
+        "config": {"appendonly": "no"},
+        "name": "",
+        "run_prefix": "RDB",
+    },
+    "AOF-no": {
+        "benchmark": "AOF",
+        "implementation": "redis",
+        "port": 6380,
+        "config": {"save": "", "appendonly": "yes", "appendfsync": "no"},
+        "name": "no",
+        "run_prefix": "AOF-no",
+        "legacy_run_prefix": "AOF-all",
+    },
+    "AOF-everysec": {
+        "benchmark": "AOF",
+        "implementation": "redis",
+        "port": 6380,
+        "config": {"save": "", "appendonly": "yes", "appendfsync": "everysec"},
+        "name": "everysec",
+        "run_prefix": "AOF-everysec",
+        "legacy_run_prefix": "AOF-all",
+    },
+    "AOF-always": {
+        "benchmark": "AOF",
+        "implementation": "redis",
+        "port": 6380,
+        "config": {"save": "", "appendonly": "yes", "appendfsync": "always"},
+        "name": "always",
+        "run_prefix": "AOF-always",
+        "legacy_run_prefix": "AOF-all",
+    },
+    "URING_AOF": {
+        "benchmark": "URING_AOF",
+        "implementation": "redis-io_uring",
+        "port": 6382,
+        "config": {"save": "", "appendonly-liburing": "yes"},
+        "name": "",
+        "run_prefix": "AOF-URING",
+        "tunables": [
+            "liburing-queue-depth",
+            "liburing-sqpoll",
+            "liburing-retry-count",
+        ],
+    },
+}
+
+BENCHMARKS = list(dict.fromkeys(mode["benchmark"] for mode in MODES.values()))
+RUN_TIMESTAMP_FORMAT = "%Y-%m-%d_%H-%M-%S"
+RUN_TIMESTAMP_LENGTH = len("-2000-01-01_00-00-00")
+# Variant of trace replay runs (workload runs use the profile name).
+TRACE_VARIANT = "trace"
+
+
+def select_modes(benchmarks, fsync="all"):
+    selected = []
+    for benchmark in benchmarks:
+        for mode_name, mode in MODES.items():
+            if mode["benchmark"] != benchmark:
+                continue
+            mode_fsync = mode["config"].get("appendfsync")
+            if fsync != "all" and mode_fsync is not None and mode_fsync != fsync:
+                continue
+            selected.append(mode_name)
+    return selected
+
+
+def uses_aof(mode):
+    config = mode["config"]
+    return config.get("appendonly") == "yes" or config.get("appendonly-liburing") == "yes"
+
+
+def uses_uring(mode):
+    return mode["config"].get("appendonly-liburing") == "yes"
+
+
+def run_variant(load_options):
+    """Variant a run with these load options is stored under, None for a
+    default run."""
+    if load_options.get("workload"):
+        return load_options["workload"]
+    return TRACE_VARIANT if load_options.get("trace") else None
+
+
+def parse_run_dir(run_name):
+    """(mode name, variant) of a run directory named
+    <run_prefix>[-<variant>]-<timestamp>, where the variant is the workload
+    profile or "trace" and None for a default run. The longest run_prefix
+    wins, so AOF-URING is not taken for an AOF mode. (None, None) for other
+    names."""
+    try:
+        datetime.strptime(run_name[1 - RUN_TIMESTAMP_LENGTH :], RUN_TIMESTAMP_FORMAT)
+    except ValueError:
+        return None, None
+    label = run_name[:-RUN_TIMESTAMP_LENGTH]
+    matches = [
+        (len(mode["run_prefix"]), mode_name)
+        for mode_name, mode in MODES.items()
+        if label == mode["run_prefix"] or label.startswith(mode["run_prefix"] + "-")
+    ]
+    if not matches:
+        return None, None
+    mode_name = max(matches)[1]
+    return mode_name, label[len(MODES[mode_name]["run_prefix"]) + 1 :] or None
+
+
+def legacy_run_modes(run_name):
+    """Modes covered by a legacy run directory named
+    <legacy_run_prefix>-<timestamp>, whose files carry each mode's `name`
+    prefix. Empty for other names."""
+    try:
+        datetime.strptime(run_name[1 - RUN_TIMESTAMP_LENGTH :], RUN_TIMESTAMP_FORMAT)
+    except ValueError:
+        return []
+    label = run_name[:-RUN_TIMESTAMP_LENGTH]
+    return [
+        mode_name
+        for mode_name, mode in MODES.items()
+        if mode.get("legacy_run_prefix") == label
+    ]
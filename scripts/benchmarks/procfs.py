@@ -0,0 +1,195 @@
+import csv
+import os
+import re
+import time
+
+from sampling import RingBuffer, RunningStats
+
+ACCOUNTING_FIELDS = [
+    "write_bytes",
+    "wchar",
+    "syscw",
+    "voluntary_ctxt_switches",
+    "nonvoluntary_ctxt_switches",
+    "run_time_ms",
+    "runqueue_wait_ms",
+    "timeslices",
+]
+
+
+def read_file(path):
+    try:
+        with open(path) as procfile:
+            return procfile.read()
+    except (FileNotFoundError, ProcessLookupError, PermissionError):
+        return None
+
+
+def read_key_values(path, separator=":"):
+    content = read_file(path)
+    if content is None:
+        return {}
+    values = {}
+    for line in content.splitlines():
+        key, _, value = line.partition(separator)
+        values[key.strip()] = value.strip()
+    return values
+
+
+def thread_group(name):
+    """Thread name without its per-instance number, so that e.g. every
+    iou-wrk-<n> io_uring worker counts as iou-wrk."""
+    return re.sub(r"[-_]?\d+$", "", name) or name
+
+
+def list_tasks(pid):
+    try:
+        return sorted(int(tid) for tid in os.listdir(f"/proc/{pid}/task"))
+    except (FileNotFoundError, ProcessLookupError):
+        return []
+
+
+def read_task_counters(pid, tid):
+    base = f"/proc/{pid}/task/{tid}"
+    comm = read_file(f"{base}/comm")
+    if comm is None:
+        return None
+    io = read_key_values(f"{base}/io")
+    status = read_key_values(f"{base}/status")
+    schedstat = (read_file(f"{base}/schedstat") or "0 0 0").split()
+    return comm.strip(), {
+        "write_bytes": int(io.get("write_bytes", 0)),
+        "wchar": int(io.get("wchar", 0)),
+        "syscw": int(io.get("syscw", 0)),
+        "voluntary_ctxt_switches": int(status.get("voluntary_ctxt_switches", 0)),
+        "nonvoluntary_ctxt_switches": int(
+            status.get("nonvoluntary_ctxt_switches", 0)
+        ),
+        "run_time_ms": int(schedstat[0]) / 1e6,
+        "runqueue_wait_ms": int(schedstat[1]) / 1e6,
+        "timeslices": int(schedstat[2]),
+    }
+
+
+class ThreadAccounting:
+    """Per-thread I/O and scheduler accounting from /proc, without strace.
+
+    Threads present at the first sample use it as their baseline; threads
+    started later (io_uring workers, bio threads) are counted from zero.
+    Counters of a thread that exits are kept from its last sample.
+    """
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.baseline = {}
+        self.latest = {}
+        self.names = {}
+        self.started = False
+
+    def sample(self):
+        for tid in list_tasks(self.pid):
+            counters = read_task_counters(self.pid, tid)
+            if counters is None:
+                continue
+            name, values = counters
+            if tid not in self.baseline:
+                self.baseline[tid] = (
+                    values if not self.started else dict.fromkeys(values, 0)
+                )
+            self.names[tid] = name
+            self.latest[tid] = values
+        self.started = True
+
+    def deltas(self):
+        for tid in sorted(self.latest):
+            base = self.baseline[tid]
+            yield tid, self.names[tid], {
+                field: round(self.latest[tid][field] - base[field], 3)
+                for field in ACCOUNTING_FIELDS
+            }
+
+    def write_csv(self, path):
+        totals = dict.fromkeys(ACCOUNTING_FIELDS, 0)
+        with open(path, "w", newline="") as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(["tid", "thread_name"] + ACCOUNTING_FIELDS)
+            for tid, name, values in self.deltas():
+                writer.writerow([tid, name] + [values[f] for f in ACCOUNTING_FIELDS])
+                for field in ACCOUNTING_FIELDS:
+                    totals[field] += values[field]
+            writer.writerow(["", "total"] + [totals[f] for f in ACCOUNTING_FIELDS])
+
+
+class ThreadCpu:
+    """CPU % per thread group of a process, from the on-CPU time in
+    /proc/<pid>/task/<tid>/schedstat.
+
+    Threads are grouped by thread_group() of their comm name: the main
+    thread, bio_aof and friends, and the io_uring SQPOLL (iou-sqp) and
+    io-wq worker (iou-wrk) threads, which the kernel accounts as threads of
+    the process. Like sampling.TimeSeries, samples are kept in a ring buffer
+    that spills to `path` when full, one (timestamp, group, cpu_percent) row
+    per group and sample, and `stats` keeps RunningStats per group.
+    """
+
+    def __init__(self, pid, path=None, capacity=4096):
+        self.pid = pid
+        self.path = path
+        self.previous = {}
+        self.previous_time = None
+        self.groups = []
+        self.stats = {}
+        self.samples = 0
+        self.buffer = RingBuffer(["timestamp", "group", "cpu_percent"], capacity)
+        self.header_written = False
+
+    def sample(self):
+        now = time.monotonic()
+        current = {}
+        for tid in list_tasks(self.pid):
+            comm = read_file(f"/proc/{self.pid}/task/{tid}/comm")
+            schedstat = read_file(f"/proc/{self.pid}/task/{tid}/schedstat")
+            if comm is None or schedstat is None:
+                continue
+            current[tid] = (thread_group(comm.strip()), int(schedstat.split()[0]))
+        if self.previous_time is not None:
+            elapsed_ns = (now - self.previous_time) * 1e9
+            usage = {}
+            for tid, (group, run_time) in current.items():
+                # Threads started since the last sample count from zero.
+                start = self.previous.get(tid, (group, 0))[1]
+                usage[group] = usage.get(group, 0.0) + (run_time - start)
+            self.add(time.time(), {g: ns / elapsed_ns * 100 for g, ns in usage.items()})
+        self.previous = current
+        self.previous_time = now
+
+    def add(self, timestamp, usage):
+        for group in usage:
+            if group not in self.stats:
+                # Samples before the group's first thread count as 0, so
+                # that the group means add up.
+                self.groups.append(group)
+                self.stats[group] = RunningStats()
+                for _ in range(self.samples):
+                    self.stats[group].add(0.0)
+        self.samples += 1
+        for index, group in enumerate(self.groups):
+            if self.path and self.buffer.full():
+                self.flush()
+            cpu_percent = usage.get(group, 0.0)
+            self.buffer.append([timestamp, index, cpu_percent])
+            self.stats[group].add(cpu_percent)
+
+    def flush(self):
+        if not self.path:
+            return
+        mode = "a" if self.header_written else "w"
+        with open(self.path, mode, newline="") as csvfile:
+            writer = csv.writer(csvfile)
+            if not self.header_written:
+                writer.writerow(["timestamp", "group", "cpu_percent"])
+                self.header_written = True
+            for timestamp, index, cpu_percent in self.buffer.drain():
+                writer.writerow(
+                    [timestamp, self.groups[int(index)], round(cpu_percent, 3)]
+                )
@@ -0,0 +1,284 @@
+import argparse
+import csv
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+from modes import MODES, RUN_TIMESTAMP_FORMAT, legacy_run_modes, parse_run_dir
+
+DEFAULT_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results.db")
+PERFORMANCE_COLUMNS = [
+    "rps",
+    "avg_latency_ms",
+    "min_latency_ms",
+    "p50_latency_ms",
+    "p95_latency_ms",
+    "p99_latency_ms",
+    "max_latency_ms",
+]
+USAGE_COLUMNS = ["average", "std", "min", "max", "samples"]
+# run_filters(variant=ALL_VARIANTS) matches default, workload and trace runs.
+ALL_VARIANTS = "all"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    mode TEXT NOT NULL,
+    benchmark TEXT NOT NULL,
+    name TEXT NOT NULL,
+    fsync TEXT,
+    implementation TEXT NOT NULL,
+    variant TEXT,
+    requests INTEGER,
+    engine TEXT,
+    parameters TEXT NOT NULL DEFAULT '{}',
+    timestamp TEXT NOT NULL,
+    data_dir TEXT,
+    UNIQUE (data_dir, mode)
+);
+CREATE INDEX IF NOT EXISTS runs_mode_timestamp ON runs (mode, timestamp);
+CREATE INDEX IF NOT EXISTS runs_requests ON runs (requests);
+CREATE TABLE IF NOT EXISTS performance (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    test TEXT NOT NULL,
+    rps REAL,
+    avg_latency_ms REAL,
+    min_latency_ms REAL,
+    p50_latency_ms REAL,
+    p95_latency_ms REAL,
+    p99_latency_ms REAL,
+    max_latency_ms REAL
+);
+CREATE INDEX IF NOT EXISTS performance_run ON performance (run_id);
+CREATE TABLE IF NOT EXISTS usage (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    metric TEXT NOT NULL,
+    average REAL,
+    std REAL,
+    min REAL,
+    max REAL,
+    samples INTEGER
+);
+CREATE INDEX IF NOT EXISTS usage_run ON usage (run_id);
+"""
+
+
+def connect(path=DEFAULT_DB):
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA foreign_keys = ON")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def read_csv_rows(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, newline="") as csvfile:
+        return list(csv.DictReader(csvfile))
+
+
+def record_run(
+    connection,
+    run_dir,
+    mode_name,
+    request_count=None,
+    engine=None,
+    parameters=None,
+    timestamp=None,
+):
+    """Index a finished run directory: its key (mode, fsync, implementation,
+    variant, request count, parameters, timestamp) plus its performance.csv
+    and usage.csv rows. The variant (workload profile or "trace") comes from
+    the directory name. Returns the run id; a directory already indexed for
+    this mode is left as it is."""
+    mode = MODES[mode_name]
+    prefix = f"{mode['name']}_" if mode["name"] else ""
+    data_dir = os.path.abspath(run_dir)
+    existing = connection.execute(
+        "SELECT id FROM runs WHERE data_dir = ? AND mode = ?", (data_dir, mode_name)
+    ).fetchone()
+    if existing:
+        return existing[0]
+    if timestamp is None:
+        timestamp = run_timestamp(run_dir) or datetime.now()
+
+    with connection:
+        run_id = connection.execute(
+            "INSERT INTO runs (mode, benchmark, name, fsync, implementation, variant,"
+            " requests, engine, parameters, timestamp, data_dir)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                mode_name,
+                mode["benchmark"],
+                mode["name"],
+                mode["config"].get("appendfsync"),
+                mode["implementation"],
+                parse_run_dir(os.path.basename(data_dir))[1],
+                request_count,
+                engine,
+                json.dumps(parameters or {}, sort_keys=True),
+                timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+                data_dir,
+            ),
+        ).lastrowid
+        connection.executemany(
+            f"INSERT INTO performance (run_id, test, {', '.join(PERFORMANCE_COLUMNS)})"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                [run_id, row["test"]] + [row[column] for column in PERFORMANCE_COLUMNS]
+                for row in read_csv_rows(
+                    os.path.join(run_dir, f"{prefix}performance.csv")
+                )
+            ],
+        )
+        connection.executemany(
+            "INSERT INTO usage (run_id, metric, average, std, min, max, samples)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                [run_id, row["Metric"], row["Average"]]
+                + [row.get(column) for column in ["Std", "Min", "Max", "Samples"]]
+                for row in read_csv_rows(os.path.join(run_dir, f"{prefix}usage.csv"))
+            ],
+        )
+    return run_id
+
+
+def run_timestamp(run_dir):
+    try:
+        return datetime.strptime(
+            os.path.basename(os.path.normpath(run_dir))[-19:], RUN_TIMESTAMP_FORMAT
+        )
+    except ValueError:
+        return None
+
+
+def run_filters(
+    modes=None,
+    requests=None,
+    engine=None,
+    since=None,
+    until=None,
+    parameters=None,
+    variant=None,
+):
+    """SQL condition on `runs` and its arguments. `since`/`until` are
+    'YYYY-MM-DD[ HH:MM:SS]' strings; `parameters` maps parameter name to
+    the value it must have (compared as text). Only default runs match
+    unless `variant` names a workload profile, "trace" or ALL_VARIANTS,
+    since those runs report other commands."""
+    conditions = []
+    arguments = []
+    if variant is None:
+        conditions.append("runs.variant IS NULL")
+    elif variant != ALL_VARIANTS:
+        conditions.append("runs.variant = ?")
+        arguments.append(variant)
+    if modes:
+        conditions.append(f"runs.mode IN ({', '.join('?' * len(modes))})")
+        arguments += list(modes)
+    if requests is not None:
+        conditions.append("runs.requests = ?")
+        arguments.append(requests)
+    if engine:
+        conditions.append("runs.engine = ?")
+        arguments.append(engine)
+    if since:
+        conditions.append("runs.timestamp >= ?")
+        arguments.append(since)
+    if until:
+        if len(until) == len("YYYY-MM-DD"):
+            # A bare date includes the whole day.
+            conditions.append("runs.timestamp < date(?, '+1 day')")
+        else:
+            conditions.append("runs.timestamp <= ?")
+        arguments.append(until)
+    for key, value in (parameters or {}).items():
+        conditions.append("CAST(json_extract(runs.parameters, ?) AS TEXT) = ?")
+        arguments += [f"$.{key}", str(value)]
+    return " AND ".join(conditions) or "1", arguments
+
+
+def query(connection, table, columns, **filters):
+    """Rows of `table` joined with their run's mode and timestamp, for the
+    runs matching `filters` (see run_filters)."""
+    condition, arguments = run_filters(**filters)
+    cursor = connection.execute(
+        f"SELECT runs.id, runs.mode, runs.timestamp, {', '.join(columns)}"
+        f" FROM {table} JOIN runs ON runs.id = {table}.run_id"
+        f" WHERE {condition} ORDER BY runs.timestamp",
+        arguments,
+    )
+    return [["run_id", "mode", "timestamp"] + columns] + cursor.fetchall()
+
+
+def query_performance(connection, **filters):
+    return query(connection, "performance", ["test"] + PERFORMANCE_COLUMNS, **filters)
+
+
+def query_usage(connection, **filters):
+    return query(connection, "usage", ["metric"] + USAGE_COLUMNS, **filters)
+
+
+def import_data_dirs(connection, benchmarks_dir):
+    """Index the run directories under benchmarks/<benchmark>/data/ that are
+    not in the database yet. Their request count and engine are unknown. A
+    legacy run of several modes (AOF-all-<timestamp>) gets one row per mode
+    it has results for."""
+    imported = 0
+    for benchmark in sorted(os.listdir(benchmarks_dir)):
+        data_dir = os.path.join(benchmarks_dir, benchmark, "data")
+        if not os.path.isdir(data_dir):
+            continue
+        for run_name in sorted(os.listdir(data_dir)):
+            run_dir = os.path.join(data_dir, run_name)
+            if not os.path.isdir(run_dir):
+                continue
+            mode_name, _ = parse_run_dir(run_name)
+            if mode_name:
+                mode_names = [mode_name]
+            else:
+                mode_names = [
+                    legacy_mode
+                    for legacy_mode in legacy_run_modes(run_name)
+                    if os.path.exists(
+                        os.path.join(
+                            run_dir, f"{MODES[legacy_mode]['name']}_performance.csv"
+                        )
+                    )
+                ]
+            if not mode_names:
+                print(f"Skipping {run_dir}: no mode matches its name")
+                continue
+            for mode_name in mode_names:
+                before = connection.total_changes
+                record_run(connection, run_dir, mode_name)
+                imported += connection.total_changes > before
+    return imported
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark results database.")
+    parser.add_argument("--db", default=DEFAULT_DB, help="SQLite database path.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser(
+        "import", help="Index existing benchmarks/<benchmark>/data/ run directories."
+    )
+    runs_parser = subparsers.add_parser("runs", help="List the indexed runs.")
+    runs_parser.add_argument("--mode", action="append", choices=list(MODES))
+    args = parser.parse_args()
+
+    connection = connect(args.db)
+    if args.command == "import":
+        count = import_data_dirs(
+            connection, os.path.dirname(os.path.abspath(__file__))
+        )
+        print(f"Indexed {count} new runs in {args.db}")
+    else:
+        condition, arguments = run_filters(modes=args.mode, variant=ALL_VARIANTS)
+        for row in connection.execute(
+            "SELECT id, timestamp, mode, variant, requests, engine, parameters"
+            f" FROM runs WHERE {condition} ORDER BY timestamp",
+            arguments,
+        ):
+            print(",".join("" if value is None else str(value) for value in row))
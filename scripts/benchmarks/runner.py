@@ -0,0 +1,768 @@
+import csv
+import itertools
+import os
+import random
+import re
+import signal
+import tempfile
+import time
+from datetime import datetime
+
+import loadgen
+import redis
+from aof_analysis import analyze_aof, aof_sizes
+from modes import MODES, run_variant, uses_aof, uses_uring
+from results_db import DEFAULT_DB, connect, record_run
+from sampling import PeriodicSampler
+from server_info import ServerInfo
+from server_log import parse_log, write_events
+from uring_fdinfo import (
+    SAMPLE_INTERVAL as RING_SAMPLE_INTERVAL,
+    RingSampler,
+    read_io_uring_enter_calls,
+)
+from util import (
+    appendonly_dir,
+    clean_persistence_files,
+    clear_directory,
+    init_timing_log,
+    kill_process_on_port,
+    log_time,
+    move_files_to_data_dir,
+    run_benchmark,
+    run_combined_benchmark,
+    run_server,
+    run_strace,
+    stop_server,
+    write_timing_report,
+)
+
+benchmarks_dir = os.path.dirname(os.path.abspath(__file__))
+
+SWEEP_DIMENSIONS = ["clients", "pipeline", "data_size", "keyspace"]
+SWEEP_METRICS = [
+    "test",
+    "rps",
+    "avg_latency_ms",
+    "p50_latency_ms",
+    "p95_latency_ms",
+    "p99_latency_ms",
+    "max_latency_ms",
+]
+SWEEP_USAGE = ["cpu_percent", "rss_mb"]
+OPEN_LOOP_FIELDS = [
+    "test",
+    "offered_rps",
+    "rps",
+    "avg_latency_ms",
+    "p50_latency_ms",
+    "p95_latency_ms",
+    "p99_latency_ms",
+    "max_latency_ms",
+    "errors",
+    "sustainable",
+]
+SATURATION_FIELDS = ["test", "max_sustainable_rps", "p99_latency_ms", "p99_threshold_ms"]
+RESTART_FIELDS = [
+    "keys",
+    "data_size",
+    "rdb_bytes",
+    "aof_bytes",
+    "restart_seconds",
+    "server_load_seconds",
+    "loading_total_bytes",
+    "loading_samples",
+    "keys_loaded",
+]
+TIMELINE_FIELDS = [
+    "time_s",
+    "rps",
+    "p50_latency_ms",
+    "p99_latency_ms",
+    "max_latency_ms",
+]
+BACKGROUND_INFO_FIELDS = [
+    "time_s",
+    "aof_rewrite_in_progress",
+    "rdb_bgsave_in_progress",
+    "latest_fork_usec",
+]
+BACKGROUND_SUMMARY_FIELDS = [
+    "command",
+    "trigger_s",
+    "latest_fork_usec",
+    "duration_s",
+    "server_duration_s",
+    "baseline_rps",
+    "baseline_p99_latency_ms",
+    "min_rps",
+    "max_p99_latency_ms",
+]
+CRASH_FIELDS = [
+    "trial",
+    "kill_after_s",
+    "rps",
+    "acked_writes",
+    "recovered_writes",
+    "lost_writes",
+    "loss_window_ms",
+    "clients_with_loss",
+]
+LOAD_TIME = re.compile(r"DB loaded from .*?: ([\d.]+) seconds")
+
+
+def mode_paths(mode, variant=None):
+    benchmark_dir = os.path.join(benchmarks_dir, mode["benchmark"])
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    # Workload and trace runs report other commands; keep them in their own runs.
+    run_name = f"{mode['run_prefix']}-{variant}" if variant else mode["run_prefix"]
+    return {
+        "csvs": os.path.join(benchmark_dir, "csvs"),
+        "logs": os.path.join(benchmark_dir, "logs"),
+        "data": os.path.join(benchmark_dir, "data"),
+        "run_data": os.path.join(benchmark_dir, "data", f"{run_name}-{timestamp}"),
+    }
+
+
+def start_mode_server(mode, log_path, config=None):
+    kill_process_on_port(mode["port"])
+    clean_persistence_files(mode["implementation"])
+    return run_server(
+        mode["implementation"],
+        None,
+        log_path,
+        mode["port"],
+        config if config is not None else mode["config"],
+    )
+
+
+def run_mode(
+    mode_name,
+    request_count,
+    engine="redis-benchmark",
+    sample_interval=0.5,
+    accounting="none",
+    load_options=None,
+    aof_analysis=True,
+    results_db=DEFAULT_DB,
+):
+    mode = MODES[mode_name]
+    load_options = load_options or {}
+    paths = mode_paths(mode, run_variant(load_options))
+    clear_directory(paths["csvs"])
+    clear_directory(paths["logs"])
+    time_csv_path = os.path.join(paths["csvs"], "timing_log.csv")
+    init_timing_log(time_csv_path)
+
+    port = mode["port"]
+    name = mode["name"]
+    label = f" {name}" if name else ""
+    prefix = f"{name}_" if name else ""
+    log_path = os.path.join(paths["logs"], f"{prefix}redis.log")
+    process = start_mode_server(mode, log_path)
+    print(f"Running {mode_name} benchmark on port {port}")
+
+    total_start_time = time.time()
+    try:
+        preload_commands = 0
+        start_sizes = None
+        if load_options.get("workload"):
+            # Create the workload's keys before anything is sampled, so the
+            # bulk writes are not counted against the measured requests.
+            start_time = time.time()
+            print(f"Preloading the keys of workload {load_options['workload']}")
+            preload_commands = loadgen.preload_workload(port, load_options["workload"])
+            if uses_aof(mode):
+                start_sizes = aof_sizes(appendonly_dir(mode["implementation"]))
+            duration = time.time() - start_time
+            log_time(time_csv_path, f"Workload preload{label}", duration)
+
+        start_time = time.time()
+        run_combined_benchmark(
+            process.pid,
+            request_count,
+            paths["csvs"],
+            port,
+            name,
+            engine=engine,
+            sample_interval=sample_interval,
+            proc_accounting=accounting == "proc",
+            load_options=load_options,
+            ring_sampling=uses_uring(mode),
+        )
+        duration = time.time() - start_time
+        log_time(time_csv_path, f"Combined benchmark{label}", duration)
+
+        strace_incr_bytes = None
+        if accounting == "strace":
+            start_time = time.time()
+            if uses_aof(mode):
+                # The strace pass appends to the AOF the combined pass wrote.
+                aof_dir = appendonly_dir(mode["implementation"])
+                strace_incr_bytes = aof_sizes(aof_dir)["incr"]
+            strace_proc = run_strace(
+                process.pid, request_count, paths["csvs"], paths["logs"], name
+            )
+            server_info = ServerInfo(port, paths["csvs"], name, phase="strace")
+            server_info_sampler = PeriodicSampler(server_info.sample, sample_interval)
+            server_info_sampler.start()
+            if uses_uring(mode):
+                rings = RingSampler(process.pid, paths["csvs"], name, phase="strace")
+                rings_sampler = PeriodicSampler(rings.sample, RING_SAMPLE_INTERVAL)
+                rings_sampler.start()
+            try:
+                run_benchmark(
+                    request_count,
+                    paths["csvs"],
+                    port,
+                    name,
+                    save_csv=False,
+                    typebench="strace",
+                    engine=engine,
+                    **load_options,
+                )
+            finally:
+                server_info_sampler.stop()
+                if uses_uring(mode):
+                    rings_sampler.stop()
+            strace_proc.send_signal(signal.SIGINT)
+            strace_proc.wait()
+            server_info.write_csv()
+            if uses_uring(mode):
+                rings.write_csv(read_io_uring_enter_calls(paths["csvs"], name))
+            duration = time.time() - start_time
+            log_time(time_csv_path, f"Strace benchmark{label}", duration)
+
+        if aof_analysis and uses_aof(mode):
+            start_time = time.time()
+            passes = 2 if accounting == "strace" else 1
+            analyze_aof(
+                appendonly_dir(mode["implementation"]),
+                port,
+                request_count * passes,
+                paths["csvs"],
+                name,
+                start_sizes=start_sizes,
+                skip_commands=preload_commands,
+                syscall_window_incr_bytes=strace_incr_bytes,
+            )
+            duration = time.time() - start_time
+            log_time(time_csv_path, f"AOF analysis{label}", duration)
+    finally:
+        stop_server(process)
+    write_events(os.path.join(paths["csvs"], f"{prefix}events.csv"), parse_log(log_path))
+
+    total = time.time() - total_start_time
+    log_time(time_csv_path, "Total", total)
+    write_timing_report(
+        os.path.join(paths["csvs"], "timing_report.csv"),
+        paths["data"],
+        f"{mode['run_prefix']}-",
+        total,
+        f"{mode['legacy_run_prefix']}-" if "legacy_run_prefix" in mode else None,
+        name,
+    )
+    move_files_to_data_dir([paths["csvs"], paths["logs"]], paths["run_data"])
+    # Only closed-loop runs are indexed; sweeps, open-loop, restart,
+    # background-save and crash results stay in their directories.
+    if results_db:
+        connection = connect(results_db)
+        try:
+            record_run(
+                connection,
+                paths["run_data"],
+                mode_name,
+                request_count,
+                engine,
+                {
+                    **load_options,
+                    "sample_interval": sample_interval,
+                    "accounting": accounting,
+                },
+            )
+        finally:
+            connection.close()
+    return paths["run_data"]
+
+
+def read_cell_results(cell_dir, name):
+    prefix = f"{name}_" if name else ""
+    with open(os.path.join(cell_dir, f"{prefix}usage.csv"), newline="") as usage_csv:
+        usage = {row["Metric"]: row["Average"] for row in csv.DictReader(usage_csv)}
+    with open(os.path.join(cell_dir, f"{prefix}performance.csv"), newline="") as perf_csv:
+        for row in csv.DictReader(perf_csv):
+            yield {
+                **{field: row[field] for field in SWEEP_METRICS},
+                "cpu_percent": usage["CPU Usage (%)"],
+                "rss_mb": usage["Memory Usage (MB)"],
+            }
+
+
+def run_sweep(
+    mode_name,
+    request_count,
+    grid,
+    engine="redis-benchmark",
+    sample_interval=0.5,
+    config_grid=None,
+):
+    """Run the workload for every combination of `grid` (dimension -> values)
+    and `config_grid` (server config directive -> values).
+
+    Each cell gets a fresh server started with the cell's directives; one row
+    per cell and command is appended to <prefix>sweep.csv under
+    benchmarks/<benchmark>/sweeps/.
+    """
+    config_grid = config_grid or {}
+    mode = MODES[mode_name]
+    name = mode["name"]
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    sweep_dir = os.path.join(
+        benchmarks_dir, mode["benchmark"], "sweeps", f"{mode['run_prefix']}-{timestamp}"
+    )
+    os.makedirs(sweep_dir, exist_ok=True)
+    sweep_path = os.path.join(sweep_dir, f"{name}_sweep.csv" if name else "sweep.csv")
+
+    with open(sweep_path, "w", newline="") as sweep_csv:
+        fieldnames = SWEEP_DIMENSIONS + list(config_grid) + SWEEP_METRICS + SWEEP_USAGE
+        writer = csv.DictWriter(sweep_csv, fieldnames=fieldnames)
+        writer.writeheader()
+        for values in itertools.product(*grid.values(), *config_grid.values()):
+            cell = dict(zip(grid, values))
+            settings = dict(zip(config_grid, values[len(grid) :]))
+            print(f"Running {mode_name} sweep cell {cell} {settings}")
+            with tempfile.TemporaryDirectory() as cell_dir:
+                process = start_mode_server(
+                    mode,
+                    os.path.join(cell_dir, "redis.log"),
+                    {**mode["config"], **settings},
+                )
+                try:
+                    run_combined_benchmark(
+                        process.pid,
+                        request_count,
+                        cell_dir,
+                        mode["port"],
+                        name,
+                        engine=engine,
+                        sample_interval=sample_interval,
+                        load_options=cell,
+                    )
+                finally:
+                    stop_server(process)
+                for row in read_cell_results(cell_dir, name):
+                    writer.writerow({**cell, **settings, **row})
+            sweep_csv.flush()
+    return sweep_dir
+
+
+def run_open_loop_mode(
+    mode_name,
+    tests=loadgen.DEFAULT_TESTS,
+    start_rate=10000,
+    step=10000,
+    max_rate=200000,
+    p99_threshold_ms=5.0,
+    duration=5.0,
+    load_options=None,
+):
+    """Find each test's maximum sustainable open-loop throughput on a fresh
+    server and write the steps and the result under
+    benchmarks/<benchmark>/open_loop/."""
+    load_options = dict(load_options or {})
+    load_options.pop("pipeline", None)
+    mode = MODES[mode_name]
+    name = mode["name"]
+    prefix = f"{name}_" if name else ""
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    run_dir = os.path.join(
+        benchmarks_dir,
+        mode["benchmark"],
+        "open_loop",
+        f"{mode['run_prefix']}-{timestamp}",
+    )
+    os.makedirs(run_dir, exist_ok=True)
+
+    print(f"Running {mode_name} open-loop search on port {mode['port']}")
+    process = start_mode_server(mode, os.path.join(run_dir, f"{prefix}redis.log"))
+    steps = {}
+    try:
+        for test in tests:
+            steps[test] = loadgen.find_saturation(
+                mode["port"],
+                test,
+                start_rate,
+                step,
+                max_rate,
+                p99_threshold_ms,
+                duration,
+                **load_options,
+            )
+    finally:
+        stop_server(process)
+
+    saturation = []
+    with open(
+        os.path.join(run_dir, f"{prefix}open_loop.csv"), "w", newline=""
+    ) as steps_csv:
+        writer = csv.writer(steps_csv)
+        writer.writerow(OPEN_LOOP_FIELDS)
+        for test, results in steps.items():
+            for result in results:
+                summary = loadgen.summarize(result)
+                writer.writerow(
+                    [summary["test"], result["offered_rps"], f"{summary['rps']:.2f}"]
+                    + [f"{summary[field]:.3f}" for field in OPEN_LOOP_FIELDS[3:8]]
+                    + [result["errors"], result["sustainable"]]
+                )
+            best = loadgen.max_sustainable(results)
+            saturation.append(
+                {
+                    "test": loadgen.TEST_COMMANDS[test][0],
+                    "max_sustainable_rps": round(best["rps"], 2) if best else 0.0,
+                    "p99_latency_ms": round(best["p99_latency_ms"], 3) if best else "",
+                    "p99_threshold_ms": p99_threshold_ms,
+                }
+            )
+    with open(
+        os.path.join(run_dir, f"{prefix}saturation.csv"), "w", newline=""
+    ) as saturation_csv:
+        writer = csv.DictWriter(saturation_csv, fieldnames=SATURATION_FIELDS)
+        writer.writeheader()
+        writer.writerows(saturation)
+    for row in saturation:
+        print(
+            f"\t{mode_name} {row['test']}: max sustainable "
+            f"{row['max_sustainable_rps']:.0f} rps at p99 <= {p99_threshold_ms} ms"
+        )
+    return run_dir
+
+
+def persisted_bytes(implementation):
+    rdb_path = os.path.join("..", implementation, "dump.rdb")
+    rdb_bytes = os.path.getsize(rdb_path) if os.path.exists(rdb_path) else 0
+    aof_bytes = 0
+    aof_dir = appendonly_dir(implementation)
+    if os.path.isdir(aof_dir):
+        aof_bytes = sum(
+            os.path.getsize(os.path.join(aof_dir, file)) for file in os.listdir(aof_dir)
+        )
+    return rdb_bytes, aof_bytes
+
+
+def time_restart(mode, log_path, poll_interval=0.01):
+    """Start the mode's server on its existing persistence files and time it
+    until PING succeeds, sampling INFO persistence while it is loading."""
+    port = mode["port"]
+    loading = {"samples": 0, "total_bytes": 0}
+
+    def sample_loading():
+        try:
+            info = redis.Redis(port=port).info("persistence")
+        except redis.RedisError:
+            return
+        if info.get("loading"):
+            loading["samples"] += 1
+            loading["total_bytes"] = info.get("loading_total_bytes", 0)
+
+    kill_process_on_port(port)
+    start_time = time.perf_counter()
+    process = run_server(
+        mode["implementation"],
+        None,
+        log_path,
+        port,
+        mode["config"],
+        poll_interval=poll_interval,
+        on_wait=sample_loading,
+    )
+    restart_seconds = time.perf_counter() - start_time
+    keys_loaded = redis.Redis(port=port).info("persistence").get(
+        "rdb_last_load_keys_loaded", ""
+    )
+    stop_server(process)
+    with open(log_path) as log:
+        match = LOAD_TIME.search(log.read())
+    return {
+        "restart_seconds": round(restart_seconds, 4),
+        "server_load_seconds": match.group(1) if match else "",
+        "loading_total_bytes": loading["total_bytes"],
+        "loading_samples": loading["samples"],
+        "keys_loaded": keys_loaded,
+    }
+
+
+def run_restart_mode(mode_name, dataset_keys, data_size=3):
+    """For each dataset size, fill a fresh server, stop it, and time the
+    restart that loads the persisted data back. Rows go to <prefix>restart.csv
+    under benchmarks/<benchmark>/restart/."""
+    mode = MODES[mode_name]
+    name = mode["name"]
+    prefix = f"{name}_" if name else ""
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    run_dir = os.path.join(
+        benchmarks_dir,
+        mode["benchmark"],
+        "restart",
+        f"{mode['run_prefix']}-{timestamp}",
+    )
+    os.makedirs(run_dir, exist_ok=True)
+
+    with open(os.path.join(run_dir, f"{prefix}restart.csv"), "w", newline="") as restart_csv:
+        writer = csv.DictWriter(restart_csv, fieldnames=RESTART_FIELDS)
+        writer.writeheader()
+        for keys in dataset_keys:
+            print(f"Running {mode_name} restart benchmark with {keys} keys")
+            process = start_mode_server(
+                mode, os.path.join(run_dir, f"{prefix}fill_{keys}_redis.log")
+            )
+            try:
+                loadgen.fill_keys(mode["port"], keys, data_size)
+                if not uses_aof(mode):
+                    redis.Redis(port=mode["port"]).save()
+            finally:
+                stop_server(process)
+            rdb_bytes, aof_bytes = persisted_bytes(mode["implementation"])
+            restart = time_restart(
+                mode, os.path.join(run_dir, f"{prefix}restart_{keys}_redis.log")
+            )
+            print(
+                f"\t{keys} keys ({aof_bytes or rdb_bytes} bytes) loaded in "
+                f"{restart['restart_seconds']:.3f} seconds"
+            )
+            writer.writerow(
+                {
+                    "keys": keys,
+                    "data_size": data_size,
+                    "rdb_bytes": rdb_bytes,
+                    "aof_bytes": aof_bytes,
+                    **restart,
+                }
+            )
+            restart_csv.flush()
+    return run_dir
+
+
+def run_background_save_mode(
+    mode_name,
+    keys=1000000,
+    rate=20000,
+    duration=30.0,
+    trigger_at=10.0,
+    load_options=None,
+):
+    """Hold an open-loop SET load on a server filled with `keys` keys and run
+    BGREWRITEAOF (BGSAVE for RDB) `trigger_at` seconds in. Per-second
+    throughput and latency, the INFO persistence samples and a summary of the
+    stall go under benchmarks/<benchmark>/background_save/."""
+    if not 0 < trigger_at < duration:
+        raise ValueError(
+            f"trigger_at ({trigger_at}s) must fall inside the load (0-{duration}s)"
+        )
+    load_options = dict(load_options or {})
+    load_options.pop("pipeline", None)
+    load_options.pop("keyspace", None)
+    mode = MODES[mode_name]
+    name = mode["name"]
+    prefix = f"{name}_" if name else ""
+    command = "BGREWRITEAOF" if uses_aof(mode) else "BGSAVE"
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    run_dir = os.path.join(
+        benchmarks_dir,
+        mode["benchmark"],
+        "background_save",
+        f"{mode['run_prefix']}-{timestamp}",
+    )
+    os.makedirs(run_dir, exist_ok=True)
+
+    print(f"Running {mode_name} {command} timeline on port {mode['port']}")
+    log_path = os.path.join(run_dir, f"{prefix}redis.log")
+    process = start_mode_server(mode, log_path)
+    client = redis.Redis(port=mode["port"])
+    samples = []
+    state = {"start": None, "triggered": None}
+
+    def sample():
+        now = time.perf_counter()
+        if state["start"] is None:
+            return
+        if state["triggered"] is None and now - state["start"] >= trigger_at:
+            client.execute_command(command)
+            state["triggered"] = now - state["start"]
+        info = client.info("persistence")
+        samples.append(
+            [round(now - state["start"], 3)]
+            + [info.get(field, 0) for field in BACKGROUND_INFO_FIELDS[1:]]
+        )
+
+    try:
+        loadgen.fill_keys(mode["port"], keys, load_options.get("data_size", 3))
+        # Settle the fill's own AOF writes and snapshot before the timeline.
+        wait_for_background_save(client)
+        sampler = PeriodicSampler(sample, interval=0.1).start()
+        state["start"] = time.perf_counter()
+        try:
+            result = loadgen.run_open_loop(
+                mode["port"], rate, duration, "set", keyspace=keys, **load_options
+            )
+        finally:
+            sampler.stop()
+        wait_for_background_save(client)
+        info = client.info("persistence")
+    finally:
+        stop_server(process)
+    write_events(
+        os.path.join(run_dir, f"{prefix}background_events.csv"), parse_log(log_path)
+    )
+
+    offset = result["start"] - state["start"]
+    rows = [
+        [round(start + offset, 3)] + values
+        for start, *values in loadgen.timeline(result)
+    ]
+    with open(
+        os.path.join(run_dir, f"{prefix}background_timeline.csv"), "w", newline=""
+    ) as timeline_csv:
+        writer = csv.writer(timeline_csv)
+        writer.writerow(TIMELINE_FIELDS)
+        writer.writerows(rows)
+    with open(
+        os.path.join(run_dir, f"{prefix}background_info.csv"), "w", newline=""
+    ) as info_csv:
+        writer = csv.writer(info_csv)
+        writer.writerow(BACKGROUND_INFO_FIELDS)
+        writer.writerows(samples)
+
+    # The stall window is where INFO reported the child running.
+    trigger = state["triggered"]
+    if trigger is None:
+        # The load ended before the sampler reached trigger_at.
+        print(f"\t{command} was not triggered, the load ended first")
+        busy = before = after = []
+    else:
+        busy = [row[0] for row in samples if row[1] or row[2]]
+        before = [row for row in rows if row[0] + 1 <= trigger]
+        after = [row for row in rows if row[0] + 1 > trigger]
+    duration_field = (
+        "aof_last_rewrite_time_sec" if uses_aof(mode) else "rdb_last_bgsave_time_sec"
+    )
+    summary = {
+        "command": command,
+        "trigger_s": round(trigger, 3) if trigger is not None else "",
+        "latest_fork_usec": info.get("latest_fork_usec", ""),
+        "duration_s": round(busy[-1] - trigger, 3) if busy else "",
+        "server_duration_s": info.get(duration_field, ""),
+        "baseline_rps": (
+            round(sum(row[1] for row in before) / len(before), 2) if before else ""
+        ),
+        "baseline_p99_latency_ms": (
+            round(max(row[3] for row in before), 3) if before else ""
+        ),
+        "min_rps": round(min(row[1] for row in after), 2) if after else "",
+        "max_p99_latency_ms": round(max(row[3] for row in after), 3) if after else "",
+    }
+    with open(
+        os.path.join(run_dir, f"{prefix}background_summary.csv"), "w", newline=""
+    ) as summary_csv:
+        writer = csv.DictWriter(summary_csv, fieldnames=BACKGROUND_SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerow(summary)
+    print(
+        f"\t{command}: fork {summary['latest_fork_usec']} us, p99 "
+        f"{summary['baseline_p99_latency_ms']} -> {summary['max_p99_latency_ms']} ms"
+    )
+    return run_dir
+
+
+def wait_for_background_save(client, timeout=600):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        info = client.info("persistence")
+        if not (
+            info.get("aof_rewrite_in_progress")
+            or info.get("aof_rewrite_scheduled")
+            or info.get("rdb_bgsave_in_progress")
+        ):
+            return
+        time.sleep(0.1)
+    raise TimeoutError("Background save did not finish in time")
+
+
+def run_crash_mode(
+    mode_name,
+    trials=10,
+    min_delay=2.0,
+    max_delay=10.0,
+    clients=50,
+    pipeline=1,
+    seed=None,
+):
+    """SIGKILL the server under a sequence-numbered SET load at a random
+    moment, restart it on its persisted files and count the acknowledged
+    writes that did not survive. One row per trial goes to <prefix>crash.csv
+    under benchmarks/<benchmark>/crash/."""
+    mode = MODES[mode_name]
+    name = mode["name"]
+    prefix = f"{name}_" if name else ""
+    rng = random.Random(seed)
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    run_dir = os.path.join(
+        benchmarks_dir,
+        mode["benchmark"],
+        "crash",
+        f"{mode['run_prefix']}-{timestamp}",
+    )
+    os.makedirs(run_dir, exist_ok=True)
+
+    with open(os.path.join(run_dir, f"{prefix}crash.csv"), "w", newline="") as crash_csv:
+        writer = csv.DictWriter(crash_csv, fieldnames=CRASH_FIELDS)
+        writer.writeheader()
+        for trial in range(trials):
+            kill_after = rng.uniform(min_delay, max_delay)
+            print(f"Running {mode_name} crash trial {trial + 1}/{trials}")
+            process = start_mode_server(
+                mode, os.path.join(run_dir, f"{prefix}crash_{trial}_redis.log")
+            )
+            try:
+                result = loadgen.run_until_killed(
+                    mode["port"], kill_after, process.kill, clients, pipeline
+                )
+            finally:
+                process.kill()
+                process.wait()
+
+            process = run_server(
+                mode["implementation"],
+                None,
+                os.path.join(run_dir, f"{prefix}recover_{trial}_redis.log"),
+                mode["port"],
+                mode["config"],
+            )
+            try:
+                values = redis.Redis(port=mode["port"]).mget(result["keys"])
+            finally:
+                stop_server(process)
+
+            acked = result["acked"]
+            recovered = [int(value) if value else 0 for value in values]
+            # Each key only moves forward, so the writes after its recovered
+            # value are the ones lost.
+            lost = [max(0, high - low) for high, low in zip(acked, recovered)]
+            rps = sum(acked) / (result["end"] - result["start"])
+            row = {
+                "trial": trial,
+                "kill_after_s": round(kill_after, 3),
+                "rps": round(rps, 2),
+                "acked_writes": sum(acked),
+                "recovered_writes": sum(min(a, r) for a, r in zip(acked, recovered)),
+                "lost_writes": sum(lost),
+                "loss_window_ms": round(sum(lost) / rps * 1000, 3) if rps else "",
+                "clients_with_loss": sum(1 for count in lost if count),
+            }
+            writer.writerow(row)
+            crash_csv.flush()
+            print(
+                f"\t{row['lost_writes']} of {row['acked_writes']} acknowledged writes "
+                f"lost ({row['loss_window_ms']} ms at {row['rps']:.0f} rps)"
+            )
+    return run_dir
@@ -0,0 +1,179 @@
+import csv
+import math
+import os
+import threading
+import time
+from array import array
+
+
+def append_rows(path, header, rows):
+    """Append rows to a CSV file, writing the header if the file is new."""
+    new = not os.path.exists(path)
+    with open(path, "a", newline="") as csvfile:
+        writer = csv.writer(csvfile)
+        if new:
+            writer.writerow(header)
+        writer.writerows(rows)
+
+
+class RingBuffer:
+    """Fixed-capacity buffer of numeric rows stored column-wise in arrays, or
+    in lists when `typecode` is None so that rows may hold text.
+
+    When full, the oldest row is dropped, or with a `path` all rows are
+    spilled to that CSV file first (see spill()).
+    """
+
+    def __init__(self, columns, capacity, typecode="d", path=None):
+        self.columns = list(columns)
+        self.capacity = capacity
+        self.path = path
+        self.data = [
+            array(typecode, [0]) * capacity if typecode else [None] * capacity
+            for _ in self.columns
+        ]
+        self.head = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def full(self):
+        return self.size == self.capacity
+
+    def append(self, row):
+        if self.path and self.full():
+            self.spill()
+        index = (self.head + self.size) % self.capacity
+        for column, value in zip(self.data, row):
+            column[index] = value
+        if self.size < self.capacity:
+            self.size += 1
+        else:
+            self.head = (self.head + 1) % self.capacity
+
+    def rows(self):
+        for i in range(self.size):
+            index = (self.head + i) % self.capacity
+            yield [column[index] for column in self.data]
+
+    def drain(self):
+        rows = list(self.rows())
+        self.head = 0
+        self.size = 0
+        return rows
+
+    def spill(self):
+        """Move the buffered rows to the end of the CSV file at `path`, with
+        the column names as header if the file is new, so several phases can
+        share the file."""
+        if self.path and self.size:
+            append_rows(self.path, self.columns, self.drain())
+
+
+class RunningStats:
+    """Streaming count/total/mean/std/min/max (Welford)."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other):
+        if not other.count:
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def variance(self):
+        return self.m2 / self.count if self.count else 0.0
+
+    def std(self):
+        return math.sqrt(self.variance())
+
+
+class TimeSeries:
+    """Ring-buffered time series that spills to a CSV file when full.
+
+    Memory stays bounded by `capacity` rows however long the run is, while
+    each column also keeps streaming summary statistics.
+    """
+
+    def __init__(self, columns, path=None, capacity=4096):
+        self.columns = ["timestamp"] + list(columns)
+        self.path = path
+        self.buffer = RingBuffer(self.columns, capacity)
+        self.stats = {column: RunningStats() for column in columns}
+        self.header_written = False
+
+    def add(self, timestamp, values):
+        if self.path and self.buffer.full():
+            self.flush()
+        self.buffer.append([timestamp] + list(values))
+        for column, value in zip(self.columns[1:], values):
+            self.stats[column].add(value)
+
+    def flush(self):
+        if not self.path:
+            return
+        mode = "a" if self.header_written else "w"
+        with open(self.path, mode, newline="") as csvfile:
+            writer = csv.writer(csvfile)
+            if not self.header_written:
+                writer.writerow(self.columns)
+                self.header_written = True
+            writer.writerows(self.buffer.drain())
+
+
+def run_periodic(stop_event, interval, sample):
+    """Call sample() every `interval` seconds on a fixed, drift-free schedule."""
+    next_time = time.monotonic()
+    while not stop_event.is_set():
+        sample()
+        next_time += interval
+        delay = next_time - time.monotonic()
+        if delay < 0:
+            next_time = time.monotonic()
+            delay = 0
+        stop_event.wait(delay)
+
+
+class PeriodicSampler:
+    """Runs sample() on a background thread until stop(), then once more."""
+
+    def __init__(self, sample, interval=0.5):
+        self.sample = sample
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        run_periodic(self.stop_event, self.interval, self.sample)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join()
+        self.sample()
@@ -0,0 +1,114 @@
+import os
+import time
+
+import redis
+from sampling import RingBuffer
+
+# INFO fields sampled every interval; AOF fields are empty when AOF is off.
+INFO_FIELDS = [
+    "instantaneous_ops_per_sec",
+    "total_commands_processed",
+    "aof_delayed_fsync",
+    "aof_pending_bio_fsync",
+    "aof_buffer_length",
+    "aof_current_size",
+    "aof_last_write_status",
+    "aof_rewrite_in_progress",
+    "rdb_bgsave_in_progress",
+    "used_memory",
+]
+COMMANDSTATS_FIELDS = ["calls", "usec", "usec_per_call", "failed_calls"]
+
+
+class ServerInfo:
+    """Polls INFO, INFO commandstats and LATENCY HISTORY over its own
+    connection.
+
+    Each sample() records the INFO fields and the cumulative per-command
+    stats; latency events (aof-fsync-always, aof-write, fork, ...) are
+    recorded once each. The latency monitor is enabled at
+    `latency_threshold_ms` if it is off, so that those events are logged.
+    Rows are kept in ring buffers that spill to <prefix>server_info.csv,
+    <prefix>commandstats.csv and <prefix>latency_events.csv under
+    `output_dir` when full.
+    """
+
+    def __init__(
+        self,
+        port,
+        output_dir,
+        name="",
+        phase="",
+        host="localhost",
+        latency_threshold_ms=1,
+        capacity=4096,
+    ):
+        prefix = f"{name}_" if name else ""
+        self.client = redis.Redis(host=host, port=port)
+        self.phase = phase
+        self.info = RingBuffer(
+            ["timestamp", "phase"] + INFO_FIELDS,
+            capacity,
+            typecode=None,
+            path=os.path.join(output_dir, f"{prefix}server_info.csv"),
+        )
+        self.commandstats = RingBuffer(
+            ["timestamp", "phase", "command"] + COMMANDSTATS_FIELDS,
+            capacity,
+            typecode=None,
+            path=os.path.join(output_dir, f"{prefix}commandstats.csv"),
+        )
+        self.latency_events = RingBuffer(
+            ["timestamp", "phase", "event", "latency_ms"],
+            capacity,
+            typecode=None,
+            path=os.path.join(output_dir, f"{prefix}latency_events.csv"),
+        )
+        self.latest_event = {}
+        if latency_threshold_ms:
+            try:
+                threshold = self.client.config_get("latency-monitor-threshold")
+                if threshold.get("latency-monitor-threshold") == "0":
+                    self.client.config_set(
+                        "latency-monitor-threshold", latency_threshold_ms
+                    )
+            except redis.RedisError:
+                pass
+
+    def sample(self):
+        timestamp = time.time()
+        try:
+            info = self.client.info("all")
+            latest = self.client.execute_command("LATENCY", "LATEST")
+            histories = {
+                event: self.client.execute_command("LATENCY", "HISTORY", event)
+                for event, *_ in latest
+            }
+        except redis.RedisError:
+            return
+        self.info.append(
+            [timestamp, self.phase] + [info.get(field, "") for field in INFO_FIELDS]
+        )
+        for key, stats in info.items():
+            if key.startswith("cmdstat_"):
+                self.commandstats.append(
+                    [timestamp, self.phase, key[len("cmdstat_") :]]
+                    + [stats.get(field, "") for field in COMMANDSTATS_FIELDS]
+                )
+        events = []
+        for event, history in histories.items():
+            event = event.decode() if isinstance(event, bytes) else event
+            seen = self.latest_event.get(event, 0)
+            for event_time, latency_ms in history:
+                if event_time > seen:
+                    events.append([event_time, self.phase, event, latency_ms])
+            if history:
+                self.latest_event[event] = max(seen, max(t for t, _ in history))
+        for row in sorted(events):
+            self.latency_events.append(row)
+
+    def write_csv(self):
+        """Spill the remaining rows, appending to the files so several phases
+        share them."""
+        for buffer in (self.info, self.commandstats, self.latency_events):
+            buffer.spill()
@@ -0,0 +1,122 @@
+import asyncio
+import csv
+import re
+import time
+from datetime import datetime
+
+# "pid:role day month year time.ms level message", level '#' being a warning.
+LOG_LINE = re.compile(
+    r"^\d+:[A-Z] (\d{1,2} \w{3} \d{4} \d\d:\d\d:\d\d\.\d{3}) ([.\-*#]) (.*)$"
+)
+LOG_TIME_FORMAT = "%d %b %Y %H:%M:%S.%f"
+
+# First matching pattern names the event; lines matching none are dropped.
+EVENT_PATTERNS = [
+    ("ready", re.compile(r"Ready to accept connections")),
+    ("fsync_completed", re.compile(r"Final fsync completed")),
+    ("rewrite_started", re.compile(r"Background append only file rewriting started")),
+    ("rewrite_finished", re.compile(r"Background AOF rewrite finished successfully")),
+    ("bgsave_started", re.compile(r"Background saving started")),
+    ("bgsave_finished", re.compile(r"Background saving terminated with success")),
+    ("loaded", re.compile(r"DB loaded from")),
+    ("error", re.compile(r"\b(error|fail(ed|ure)?|can't|cannot)\b", re.IGNORECASE)),
+]
+EVENT_FIELDS = ["timestamp", "event", "message"]
+
+
+def parse_line(line, read_time=None):
+    """Event dict for a server log line, or None. The timestamp is the one
+    the server logged (epoch seconds), falling back to `read_time`."""
+    line = line.rstrip("\r\n")
+    match = LOG_LINE.match(line)
+    if match:
+        timestamp = datetime.strptime(match.group(1), LOG_TIME_FORMAT).timestamp()
+        level, message = match.group(2), match.group(3)
+    else:
+        timestamp, level, message = read_time, "", line.strip()
+    if not message:
+        return None
+    for event, pattern in EVENT_PATTERNS:
+        if pattern.search(message):
+            return {"timestamp": timestamp, "event": event, "message": message}
+    if level == "#":
+        return {"timestamp": timestamp, "event": "warning", "message": message}
+    return None
+
+
+def parse_log(path):
+    with open(path, errors="replace") as log:
+        return [event for event in map(parse_line, log) if event]
+
+
+def write_events(path, events):
+    with open(path, "w", newline="") as events_csv:
+        writer = csv.DictWriter(events_csv, fieldnames=EVENT_FIELDS)
+        writer.writeheader()
+        writer.writerows(events)
+
+
+class ServerLog:
+    """Tails a server log file on the event loop and records its events.
+
+    Call start() from a running loop; coroutines can then await events with
+    wait_for() while the file keeps growing. stop() saves the events to
+    `events_path` if one is given.
+    """
+
+    def __init__(self, path, events_path=None, poll_interval=0.05):
+        self.path = path
+        self.events_path = events_path
+        self.poll_interval = poll_interval
+        self.events = []
+        self.condition = None
+        self.task = None
+
+    def start(self):
+        self.condition = asyncio.Condition()
+        self.task = asyncio.ensure_future(self._tail())
+        return self
+
+    async def _tail(self):
+        partial = ""
+        with open(self.path, errors="replace") as log:
+            while True:
+                chunk = log.read()
+                if not chunk:
+                    await asyncio.sleep(self.poll_interval)
+                    continue
+                lines = (partial + chunk).split("\n")
+                partial = lines.pop()
+                now = time.time()
+                events = [parse_line(line, now) for line in lines]
+                events = [event for event in events if event]
+                if events:
+                    async with self.condition:
+                        self.events.extend(events)
+                        self.condition.notify_all()
+
+    def find(self, event, since=0.0):
+        # Logged times are truncated to the millisecond.
+        for logged in self.events:
+            if logged["event"] == event and logged["timestamp"] >= since - 0.001:
+                return logged
+        return None
+
+    async def wait_for(self, event, since=0.0, timeout=None):
+        """Return the first `event` logged at or after `since` (epoch
+        seconds), waiting for it to appear."""
+        async with self.condition:
+            return await asyncio.wait_for(
+                self.condition.wait_for(lambda: self.find(event, since)), timeout
+            )
+
+    async def stop(self):
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        # Pick up what was logged since the last poll, shutdown included.
+        self.events = parse_log(self.path)
+        if self.events_path:
+            write_events(self.events_path, self.events)
@@ -0,0 +1,181 @@
+import argparse
+import csv
+import re
+import subprocess
+import threading
+
+from sampling import RunningStats
+
+SYSCALLS = ["write", "fdatasync", "io_uring_enter"]
+TIMES_FIELDS = [
+    "process_name",
+    "write_time",
+    "fdatasync_time",
+    "io_uringenter_time",
+    "write_avg",
+    "fdatasync_avg",
+    "io_uringenter_avg",
+    "write_std",
+    "fdatasync_std",
+    "io_uringenter_std",
+    "total_time",
+]
+
+PID_PREFIX = re.compile(r"^\[pid\s+(\d+)(?:<([^>]*)>)?\]\s*")
+CALL = re.compile(r"^(\w+)\((.*)$")
+RESUMED = re.compile(r"^<\.\.\. (\w+) resumed>(.*)$")
+DURATION = re.compile(r"<(\d+(?:\.\d+)?)>\s*$")
+# Only writes of RESP arrays are AOF writes; client replies are ignored.
+AOF_WRITE = re.compile(r'^\d+, "\*')
+
+
+class SyscallAggregator:
+    """Single-pass aggregation of strace -f -T output per thread and syscall."""
+
+    def __init__(self, default_pid=None, default_name="", log_file=None):
+        self.default_pid = default_pid
+        self.default_name = default_name
+        self.log_file = log_file
+        self.threads = {}
+        self.pending = {}
+
+    def _stats(self, thread, syscall):
+        per_thread = self.threads.setdefault(
+            thread, {name: RunningStats() for name in SYSCALLS}
+        )
+        return per_thread[syscall]
+
+    def _record(self, thread, syscall, rest):
+        match = DURATION.search(rest)
+        if match:
+            self._stats(thread, syscall).add(float(match.group(1)))
+
+    def feed(self, line):
+        line = line.rstrip("\n")
+        match = PID_PREFIX.match(line)
+        if match:
+            thread = (int(match.group(1)), match.group(2) or "")
+            body = line[match.end() :]
+        elif self.default_pid is not None:
+            thread = (self.default_pid, self.default_name)
+            body = line
+        else:
+            return
+
+        resumed = RESUMED.match(body)
+        if resumed:
+            syscall, rest = resumed.groups()
+            if self.pending.pop((thread[0], syscall), False):
+                self._record(thread, syscall, rest)
+                self._log(line)
+            return
+
+        call = CALL.match(body)
+        if not call or call.group(1) not in SYSCALLS:
+            return
+        syscall, rest = call.groups()
+        if syscall == "write" and not AOF_WRITE.match(rest):
+            return
+        self._log(line)
+        if rest.endswith("<unfinished ...>"):
+            self.pending[(thread[0], syscall)] = True
+        else:
+            self._record(thread, syscall, rest)
+
+    def _log(self, line):
+        if self.log_file:
+            self.log_file.write(line + "\n")
+
+    def sorted_threads(self):
+        return sorted(self.threads, key=lambda thread: f"{thread[0]}<{thread[1]}>")
+
+    def write_csvs(self, syscalls_path, times_path):
+        with open(syscalls_path, "w", newline="") as calls_csv, open(
+            times_path, "w", newline=""
+        ) as times_csv:
+            calls_writer = csv.writer(calls_csv)
+            times_writer = csv.writer(times_csv)
+            calls_writer.writerow(["process_name"] + SYSCALLS)
+            times_writer.writerow(TIMES_FIELDS)
+            for thread in self.sorted_threads():
+                stats = [self.threads[thread][name] for name in SYSCALLS]
+                totals = [s.mean * s.count for s in stats]
+                calls_writer.writerow([thread[1]] + [s.count for s in stats])
+                stds = [s.std() if s.count > 1 else 0.0 for s in stats]
+                times_writer.writerow(
+                    [thread[1]]
+                    + [f"{value:.6f}" for value in totals + [s.mean for s in stats]]
+                    + [f"{value:.6f}" for value in stds + [sum(totals)]]
+                )
+
+
+class StraceCollector:
+    """Runs strace on a process and aggregates its output as it arrives.
+
+    Mirrors the Popen interface the benchmarks use: send_signal(SIGINT)
+    stops tracing and wait() writes the CSV reports.
+    """
+
+    def __init__(self, pid, syscalls_path, times_path, log_path):
+        self.syscalls_path = syscalls_path
+        self.times_path = times_path
+        self.log_file = open(log_path, "w")
+        self.aggregator = SyscallAggregator(pid, read_comm(pid), self.log_file)
+        command = [
+            "sudo",
+            "strace",
+            "-f",
+            "-T",
+            "--decode-pids=comm",
+            "-e",
+            "trace=" + ",".join(SYSCALLS),
+            "-p",
+            str(pid),
+        ]
+        self.process = subprocess.Popen(
+            command,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+            errors="replace",
+        )
+        self.reader = threading.Thread(target=self._consume, daemon=True)
+        self.reader.start()
+
+    def _consume(self):
+        for line in self.process.stderr:
+            self.aggregator.feed(line)
+
+    def send_signal(self, sig):
+        self.process.send_signal(sig)
+
+    def wait(self):
+        returncode = self.process.wait()
+        self.reader.join()
+        self.log_file.close()
+        self.aggregator.write_csvs(self.syscalls_path, self.times_path)
+        return returncode
+
+
+def read_comm(pid):
+    try:
+        with open(f"/proc/{pid}/comm") as comm:
+            return comm.read().strip()
+    except OSError:
+        return ""
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Aggregate a saved strace -f -T log into the syscall CSVs."
+    )
+    parser.add_argument("log", help="strace output to parse.")
+    parser.add_argument("syscalls_csv")
+    parser.add_argument("times_csv")
+    args = parser.parse_args()
+
+    aggregator = SyscallAggregator()
+    with open(args.log, errors="replace") as log:
+        for line in log:
+            aggregator.feed(line)
+    aggregator.write_csvs(args.syscalls_csv, args.times_csv)
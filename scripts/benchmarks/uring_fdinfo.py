@@ -0,0 +1,196 @@
+import csv
+import os
+import time
+
+from procfs import read_key_values
+from sampling import RingBuffer, RunningStats, append_rows
+
+# Ring counters are 32-bit and wrap.
+COUNTER_MOD = 1 << 32
+SAMPLE_INTERVAL = 0.05
+RING_FIELDS = [
+    "timestamp",
+    "phase",
+    "fd",
+    "sq_entries",
+    "cq_entries",
+    "sq_head",
+    "sq_tail",
+    "cq_head",
+    "cq_tail",
+    "sq_pending",
+    "cq_pending",
+    "submitted",
+    "completed",
+]
+SUMMARY_FIELDS = [
+    "phase",
+    "rings",
+    "samples",
+    "duration_s",
+    "sqes_submitted",
+    "cqes_completed",
+    "submit_rate",
+    "mean_sq_pending",
+    "max_sq_pending",
+    "sq_nonempty_fraction",
+    "max_sq_utilization",
+    "mean_cq_pending",
+    "max_cq_pending",
+    "io_uring_enter_calls",
+    "sqes_per_enter",
+]
+
+
+def ring_fds(pid):
+    """File descriptors of the io_uring instances a process holds."""
+    fds = []
+    try:
+        entries = os.listdir(f"/proc/{pid}/fd")
+    except (FileNotFoundError, ProcessLookupError, PermissionError):
+        return fds
+    for fd in entries:
+        try:
+            if os.readlink(f"/proc/{pid}/fd/{fd}") == "anon_inode:[io_uring]":
+                fds.append(int(fd))
+        except OSError:
+            continue
+    return sorted(fds)
+
+
+def read_ring(pid, fd):
+    info = read_key_values(f"/proc/{pid}/fdinfo/{fd}")
+    if "SqHead" not in info:
+        return None
+    return {
+        "sq_entries": int(info["SqMask"], 0) + 1,
+        "cq_entries": int(info["CqMask"], 0) + 1,
+        "sq_head": int(info["SqHead"]),
+        "sq_tail": int(info["SqTail"]),
+        "cq_head": int(info["CqHead"]),
+        "cq_tail": int(info["CqTail"]),
+    }
+
+
+def read_io_uring_enter_calls(output_dir, name=""):
+    """io_uring_enter calls counted by the strace pass, if it ran."""
+    prefix = f"{name}_" if name else ""
+    path = os.path.join(output_dir, f"{prefix}syscalls.csv")
+    if not os.path.exists(path):
+        return None
+    with open(path, newline="") as syscalls_csv:
+        return sum(int(row["io_uring_enter"]) for row in csv.DictReader(syscalls_csv))
+
+
+class RingSampler:
+    """Samples the SQ/CQ heads and tails of a process's io_uring rings from
+    /proc/<pid>/fdinfo.
+
+    sq_pending (tail - head) is SQEs queued but not yet consumed by the
+    kernel, cq_pending CQEs not yet reaped; submitted/completed are the
+    head/tail advances since the ring's previous sample. Rings are looked up
+    again on every sample, so rings set up during the run are picked up.
+    Samples are kept in a ring buffer that spills to
+    <output_dir>/<prefix>uring_rings.csv when full, and the summary comes
+    from running statistics over all of them.
+    """
+
+    def __init__(self, pid, output_dir, name="", phase="", capacity=4096):
+        prefix = f"{name}_" if name else ""
+        self.pid = pid
+        self.phase = phase
+        self.summary_path = os.path.join(output_dir, f"{prefix}uring_rings_summary.csv")
+        self.buffer = RingBuffer(
+            RING_FIELDS,
+            capacity,
+            typecode=None,
+            path=os.path.join(output_dir, f"{prefix}uring_rings.csv"),
+        )
+        self.stats = {
+            field: RunningStats()
+            for field in [
+                "sq_pending",
+                "cq_pending",
+                "sq_utilization",
+                "submitted",
+                "completed",
+            ]
+        }
+        self.sq_nonempty = 0
+        self.fds = set()
+        self.first_timestamp = None
+        self.last_timestamp = None
+        self.previous = {}
+
+    def sample(self):
+        timestamp = time.time()
+        for fd in ring_fds(self.pid):
+            ring = read_ring(self.pid, fd)
+            if ring is None:
+                continue
+            previous = self.previous.get(fd, ring)
+            self.previous[fd] = ring
+            values = {
+                "sq_pending": (ring["sq_tail"] - ring["sq_head"]) % COUNTER_MOD,
+                "cq_pending": (ring["cq_tail"] - ring["cq_head"]) % COUNTER_MOD,
+                "submitted": (ring["sq_head"] - previous["sq_head"]) % COUNTER_MOD,
+                "completed": (ring["cq_tail"] - previous["cq_tail"]) % COUNTER_MOD,
+            }
+            self.buffer.append(
+                [timestamp, self.phase, fd]
+                + [ring[field] for field in RING_FIELDS[3:9]]
+                + [values[field] for field in RING_FIELDS[9:]]
+            )
+            values["sq_utilization"] = values["sq_pending"] / ring["sq_entries"]
+            for field, value in values.items():
+                self.stats[field].add(value)
+            self.sq_nonempty += values["sq_pending"] > 0
+            self.fds.add(fd)
+            if self.first_timestamp is None:
+                self.first_timestamp = timestamp
+            self.last_timestamp = timestamp
+
+    def summary(self, io_uring_enter_calls=None):
+        samples = self.stats["sq_pending"].count
+        if not samples:
+            return None
+        submitted = self.stats["submitted"].total
+        duration = self.last_timestamp - self.first_timestamp
+        return {
+            "phase": self.phase,
+            "rings": len(self.fds),
+            "samples": samples,
+            "duration_s": round(duration, 3),
+            "sqes_submitted": submitted,
+            "cqes_completed": self.stats["completed"].total,
+            "submit_rate": round(submitted / duration, 2) if duration else "",
+            "mean_sq_pending": round(self.stats["sq_pending"].mean, 3),
+            "max_sq_pending": self.stats["sq_pending"].max,
+            "sq_nonempty_fraction": round(self.sq_nonempty / samples, 4),
+            "max_sq_utilization": round(self.stats["sq_utilization"].max, 4),
+            "mean_cq_pending": round(self.stats["cq_pending"].mean, 3),
+            "max_cq_pending": self.stats["cq_pending"].max,
+            "io_uring_enter_calls": (
+                io_uring_enter_calls if io_uring_enter_calls is not None else ""
+            ),
+            "sqes_per_enter": (
+                round(submitted / io_uring_enter_calls, 3)
+                if io_uring_enter_calls
+                else ""
+            ),
+        }
+
+    def write_csv(self, io_uring_enter_calls=None):
+        """Spill the remaining samples to <prefix>uring_rings.csv and append
+        the phase summary to <prefix>uring_rings_summary.csv, so several
+        phases share the files. Nothing is written if the process had no
+        ring."""
+        summary = self.summary(io_uring_enter_calls)
+        if summary is None:
+            return
+        self.buffer.spill()
+        append_rows(
+            self.summary_path,
+            SUMMARY_FIELDS,
+            [[summary[field] for field in SUMMARY_FIELDS]],
+        )
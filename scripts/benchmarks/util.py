@@ -1,12 +1,25 @@
 import os
+import csv
+import shutil
 import subprocess
 import pandas as pd
 import math
 import psutil
 import signal
+import threading
 import redis
 import time
+import command_trace
+import loadgen
+from diskstats import DiskSampler
+from procfs import ThreadAccounting, ThreadCpu
+from sampling import PeriodicSampler, TimeSeries, run_periodic
+from server_info import ServerInfo
+from uring_fdinfo import SAMPLE_INTERVAL as RING_SAMPLE_INTERVAL, RingSampler
+from strace_parser import StraceCollector
 
+# usage.csv metric prefix of the per-thread-group CPU rows.
+THREAD_CPU_METRIC = "Thread CPU (%): "
 base_csv_dir = "csvs"
 base_graphs_dir = "graphs"
 base_logs_dir = "logs"
@@ -25,7 +38,15 @@ def check_redis_connection(port1):
         return False
 
 
-def run_server(implementation, configpath, logpath, port):
+def run_server(
+    implementation,
+    configpath,
+    logpath,
+    port,
+    config=None,
+    poll_interval=0.1,
+    on_wait=None,
+):
     with open(logpath, "w") as logfile:
         command = [
             "./src/redis-server",
@@ -33,11 +54,20 @@ def run_server(implementation, configpath, logpath, port):
             "--port",
             str(port),
         ]
+        for key, value in (config or {}).items():
+            command += [f"--{key}", str(value)]
         process = subprocess.Popen(
             command, stdout=logfile, stderr=logfile, cwd="../" + implementation
         )
     while not check_redis_connection(port):
-        time.sleep(0.1)
+        if process.poll() is not None:
+            raise RuntimeError(
+                f"{implementation} exited with code {process.returncode}, "
+                f"see {logpath}"
+            )
+        if on_wait:
+            on_wait()
+        time.sleep(poll_interval)
     return process
 
 
@@ -46,18 +76,103 @@ def stop_server(process):
     process.wait()
 
 
-def monitor_process(pid, stop_event, cpu_usages, memory_usages):
+def appendonly_dir(implementation):
+    return os.path.join("..", implementation, "appendonlydir")
+
+
+def clean_persistence_files(implementation):
+    shutil.rmtree(appendonly_dir(implementation), ignore_errors=True)
+    dump_path = os.path.join("..", implementation, "dump.rdb")
+    if os.path.exists(dump_path):
+        os.remove(dump_path)
+
+
+def clear_directory(path):
+    os.makedirs(path, exist_ok=True)
+    for entry in os.listdir(path):
+        entry_path = os.path.join(path, entry)
+        if os.path.isdir(entry_path):
+            shutil.rmtree(entry_path)
+        else:
+            os.remove(entry_path)
+
+
+def move_files_to_data_dir(source_dirs, run_data_dir):
+    os.makedirs(run_data_dir, exist_ok=True)
+    for source_dir in source_dirs:
+        for entry in os.listdir(source_dir):
+            shutil.move(os.path.join(source_dir, entry), run_data_dir)
+
+
+def init_timing_log(time_csv_path):
+    with open(time_csv_path, "w", newline="") as time_csv:
+        writer = csv.DictWriter(time_csv, fieldnames=["Benchmark", "Time (seconds)"])
+        writer.writeheader()
+
+
+def log_time(time_csv_path, benchmark_name, duration):
+    with open(time_csv_path, "a", newline="") as time_csv:
+        writer = csv.DictWriter(time_csv, fieldnames=["Benchmark", "Time (seconds)"])
+        writer.writerow({"Benchmark": benchmark_name, "Time (seconds)": duration})
+
+
+def usage_timeseries(output_dir, name=""):
+    if name != "":
+        path = os.path.join(output_dir, f"{name}_usage_timeseries.csv")
+    else:
+        path = os.path.join(output_dir, "usage_timeseries.csv")
+    return TimeSeries(["cpu_percent", "rss_mb"], path)
+
+
+def monitor_process(pid, stop_event, samples, interval=0.5, threads=None):
     try:
         p = psutil.Process(pid)
-        while not stop_event.is_set():
+        p.cpu_percent(None)  # the first call only primes the CPU counters
+        if threads:
+            threads.sample()
+
+        def sample():
             with p.oneshot():
                 cpu_percent = p.cpu_percent(None)
                 memory_info = p.memory_info().rss / (1024 * 1024)  # in MB
-                cpu_usages.append(cpu_percent)
-                memory_usages.append(memory_info)
+            samples.add(time.time(), (cpu_percent, memory_info))
+            if threads:
+                threads.sample()
+
+        stop_event.wait(interval)
+        run_periodic(stop_event, interval, sample)
     except psutil.NoSuchProcess:
         print(f"Process {pid} not found")
-        
+    finally:
+        samples.flush()
+
+
+def write_usage_csv(usage_csv_path, samples, threads=None):
+    metrics = [("CPU Usage (%)", "cpu_percent"), ("Memory Usage (MB)", "rss_mb")]
+    with open(usage_csv_path, "w", newline="") as usage_csv:
+        writer = csv.writer(usage_csv)
+        writer.writerow(["Metric", "Average", "Std", "Min", "Max", "Samples"])
+        for metric, column in metrics:
+            stats = samples.stats[column]
+            if stats.count:
+                writer.writerow(
+                    [metric, stats.mean, stats.std(), stats.min, stats.max, stats.count]
+                )
+            else:
+                writer.writerow([metric, 0, 0, 0, 0, 0])
+        if threads:
+            for group, stats in threads.stats.items():
+                writer.writerow(
+                    [
+                        f"{THREAD_CPU_METRIC}{group}",
+                        stats.mean,
+                        stats.std(),
+                        stats.min,
+                        stats.max,
+                        stats.count,
+                    ]
+                )
+
 
 
 def run_strace(pid, request_count, syscalls_dir, logs_dir, name=""):
@@ -71,18 +186,9 @@ def run_strace(pid, request_count, syscalls_dir, logs_dir, name=""):
         syscalls_filename = os.path.join(syscalls_dir, f"syscalls.csv")
         syscall_times_filename = os.path.join(syscalls_dir, f"syscalls_times.csv")
         log_filename = os.path.join(logs_dir, "strace.txt")
-    command = [
-        "sudo",
-        "./strace-syscalls.sh",
-        str(pid),
-        syscalls_filename,
-        syscall_times_filename,
-        log_filename,
-    ]
-    process = subprocess.Popen(
-        command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+    return StraceCollector(
+        pid, syscalls_filename, syscall_times_filename, log_filename
     )
-    return process
 
 
 def kill_process_on_port(port):
@@ -109,13 +215,46 @@ def kill_process_on_port(port):
 
 
 def run_benchmark(
-    request_count, output_dir, port, name="", save_csv=True, typebench=""
+    request_count,
+    output_dir,
+    port,
+    name="",
+    save_csv=True,
+    typebench="",
+    engine="redis-benchmark",
+    clients=50,
+    pipeline=1,
+    data_size=3,
+    keyspace=0,
+    workload=None,
+    trace=None,
+    trace_timed=False,
 ):
     if name != "":
         csv_filename = os.path.join(output_dir, f"{name}_performance.csv")
     else:
         csv_filename = os.path.join(output_dir, f"performance.csv")
 
+    if engine == "native":
+        return run_native_benchmark(
+            request_count,
+            output_dir,
+            csv_filename,
+            port,
+            name,
+            save_csv,
+            typebench,
+            clients,
+            pipeline,
+            data_size,
+            keyspace,
+            workload,
+            trace,
+            trace_timed,
+        )
+    if workload or trace:
+        raise ValueError("Workload profiles and trace replay need the native engine")
+
     if save_csv:
         last_arg = "--csv"
     else:
@@ -126,13 +265,19 @@ def run_benchmark(
         "-p",
         str(port),
         "-c",
-        "50",
+        str(clients),
+        "-P",
+        str(pipeline),
+        "-d",
+        str(data_size),
         "-t",
         "set,hset,incr,lpush",
         "-n",
         str(request_count//4),
         last_arg,
     ]
+    if keyspace:
+        command[1:1] = ["-r", str(keyspace)]
 
     print(f"Running {typebench} for {request_count} requests")
 
@@ -158,3 +303,205 @@ def run_benchmark(
         raise subprocess.CalledProcessError(process.returncode, command)
 
     print("Benchmark completed successfully.")
+
+
+
+def run_native_benchmark(
+    request_count,
+    output_dir,
+    csv_filename,
+    port,
+    name,
+    save_csv,
+    typebench,
+    clients,
+    pipeline,
+    data_size,
+    keyspace,
+    workload=None,
+    trace=None,
+    trace_timed=False,
+):
+    if trace:
+        print(f"Running {typebench} by replaying {trace} (native engine)")
+    else:
+        print(f"Running {typebench} for {request_count} requests (native engine)")
+    if trace:
+        results = command_trace.replay(
+            trace, port, clients, timed=trace_timed, pipeline=pipeline
+        )
+    elif workload:
+        # The caller creates the keys (loadgen.preload_workload) beforehand,
+        # so the bulk writes stay out of the measured pass.
+        results = loadgen.run_workload(
+            port,
+            request_count,
+            workload,
+            clients=clients,
+            pipeline=pipeline,
+            preload=False,
+        )
+    else:
+        results = loadgen.run_load(
+            port,
+            request_count // len(loadgen.DEFAULT_TESTS),
+            loadgen.DEFAULT_TESTS,
+            clients=clients,
+            pipeline=pipeline,
+            data_size=data_size,
+            keyspace=keyspace,
+        )
+    if save_csv:
+        loadgen.write_performance_csv(csv_filename, results)
+        loadgen.write_histograms(output_dir, name, results)
+    print("Benchmark completed successfully.")
+    return results
+
+
+def run_combined_benchmark(
+    pid,
+    request_count,
+    output_dir,
+    port,
+    name="",
+    engine="redis-benchmark",
+    sample_interval=0.5,
+    proc_accounting=False,
+    load_options=None,
+    ring_sampling=False,
+):
+    prefix = f"{name}_" if name != "" else ""
+    samples = usage_timeseries(output_dir, name)
+    threads = ThreadCpu(
+        pid, os.path.join(output_dir, f"{prefix}thread_cpu_timeseries.csv")
+    )
+    stop_event = threading.Event()
+    monitor_thread = threading.Thread(
+        target=monitor_process,
+        args=(pid, stop_event, samples, sample_interval, threads),
+    )
+    monitor_thread.start()
+    server_info = ServerInfo(port, output_dir, name, phase="combined")
+    server_info_sampler = PeriodicSampler(server_info.sample, sample_interval)
+    server_info_sampler.start()
+    if ring_sampling:
+        rings = RingSampler(pid, output_dir, name, phase="combined")
+        rings_sampler = PeriodicSampler(rings.sample, RING_SAMPLE_INTERVAL)
+        rings_sampler.start()
+    # The server runs in its data directory.
+    disk = DiskSampler(f"/proc/{pid}/cwd", output_dir, name, phase="combined")
+    disk_sampler = PeriodicSampler(disk.sample, sample_interval)
+    disk_sampler.start()
+    if proc_accounting:
+        accounting = ThreadAccounting(pid)
+        accounting_sampler = PeriodicSampler(accounting.sample, sample_interval)
+        accounting_sampler.start()
+    try:
+        results = run_benchmark(
+            request_count,
+            output_dir,
+            port,
+            name,
+            save_csv=True,
+            typebench="performance and resource usage",
+            engine=engine,
+            **(load_options or {}),
+        )
+    finally:
+        stop_event.set()
+        monitor_thread.join()
+        server_info_sampler.stop()
+        if ring_sampling:
+            rings_sampler.stop()
+        # Write back what the run left dirty so its last sample counts it.
+        os.sync()
+        disk_sampler.stop()
+        if proc_accounting:
+            accounting_sampler.stop()
+
+    write_usage_csv(os.path.join(output_dir, f"{prefix}usage.csv"), samples, threads)
+    threads.flush()
+    server_info.write_csv()
+    if ring_sampling:
+        rings.write_csv()
+    disk.write_csv(
+        sum(result["requests"] for result in results) if results else request_count,
+    )
+    if proc_accounting:
+        accounting.write_csv(os.path.join(output_dir, f"{prefix}thread_accounting.csv"))
+    return results
+
+
+def read_timing_log(path):
+    with open(path, newline="") as time_csv:
+        return [
+            (row["Benchmark"], float(row["Time (seconds)"]))
+            for row in csv.DictReader(time_csv)
+        ]
+
+
+def find_baseline_timing(data_dir, run_prefix, legacy_run_prefix=None, name=""):
+    # Most recent earlier run of the same benchmark that used separate passes.
+    # Legacy runs of several modes at once (AOF-all-<timestamp>) count with
+    # the passes logged for this mode (rows ending in " <name>").
+    if not os.path.isdir(data_dir):
+        return None, None
+    prefixes = [run_prefix] + ([legacy_run_prefix] if legacy_run_prefix else [])
+    runs = [run for run in os.listdir(data_dir) if run.startswith(tuple(prefixes))]
+    for run in sorted(runs, key=lambda run: run[-19:], reverse=True):
+        path = os.path.join(data_dir, run, "timing_log.csv")
+        if not os.path.exists(path):
+            continue
+        rows = read_timing_log(path)
+        if any(row_name.startswith("Combined") for row_name, _ in rows):
+            continue
+        if legacy_run_prefix and run.startswith(legacy_run_prefix):
+            passes = [
+                duration
+                for row_name, duration in rows
+                if row_name.endswith(f" {name}")
+            ]
+            if name and passes:
+                return run, sum(passes)
+            continue
+        totals = [duration for row_name, duration in rows if row_name == "Total"]
+        if totals:
+            return run, totals[-1]
+    return None, None
+
+
+def write_timing_report(
+    report_path, data_dir, run_prefix, current_total, legacy_run_prefix=None, name=""
+):
+    baseline_run, baseline_total = find_baseline_timing(
+        data_dir, run_prefix, legacy_run_prefix, name
+    )
+    with open(report_path, "w", newline="") as report_csv:
+        writer = csv.writer(report_csv)
+        writer.writerow(
+            [
+                "Baseline run",
+                "Baseline total (seconds)",
+                "Current total (seconds)",
+                "Saved (seconds)",
+                "Speedup",
+            ]
+        )
+        if baseline_total:
+            speedup = baseline_total / current_total if current_total else ""
+            writer.writerow(
+                [
+                    baseline_run,
+                    baseline_total,
+                    current_total,
+                    baseline_total - current_total,
+                    speedup,
+                ]
+            )
+            print(
+                f"Total time {current_total:.1f}s vs {baseline_total:.1f}s "
+                f"in {baseline_run}"
+                + (f" ({speedup:.2f}x)" if speedup else "")
+            )
+        else:
+            writer.writerow(["", "", current_total, "", ""])
@@ -0,0 +1,151 @@
+import bisect
+import itertools
+import random
+
+# Commands a workload can mix: name -> (label, key type, builds args from
+# key and value). Each key type lives under its own key prefix.
+COMMANDS = {
+    "get": ("GET", "string", lambda key, value: ["GET", key]),
+    "set": ("SET", "string", lambda key, value: ["SET", key, value]),
+    "hget": ("HGET", "hash", lambda key, value: ["HGET", key, "field"]),
+    "hset": ("HSET", "hash", lambda key, value: ["HSET", key, "field", value]),
+    "lrange": ("LRANGE", "list", lambda key, value: ["LRANGE", key, "0", "9"]),
+    "lpush": ("LPUSH", "list", lambda key, value: ["LPUSH", key, value]),
+    "sismember": ("SISMEMBER", "set", lambda key, value: ["SISMEMBER", key, "member"]),
+    "sadd": ("SADD", "set", lambda key, value: ["SADD", key, value]),
+    "incr": ("INCR", "counter", lambda key, value: ["INCR", key]),
+}
+
+# Command used to create a key of each type before the run, so reads hit.
+PRELOAD_COMMANDS = {
+    "string": lambda key, value: ["SET", key, value],
+    "hash": lambda key, value: ["HSET", key, "field", value],
+    "list": lambda key, value: ["RPUSH", key, value],
+    "set": lambda key, value: ["SADD", key, "member"],
+    "counter": lambda key, value: ["SET", key, "0"],
+}
+
+# Workload profiles. `commands` maps command -> weight, `keys` selects the
+# key distribution over `keyspace` keys and `value_sizes` maps value size in
+# bytes -> weight.
+WORKLOADS = {
+    "read-heavy": {
+        "commands": {"get": 80, "set": 20},
+        "keys": "uniform",
+        "keyspace": 100000,
+        "value_sizes": {64: 1},
+    },
+    "read-heavy-zipf": {
+        "commands": {"get": 80, "set": 20},
+        "keys": "zipf",
+        "zipf_exponent": 0.99,
+        "keyspace": 100000,
+        "value_sizes": {64: 50, 512: 40, 4096: 10},
+    },
+    "hotspot": {
+        "commands": {"get": 80, "set": 20},
+        "keys": "hotspot",
+        "hot_fraction": 0.01,
+        "hot_share": 0.9,
+        "keyspace": 100000,
+        "value_sizes": {64: 50, 512: 40, 4096: 10},
+    },
+    "write-heavy": {
+        "commands": {"get": 20, "set": 80},
+        "keys": "zipf",
+        "zipf_exponent": 0.99,
+        "keyspace": 100000,
+        "value_sizes": {64: 50, 512: 40, 4096: 10},
+    },
+    "mixed-types": {
+        "commands": {
+            "get": 30,
+            "set": 10,
+            "hget": 20,
+            "hset": 5,
+            "lrange": 10,
+            "lpush": 5,
+            "sismember": 10,
+            "sadd": 5,
+            "incr": 5,
+        },
+        "keys": "zipf",
+        "zipf_exponent": 0.99,
+        "keyspace": 100000,
+        "value_sizes": {64: 60, 512: 30, 4096: 10},
+    },
+}
+
+
+def weighted(choices):
+    items = list(choices)
+    cumulative = list(itertools.accumulate(choices.values()))
+    return items, cumulative
+
+
+class KeySampler:
+    """Draws key indexes in [0, keyspace) from a uniform, Zipfian or hotspot
+    distribution."""
+
+    def __init__(self, profile, rng):
+        self.rng = rng
+        self.keyspace = profile["keyspace"]
+        self.distribution = profile.get("keys", "uniform")
+        if self.distribution == "zipf":
+            exponent = profile.get("zipf_exponent", 0.99)
+            self.cumulative = list(
+                itertools.accumulate(
+                    1 / (rank + 1) ** exponent for rank in range(self.keyspace)
+                )
+            )
+        elif self.distribution == "hotspot":
+            self.hot_keys = max(1, int(self.keyspace * profile.get("hot_fraction", 0.2)))
+            self.hot_share = profile.get("hot_share", 0.8)
+        elif self.distribution != "uniform":
+            raise ValueError(f"Unknown key distribution {self.distribution!r}")
+
+    def sample(self):
+        if self.distribution == "zipf":
+            point = self.rng.random() * self.cumulative[-1]
+            return min(bisect.bisect(self.cumulative, point), self.keyspace - 1)
+        if self.distribution == "hotspot":
+            if self.rng.random() < self.hot_share or self.hot_keys == self.keyspace:
+                return self.rng.randrange(self.hot_keys)
+            return self.rng.randrange(self.hot_keys, self.keyspace)
+        return self.rng.randrange(self.keyspace)
+
+
+class Workload:
+    """Generates the commands of a workload profile one request at a time."""
+
+    def __init__(self, profile, seed=None):
+        if isinstance(profile, str):
+            profile = WORKLOADS[profile]
+        self.profile = profile
+        self.rng = random.Random(seed)
+        self.commands, self.command_weights = weighted(profile["commands"])
+        sizes, self.size_weights = weighted(profile.get("value_sizes", {3: 1}))
+        self.values = [b"x" * size for size in sizes]
+        self.keys = KeySampler(profile, self.rng)
+
+    def labels(self):
+        return [COMMANDS[command][0] for command in self.commands]
+
+    def key_types(self):
+        return sorted({COMMANDS[command][1] for command in self.commands})
+
+    def next(self):
+        """Return (label, args) of the next request."""
+        command = self.rng.choices(self.commands, cum_weights=self.command_weights)[0]
+        label, key_type, build = COMMANDS[command]
+        value = self.rng.choices(self.values, cum_weights=self.size_weights)[0]
+        key = f"{key_type}:{self.keys.sample()}"
+        return label, build(key, value)
+
+    def preload(self):
+        """Yield the commands that create every key the workload can touch."""
+        value = self.values[0]
+        for key_type in self.key_types():
+            build = PRELOAD_COMMANDS[key_type]
+            for index in range(self.profile["keyspace"]):
+                yield build(f"{key_type}:{index}", value)
@@ -7,9 +7,7 @@ rm -rf benchmarks/URING_AOF/temp-integrity
 rm -rf persistance-data
 rm -rf benchmarks/__pycache__
 ./script-cleanup.sh
-rm -f verify_incr_log.csv
-rm -f verify_keys_log.csv
-rm -f verify_samekey_log.csv
-rm -f norw_verify_incr_log.csv
-rm -f norw_verify_keys_log.csv
-rm -f norw_verify_samekey_log.csv
\ No newline at end of file
+rm -f *verify_*_log.csv
+rm -f *verify_keys_summary.csv
+rm -f *redis_[0-9]*.log
+rm -f *events_[0-9]*.csv
\ No newline at end of file
@@ -1,4 +1,5 @@
 import asyncio
+import collections
 import redis.asyncio as redis
 import subprocess
 import signal
@@ -6,158 +7,254 @@ import time
 import random
 import argparse
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+from aof_reader import load_state
+from server_log import ServerLog
 
 name = ""
+APPENDONLYDIR = "../redis-io_uring/appendonlydir"
 
 
-def start_redis_server(port, cwd):
+async def start_redis_server(port, cwd):
+    """Start the server with its log in {name}redis_<port>.log and wait until
+    it is ready. Returns the process and the log tailer, whose events are
+    saved to {name}events_<port>.csv when the server stops."""
     command = [
         "./src/redis-server",
         "redis.conf",
         "--port",
         str(port),
     ]
-    process = subprocess.Popen(
-        command, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
-    )
-
-    for line in iter(process.stdout.readline, ""):
-        if "Ready to accept connections" in line:
-            return process
+    log_path = os.path.abspath(f"{name}redis_{port}.log")
+    with open(log_path, "w") as logfile:
+        process = subprocess.Popen(
+            command, cwd=cwd, stdout=logfile, stderr=subprocess.STDOUT
+        )
+    server_log = ServerLog(log_path, os.path.abspath(f"{name}events_{port}.csv"))
+    server_log.start()
+    await server_log.wait_for("ready", timeout=60)
+    return process, server_log
 
 
-def stop_redis_server(process):
+async def stop_redis_server(process, server_log):
     if process:
         process.send_signal(signal.SIGTERM)
         process.wait()
-        time.sleep(3)
+        await server_log.stop()
+        await asyncio.sleep(3)
 
 
-async def monitor_redis_logs(process, start_time):
-    """Monitor the Redis server logs for 'Final fsync completed'."""
-    for line in iter(process.stdout.readline, ""):
-        decoded_output = line.strip()
-        if "Final fsync completed" in decoded_output:
-            end_time = time.time()
-            print(
-                f"Final fsync completed detected. Time taken: {end_time - start_time} seconds"
-            )
-            return end_time
+async def monitor_redis_logs(server_log, start_time):
+    """Wait for the server to log 'Final fsync completed' after start_time."""
+    event = await server_log.wait_for("fsync_completed", since=start_time)
+    end_time = event["timestamp"]
+    print(
+        f"Final fsync completed detected. Time taken: {end_time - start_time} seconds"
+    )
+    return end_time
 
 
-async def set_diffkeys(
+def split_range(start_key, end_key, parts):
+    """Split start_key..end_key into up to `parts` contiguous ranges."""
+    total = end_key - start_key + 1
+    parts = max(1, min(parts, total))
+    ranges = []
+    first = start_key
+    for part in range(parts):
+        last = first + total // parts - (0 if part < total % parts else 1)
+        ranges.append((first, last))
+        first = last + 1
+    return ranges
+
+
+async def run_write_phase(
     redis_client,
     start_key,
     end_key,
+    queue_command,
+    label,
     trigger_bgrewriteaof=True,
-    value_prefix="value",
+    concurrency=1,
+    pipeline_size=1,
 ):
-    bgrewriteaof_triggered = False
-    random_trigger_point = random.randint(start_key, end_key)
-
-    for i in range(start_key, end_key + 1):
-        key = f"key_{i}"
-        try:
-            value = f"{value_prefix}_{i}"
-            await redis_client.set(key, value)
+    """Send queue_command(pipe, i) for every i in start_key..end_key.
+
+    `concurrency` workers each own a disjoint range of i and send
+    `pipeline_size` commands per round trip. BGREWRITEAOF is triggered once,
+    after a random number of completed requests.
+    """
+    if end_key < start_key:
+        return
+    random_trigger_point = random.randint(start_key, end_key) - start_key + 1
+    progress = {"completed": 0, "bgrewriteaof_triggered": not trigger_bgrewriteaof}
+
+    async def worker(first, last):
+        for batch_start in range(first, last + 1, pipeline_size):
+            batch_end = min(last, batch_start + pipeline_size - 1)
+            pipe = redis_client.pipeline(transaction=False)
+            for i in range(batch_start, batch_end + 1):
+                queue_command(pipe, i)
+            try:
+                await pipe.execute()
+            except Exception as e:
+                print(f"\tFailed to execute {label} for {batch_start}-{batch_end}: {e}")
+
+            previous = progress["completed"]
+            completed = previous + batch_end - batch_start + 1
+            progress["completed"] = completed
             if (
-                trigger_bgrewriteaof
-                and not bgrewriteaof_triggered
-                and i == random_trigger_point
+                not progress["bgrewriteaof_triggered"]
+                and completed >= random_trigger_point
             ):
-                print(f"\tTriggering random BGREWRITEAOF after {i} requests")
-                await redis_client.bgrewriteaof()
-                bgrewriteaof_triggered = True
-
-            if i % 10000 == 0:
-                print(f"\tSET command executed {i} times")
-        except Exception as e:
-            print(f"\tFailed to set key {key}: {e}")
+                progress["bgrewriteaof_triggered"] = True
+                print(f"\tTriggering random BGREWRITEAOF after {completed} requests")
+                try:
+                    await redis_client.bgrewriteaof()
+                except Exception as e:
+                    print(f"\tFailed to trigger BGREWRITEAOF: {e}")
+            if completed // 10000 > previous // 10000:
+                print(f"\t{label} command executed {completed // 10000 * 10000} times")
+
+    await asyncio.gather(
+        *(
+            worker(first, last)
+            for first, last in split_range(start_key, end_key, concurrency)
+        )
+    )
 
 
-async def set_incr_commands(
-    redis_client, start_key, end_key, trigger_bgrewriteaof=True
+async def set_diffkeys(
+    redis_client,
+    start_key,
+    end_key,
+    trigger_bgrewriteaof=True,
+    value_prefix="value",
+    concurrency=1,
+    pipeline_size=1,
 ):
-    bgrewriteaof_triggered = False
-    random_trigger_point = random.randint(start_key, end_key)
+    await run_write_phase(
+        redis_client,
+        start_key,
+        end_key,
+        lambda pipe, i: pipe.set(f"key_{i}", f"{value_prefix}_{i}"),
+        "SET",
+        trigger_bgrewriteaof,
+        concurrency,
+        pipeline_size,
+    )
 
-    for i in range(start_key, end_key + 1):
-        key = "incr_key"
-        try:
-            await redis_client.incr(key)
-            if (
-                trigger_bgrewriteaof
-                and not bgrewriteaof_triggered
-                and i == random_trigger_point
-            ):
-                print(f"\tTriggering random BGREWRITEAOF after {i} requests")
-                await redis_client.bgrewriteaof()
-                bgrewriteaof_triggered = True
 
-            if i % 10000 == 0:
-                print(f"\tINCR command executed {i} times")
-        except Exception as e:
-            print(f"\tFailed to execute INCR for key {key}: {e}")
+async def set_incr_commands(
+    redis_client,
+    start_key,
+    end_key,
+    trigger_bgrewriteaof=True,
+    concurrency=1,
+    pipeline_size=1,
+):
+    await run_write_phase(
+        redis_client,
+        start_key,
+        end_key,
+        lambda pipe, i: pipe.incr("incr_key"),
+        "INCR",
+        trigger_bgrewriteaof,
+        concurrency,
+        pipeline_size,
+    )
 
 
 async def set_samekey_diffvalue(
-    redis_client, start_key, end_key, trigger_bgrewriteaof=True
+    redis_client,
+    start_key,
+    end_key,
+    trigger_bgrewriteaof=True,
+    concurrency=1,
+    pipeline_size=1,
 ):
-    bgrewriteaof_triggered = False
-    random_trigger_point = random.randint(start_key, end_key)
+    # Concurrent workers race on the key, so the last value is written on its
+    # own once they are done to keep the expected final value deterministic.
+    await run_write_phase(
+        redis_client,
+        start_key,
+        end_key - 1,
+        lambda pipe, i: pipe.set("key", i),
+        "SET",
+        trigger_bgrewriteaof,
+        concurrency,
+        pipeline_size,
+    )
+    try:
+        await redis_client.set("key", end_key)
+    except Exception as e:
+        print(f"\tFailed to execute SET for key key, value {end_key}: {e}")
 
-    for i in range(start_key, end_key + 1):
-        key = f"key"
-        try:
-            await redis_client.set(key, i)
-            if (
-                trigger_bgrewriteaof
-                and not bgrewriteaof_triggered
-                and i == random_trigger_point
-            ):
-                print(f"\tTriggering random BGREWRITEAOF after {i} requests")
-                await redis_client.bgrewriteaof()
-                bgrewriteaof_triggered = True
 
-            if i % 10000 == 0:
-                print(f"\tSET command executed {i} times")
-        except Exception as e:
-            print(f"\tFailed to execute SET for key {key}, value {i}: {e}")
+async def verify_keys(
+    redis_client,
+    start_key,
+    end_key,
+    expected_value_prefix="value",
+    concurrency=8,
+    batch_size=1000,
+    mismatches_only=False,
+):
+    """Check key_<i> == <prefix>_<i> for every i with MGET batches.
 
+    Up to `concurrency` batches are in flight at once, and rows are streamed
+    to the CSV in key order as batches complete.
+    """
+    counts = {"correct": 0, "missing": 0, "wrong": 0, "error": 0}
 
-async def verify_keys(redis_client, start_key, end_key, expected_value_prefix="value"):
-    success = True
-    logs = []
-    for i in range(start_key, end_key + 1):
-        key = f"key_{i}"
+    async def fetch(first, last):
+        keys = [f"key_{i}" for i in range(first, last + 1)]
         try:
-            expected_value = f"{expected_value_prefix}_{i}"
-            value = await redis_client.get(key)
-            if value is None:
-                log = f"{key},{expected_value},MISSING"
-                print(f"Key {key} is missing!")
-                success = False
-            elif value.decode() != expected_value:
-                log = f"{key},{expected_value},{value.decode()}"
-                print(
-                    f"Key {key} has incorrect value: {value.decode()} (expected: {expected_value})"
-                )
-                success = False
-            else:
-                log = f"{key},{expected_value},{value.decode()}"
-            logs.append(log)
+            return first, keys, await redis_client.mget(keys), None
         except Exception as e:
-            log = f"{key},{expected_value},ERROR:{e}"
-            print(f"Failed to verify key {key}: {e}")
-            success = False
-            logs.append(log)
-
+            return first, keys, None, e
+
+    def write_batch(file, first, keys, values, error):
+        for offset, key in enumerate(keys):
+            expected_value = f"{expected_value_prefix}_{first + offset}"
+            if error is not None:
+                status, log = "error", f"{key},{expected_value},ERROR:{error}"
+            elif values[offset] is None:
+                status, log = "missing", f"{key},{expected_value},MISSING"
+            elif values[offset].decode() != expected_value:
+                status = "wrong"
+                log = f"{key},{expected_value},{values[offset].decode()}"
+            else:
+                status = "correct"
+                log = f"{key},{expected_value},{values[offset].decode()}"
+            counts[status] += 1
+            if status != "correct" and counts[status] <= 10:
+                print(f"Key {key} failed verification: {log}")
+            if status != "correct" or not mismatches_only:
+                file.write(log + "\n")
+
+    pending = collections.deque()
     with open(f"{name}verify_keys_log.csv", "w") as file:
         file.write("Key,Expected Value,Actual Value\n")
-        for log in logs:
-            file.write(log + "\n")
-
-    if success:
+        for first in range(start_key, end_key + 1, batch_size):
+            last = min(end_key, first + batch_size - 1)
+            pending.append(asyncio.ensure_future(fetch(first, last)))
+            if len(pending) >= concurrency:
+                write_batch(file, *await pending.popleft())
+        while pending:
+            write_batch(file, *await pending.popleft())
+
+    with open(f"{name}verify_keys_summary.csv", "w") as file:
+        file.write("Correct,Missing,Wrong,Error\n")
+        file.write(
+            f"{counts['correct']},{counts['missing']},{counts['wrong']},{counts['error']}\n"
+        )
+    print(
+        f"Verified {sum(counts.values())} keys: {counts['correct']} correct, "
+        f"{counts['missing']} missing, {counts['wrong']} wrong, {counts['error']} errors."
+    )
+    if counts["correct"] == end_key - start_key + 1:
         print(f"Successfully verified keys from {start_key} to {end_key}.")
 
 
@@ -203,65 +300,160 @@ async def verify_samekey_diffvalue(redis_client, end_key):
         print(f"Failed to verify key {key}: {e}")
 
 
-async def run_test_suite(requests, trigger_bgrewriteaof=True, set_config=True):
+async def wait_for_aof_rewrite(redis_client):
+    while (await redis_client.info("persistence")).get("aof_rewrite_in_progress"):
+        await asyncio.sleep(0.1)
+
+
+async def verify_aof(redis_client, expected_items, log_name):
+    """Check (key, expected value) pairs against the state rebuilt from the
+    AOF files on disk, without querying the server."""
+    await wait_for_aof_rewrite(redis_client)
+    start_time = time.time()
+    state = load_state(APPENDONLYDIR)
+    checked = 0
+    mismatches = 0
+    with open(f"{name}verify_aof_{log_name}_log.csv", "w") as file:
+        file.write("Key,Expected Value,Actual Value\n")
+        for key, expected_value in expected_items:
+            checked += 1
+            value = state.get(key)
+            if value is None:
+                file.write(f"{key},{expected_value},MISSING\n")
+            elif value.decode() != expected_value:
+                file.write(f"{key},{expected_value},{value.decode()}\n")
+            else:
+                continue
+            mismatches += 1
+    if not state.complete:
+        print("\tAOF base has an RDB preamble: only the incr files were checked.")
+    print(
+        f"\tOffline AOF check: {state.commands} commands parsed, {checked} keys checked, "
+        f"{mismatches} mismatches in {time.time() - start_time:.1f} seconds"
+    )
+
+
+async def configure_test_server(
+    redis_client, requests, trigger_bgrewriteaof, offline_verify
+):
+    await redis_client.config_set("correct-test", "yes")
+    await redis_client.config_set("correct-test-reqnum", requests)
+    if not trigger_bgrewriteaof:
+        await redis_client.config_set("auto-aof-rewrite-percentage", "0")
+        await redis_client.config_set("auto-aof-rewrite-min-size", "0")
+    if offline_verify:
+        # Keep rewritten base files as commands so they can be parsed.
+        await redis_client.config_set("aof-use-rdb-preamble", "no")
+
+
+async def run_test_suite(
+    requests,
+    trigger_bgrewriteaof=True,
+    set_config=True,
+    concurrency=1,
+    pipeline_size=1,
+    verify_concurrency=8,
+    verify_batch=1000,
+    mismatches_only=False,
+    offline_verify=False,
+):
+    redis_process = None
     try:
         subprocess.run(["rm", "-rf", "appendonlydir"], cwd="../redis-io_uring")
-        redis_process = start_redis_server(6385, cwd="../redis-io_uring")
+        redis_process, server_log = await start_redis_server(
+            6385, cwd="../redis-io_uring"
+        )
         redis_client = redis.from_url("redis://localhost:6385")
-        await redis_client.config_set("correct-test", "yes")
-        await redis_client.config_set("correct-test-reqnum", requests)
-        if not trigger_bgrewriteaof:
-            await redis_client.config_set("auto-aof-rewrite-percentage", "0")
-            await redis_client.config_set("auto-aof-rewrite-min-size", "0")
+        await configure_test_server(
+            redis_client, requests, trigger_bgrewriteaof, offline_verify
+        )
 
         print("#### Starting Test 1: Setting keys with incrementing names")
         start_time = time.time()
-        await set_diffkeys(redis_client, 1, requests, trigger_bgrewriteaof)
-        end_time = await monitor_redis_logs(redis_process, start_time)
+        await set_diffkeys(
+            redis_client,
+            1,
+            requests,
+            trigger_bgrewriteaof,
+            concurrency=concurrency,
+            pipeline_size=pipeline_size,
+        )
+        end_time = await monitor_redis_logs(server_log, start_time)
 
         print(f"\tTime taken: {end_time - start_time} seconds")
-        await verify_keys(redis_client, 1, requests)
-        stop_redis_server(redis_process)
-        redis_process = start_redis_server(6386, cwd="../redis-io_uring")
+        if offline_verify:
+            await verify_aof(
+                redis_client,
+                ((f"key_{i}", f"value_{i}") for i in range(1, requests + 1)),
+                "keys",
+            )
+        await verify_keys(
+            redis_client,
+            1,
+            requests,
+            concurrency=verify_concurrency,
+            batch_size=verify_batch,
+            mismatches_only=mismatches_only,
+        )
+        await stop_redis_server(redis_process, server_log)
+        redis_process, server_log = await start_redis_server(
+            6386, cwd="../redis-io_uring"
+        )
         redis_client = redis.from_url("redis://localhost:6386")
-        await redis_client.config_set("correct-test", "yes")
-        await redis_client.config_set("correct-test-reqnum", requests)
-        if not trigger_bgrewriteaof:
-            await redis_client.config_set("auto-aof-rewrite-percentage", "0")
-            await redis_client.config_set("auto-aof-rewrite-min-size", "0")
+        await configure_test_server(
+            redis_client, requests, trigger_bgrewriteaof, offline_verify
+        )
 
         start_time = time.time()
         print("#### Starting Test 2: INCR commands on a single key")
-        await set_incr_commands(redis_client, 1, requests, trigger_bgrewriteaof)
-        end_time = await monitor_redis_logs(redis_process, start_time)
+        await set_incr_commands(
+            redis_client,
+            1,
+            requests,
+            trigger_bgrewriteaof,
+            concurrency=concurrency,
+            pipeline_size=pipeline_size,
+        )
+        end_time = await monitor_redis_logs(server_log, start_time)
 
         print(f"\tTime taken: {end_time - start_time} seconds")
+        if offline_verify:
+            await verify_aof(redis_client, [("incr_key", str(requests))], "incr")
         await verify_incr(redis_client, requests)
 
-        stop_redis_server(redis_process)
+        await stop_redis_server(redis_process, server_log)
 
-        redis_process = start_redis_server(6387, cwd="../redis-io_uring")
+        redis_process, server_log = await start_redis_server(
+            6387, cwd="../redis-io_uring"
+        )
         redis_client = redis.from_url("redis://localhost:6387")
-        await redis_client.config_set("correct-test", "yes")
-        await redis_client.config_set("correct-test-reqnum", requests)
-        if not trigger_bgrewriteaof:
-            await redis_client.config_set("auto-aof-rewrite-percentage", "0")
-            await redis_client.config_set("auto-aof-rewrite-min-size", "0")
+        await configure_test_server(
+            redis_client, requests, trigger_bgrewriteaof, offline_verify
+        )
 
         print("#### Starting Test 3: Setting same keys with incrementing values")
         start_time = time.time()
-        await set_samekey_diffvalue(redis_client, 1, requests, trigger_bgrewriteaof)
-        end_time = await monitor_redis_logs(redis_process, start_time)
+        await set_samekey_diffvalue(
+            redis_client,
+            1,
+            requests,
+            trigger_bgrewriteaof,
+            concurrency=concurrency,
+            pipeline_size=pipeline_size,
+        )
+        end_time = await monitor_redis_logs(server_log, start_time)
         print(f"\tTime taken: {end_time - start_time} seconds")
+        if offline_verify:
+            await verify_aof(redis_client, [("key", str(requests))], "samekey")
         await verify_samekey_diffvalue(redis_client, requests)
 
-        stop_redis_server(redis_process)
+        await stop_redis_server(redis_process, server_log)
 
     except Exception as e:
         print(f"An error occurred: {e}")
     finally:
-        if redis_process:
-            stop_redis_server(redis_process)
+        if redis_process and redis_process.poll() is None:
+            await stop_redis_server(redis_process, server_log)
 
 
 if __name__ == "__main__":
@@ -274,6 +466,40 @@ if __name__ == "__main__":
         action="store_true",
         help="Disable BGREWRITEAOF triggering.",
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Concurrent connections writing disjoint key ranges.",
+    )
+    parser.add_argument(
+        "--pipeline",
+        type=int,
+        default=1,
+        help="Commands sent per round trip by each connection.",
+    )
+    parser.add_argument(
+        "--verify-batch",
+        type=int,
+        default=1000,
+        help="Keys fetched per MGET during verification.",
+    )
+    parser.add_argument(
+        "--verify-concurrency",
+        type=int,
+        default=8,
+        help="MGET batches in flight at once during verification.",
+    )
+    parser.add_argument(
+        "--mismatches-only",
+        action="store_true",
+        help="Only write missing or wrong keys to verify_keys_log.csv.",
+    )
+    parser.add_argument(
+        "--offline-verify",
+        action="store_true",
+        help="Also check each test against the AOF files parsed directly from disk.",
+    )
     os.system("rm -rf ../redis-io_uring/appendonlydir")
     time.sleep(3)
     args = parser.parse_args()
@@ -283,5 +509,11 @@ if __name__ == "__main__":
         run_test_suite(
             args.requests,
             trigger_bgrewriteaof=not args.no_bgrewriteaof,
+            concurrency=args.concurrency,
+            pipeline_size=args.pipeline,
+            verify_concurrency=args.verify_concurrency,
+            verify_batch=args.verify_batch,
+            mismatches_only=args.mismatches_only,
+            offline_verify=args.offline_verify,
         )
     )
@@ -1,15 +1,67 @@
 import os
+import sys
 import pandas as pd
 import matplotlib.pyplot as plt
 import argparse
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+from histogram import LatencyHistogram
+from modes import TRACE_VARIANT, parse_run_dir
+from results_db import DEFAULT_DB, connect, query_performance, query_usage
+from util import THREAD_CPU_METRIC
+from workloads import WORKLOADS
+
 only_one = False
+histogram_suffix = "_histogram.json"
+tail_percentiles = [50, 90, 99, 99.9, 99.99, 99.999]
+sweep_baseline = {"clients": 50, "pipeline": 1, "data_size": 3, "keyspace": 0}
+sweep_labels = {
+    "clients": "Clients",
+    "pipeline": "Pipeline Depth",
+    "data_size": "Value Size (bytes)",
+    "keyspace": "Keyspace Size",
+}
+MODES = ["RDB", "AOF (always)", "AOF (everysec)", "AOF (no)", "AOFUring"]
+COLORS = ["#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd"]
+AOF_FSYNC_MODES = ["always", "everysec", "no"]
+
+def walk_runs(root_dir, variant=None):
+    """os.walk over `root_dir` that skips run directories of another variant
+    than `variant` (a workload profile or "trace"; None for default runs),
+    since those runs report other commands."""
+    for root, dirs, files in os.walk(root_dir):
+        mode_name, run_variant = parse_run_dir(os.path.basename(root))
+        if mode_name and run_variant != variant:
+            dirs[:] = []
+            continue
+        yield root, dirs, files
+
+
+def load_mode_csv(root_dir, filename, mode_prefix=None, variant=None):
+    """Every <mode_prefix>_<filename> (<filename> without a prefix) under
+    `root_dir`, concatenated; an empty frame if there is none."""
+    expected = f"{mode_prefix}_{filename}" if mode_prefix else filename
+    frames = []
+    for root, _, files in walk_runs(root_dir, variant):
+        if expected in files:
+            frames.append(pd.read_csv(os.path.join(root, expected)))
+    return pd.concat(frames) if frames else pd.DataFrame()
+
+
+def load_all_modes(load, aof_dir, rdb_dir, uring_dir, **kwargs):
+    """load(directory, mode_prefix=..., **kwargs) for every mode in MODES."""
+    results = {"RDB": load(rdb_dir, **kwargs)}
+    for mode in AOF_FSYNC_MODES:
+        results[f"AOF ({mode})"] = load(aof_dir, mode_prefix=mode, **kwargs)
+    results["AOFUring"] = load(uring_dir, **kwargs)
+    return results
+
 
-def load_mode_data(root_dir, mode_prefix=None):
+def load_mode_data(root_dir, mode_prefix=None, variant=None):
     performance_data = []
     usage_data = []
 
-    for root, _, files in os.walk(root_dir):
+    for root, _, files in walk_runs(root_dir, variant):
         for file in files:
             if (
                 mode_prefix
@@ -27,6 +79,10 @@ def load_mode_data(root_dir, mode_prefix=None):
             elif not mode_prefix and "usage.csv" in file:
                 df_usage = pd.read_csv(os.path.join(root, file))
                 usage_data.append(df_usage)
+    return aggregate_mode_data(performance_data, usage_data)
+
+
+def aggregate_mode_data(performance_data, usage_data):
     if len(performance_data) == 1 or len(usage_data) == 1:
         global only_one
         only_one = True
@@ -71,7 +127,6 @@ def extract_latency_statistics(performance_data):
 def plot_latency_statistics_comparison(
     rdb_perf, aof_perf, uring_perf, graphs_dir, name="latency_statistics_comparison"
 ):
-    modes = ["RDB", "AOF (always)", "AOF (everysec)", "AOF (no)", "AOFUring"]
     colors = {
         "p50_latency": "green",
         "p95_latency": "orange",
@@ -91,9 +146,9 @@ def plot_latency_statistics_comparison(
     plt.clf()  
 
     for stat, color in colors.items():
-        data_to_plot = [latencies[mode][stat] for mode in modes]
+        data_to_plot = [latencies[mode][stat] for mode in MODES]
         plt.plot(
-            modes,
+            MODES,
             data_to_plot,
             marker="o",
             linestyle="-",
@@ -103,7 +158,7 @@ def plot_latency_statistics_comparison(
 
     plt.xlabel("Persistence Mode", fontsize=14, fontweight="bold")
     plt.ylabel("Latency (ms)", fontsize=14, fontweight="bold")  
-    plt.xticks(range(len(modes)), modes, fontsize=12)
+    plt.xticks(range(len(MODES)), MODES, fontsize=12)
     plt.yticks(fontsize=12)
     plt.grid(True, linestyle="--", alpha=0.7)
     plt.legend(loc="upper left", fontsize=12)
@@ -113,18 +168,17 @@ def plot_latency_statistics_comparison(
     plt.savefig(plot_filename, bbox_inches="tight", format="svg")
 
 
-def load_all_data(aof_dir, rdb_dir, uring_dir):
-    aof_modes = ["always", "everysec", "no"]
+def load_all_data(aof_dir, rdb_dir, uring_dir, variant=None):
     aof_performance = {}
     aof_usage = {}
 
-    for mode in aof_modes:
+    for mode in AOF_FSYNC_MODES:
         aof_performance[mode], aof_usage[mode] = load_mode_data(
-            aof_dir, mode_prefix=mode
+            aof_dir, mode_prefix=mode, variant=variant
         )
 
-    rdb_performance, rdb_usage = load_mode_data(rdb_dir)
-    uring_performance, uring_usage = load_mode_data(uring_dir)
+    rdb_performance, rdb_usage = load_mode_data(rdb_dir, variant=variant)
+    uring_performance, uring_usage = load_mode_data(uring_dir, variant=variant)
 
     return (
         aof_performance,
@@ -136,11 +190,638 @@ def load_all_data(aof_dir, rdb_dir, uring_dir):
     )
 
 
+def rows_frame(rows):
+    return pd.DataFrame(rows[1:], columns=rows[0])
+
+
+def load_db_mode_data(performance, usage, mode_name):
+    """One mode's runs from the database, one frame per run as if each had
+    been read from its own CSV file."""
+    performance = performance[performance["mode"] == mode_name]
+    usage = usage[usage["mode"] == mode_name].rename(
+        columns={"metric": "Metric", "average": "Average"}
+    )
+    return aggregate_mode_data(
+        [
+            run.drop(columns=["run_id", "mode", "timestamp"])
+            for _, run in performance.groupby("run_id")
+        ],
+        [run[["Metric", "Average"]] for _, run in usage.groupby("run_id")],
+    )
+
+
+def load_db_data(db_path, **filters):
+    """Same frames as load_all_data, for the runs in the results database
+    matching `filters` (see results_db.run_filters)."""
+    connection = connect(db_path)
+    try:
+        performance = rows_frame(query_performance(connection, **filters))
+        usage = rows_frame(query_usage(connection, **filters))
+    finally:
+        connection.close()
+
+    aof_performance = {}
+    aof_usage = {}
+    for mode in AOF_FSYNC_MODES:
+        aof_performance[mode], aof_usage[mode] = load_db_mode_data(
+            performance, usage, f"AOF-{mode}"
+        )
+    rdb_performance, rdb_usage = load_db_mode_data(performance, usage, "RDB")
+    uring_performance, uring_usage = load_db_mode_data(performance, usage, "URING_AOF")
+
+    return (
+        aof_performance,
+        aof_usage,
+        rdb_performance,
+        rdb_usage,
+        uring_performance,
+        uring_usage,
+    )
+
+
+def key_value(value):
+    key, separator, value = value.partition("=")
+    if not separator:
+        raise argparse.ArgumentTypeError(f"expected KEY=VALUE, got {key!r}")
+    return key, value
+
+
+def load_mode_histograms(root_dir, mode_prefix=None, variant=None):
+    histograms = {}
+    for root, _, files in walk_runs(root_dir, variant):
+        for file in files:
+            if not file.endswith(histogram_suffix):
+                continue
+            if mode_prefix:
+                if not file.startswith(f"{mode_prefix}_"):
+                    continue
+                test = file[len(mode_prefix) + 1 : -len(histogram_suffix)]
+            else:
+                test = file[: -len(histogram_suffix)]
+            histogram = LatencyHistogram.load(os.path.join(root, file))
+            histograms.setdefault(test, LatencyHistogram()).merge(histogram)
+    return histograms
+
+
+def percentile_axis_value(fraction, total):
+    # Plot against 1 / (1 - p) so that each extra "9" gets equal width.
+    return 1 / max(1 - fraction, 1 / total)
+
+
+def plot_latency_cdf(histograms, graphs_dir, name="latency_cdf"):
+    tests = []
+    for mode in MODES:
+        tests += [test for test in histograms[mode] if test not in tests]
+    if not tests:
+        print("No latency histograms found, run the benchmark with --engine native.")
+        return
+
+    ncols = 2 if len(tests) > 1 else 1
+    nrows = (len(tests) + ncols - 1) // ncols
+    fig, axes = plt.subplots(nrows, ncols, figsize=(12, 5 * nrows), squeeze=False)
+    ticks = [1 / (1 - p / 100) for p in tail_percentiles]
+    labels = [f"{p}%" for p in tail_percentiles]
+
+    for ax, test in zip(axes.flat, tests):
+        for mode, color in zip(MODES, COLORS):
+            histogram = histograms[mode].get(test)
+            if not histogram or not histogram.total:
+                continue
+            points = list(histogram.cumulative_distribution())
+            ax.plot(
+                [percentile_axis_value(f, histogram.total) for _, f in points],
+                [value / 1000 for value, _ in points],
+                color=color,
+                label=mode,
+                drawstyle="steps-post",
+            )
+        ax.set_title(test, fontsize=14, fontweight="bold")
+        ax.set_xscale("log")
+        ax.set_yscale("log")
+        ax.set_xticks(ticks)
+        ax.set_xticklabels(labels, fontsize=10)
+        ax.set_xlabel("Percentile", fontsize=12, fontweight="bold")
+        ax.set_ylabel("Latency (ms)", fontsize=12, fontweight="bold")
+        ax.grid(True, which="both", linestyle="--", alpha=0.7)
+        ax.legend(loc="upper left", fontsize=10)
+    for ax in list(axes.flat)[len(tests) :]:
+        ax.set_visible(False)
+
+    fig.tight_layout()
+    plot_filename = os.path.join(graphs_dir, f"{name}.svg")
+    fig.savefig(plot_filename, bbox_inches="tight", format="svg")
+
+
+def plot_tail_percentiles(histograms, graphs_dir, name="latency_tail_percentiles"):
+    rows = []
+    merged = {}
+    for mode in MODES:
+        merged[mode] = LatencyHistogram()
+        for test, histogram in histograms[mode].items():
+            merged[mode].merge(histogram)
+            rows.append(
+                [mode, test]
+                + [histogram.value_at_percentile(p) / 1000 for p in tail_percentiles]
+            )
+    if not rows:
+        print("No latency histograms found, run the benchmark with --engine native.")
+        return
+
+    columns = ["mode", "test"] + [f"p{p}_latency_ms" for p in tail_percentiles]
+    pd.DataFrame(rows, columns=columns).to_csv(
+        os.path.join(graphs_dir, f"{name}.csv"), index=False
+    )
+
+    plt.figure(figsize=(12, 8))
+    plt.clf()
+    cmap = plt.get_cmap("viridis")
+    for i, p in enumerate(tail_percentiles):
+        plt.plot(
+            MODES,
+            [merged[mode].value_at_percentile(p) / 1000 for mode in MODES],
+            marker="o",
+            linestyle="-",
+            color=cmap(i / (len(tail_percentiles) - 1)),
+            label=f"p{p}",
+        )
+
+    plt.xlabel("Persistence Mode", fontsize=14, fontweight="bold")
+    plt.ylabel("Latency (ms)", fontsize=14, fontweight="bold")
+    plt.yscale("log")
+    plt.xticks(range(len(MODES)), MODES, fontsize=12)
+    plt.yticks(fontsize=12)
+    plt.grid(True, which="both", linestyle="--", alpha=0.7)
+    plt.legend(loc="upper left", fontsize=12)
+    plt.tight_layout()
+
+    plot_filename = os.path.join(graphs_dir, f"{name}.svg")
+    plt.savefig(plot_filename, bbox_inches="tight", format="svg")
+
+
+def fixed_sweep_value(values, dimension):
+    # Other dimensions are held at the redis-benchmark default when swept.
+    values = sorted(values.unique())
+    baseline = sweep_baseline[dimension]
+    return baseline if baseline in values else values[0]
+
+
+def plot_scaling(sweeps, graphs_dir, name="scaling"):
+    frames = [df for df in sweeps.values() if not df.empty]
+    if not frames:
+        print("No sweep results found, run run_benchmarks.py with --sweep.")
+        return
+    combined = pd.concat(frames)
+    dimensions = [d for d in sweep_baseline if combined[d].nunique() > 1]
+
+    for dimension in dimensions:
+        fig, (ax_rps, ax_p99) = plt.subplots(1, 2, figsize=(14, 6))
+        for mode, color in zip(MODES, COLORS):
+            df = sweeps[mode]
+            if df.empty:
+                continue
+            for other in sweep_baseline:
+                if other != dimension:
+                    df = df[df[other] == fixed_sweep_value(combined[other], other)]
+            grouped = df.groupby(dimension)[["rps", "p99_latency_ms"]].mean()
+            for ax, column in [(ax_rps, "rps"), (ax_p99, "p99_latency_ms")]:
+                ax.plot(
+                    grouped.index, grouped[column], marker="o", color=color, label=mode
+                )
+
+        values = combined[dimension]
+        for ax, ylabel in [
+            (ax_rps, "Requests per Second (RPS)"),
+            (ax_p99, "p99 Latency (ms)"),
+        ]:
+            if values.min() > 0 and values.max() / values.min() >= 10:
+                ax.set_xscale("log")
+            ax.set_xlabel(sweep_labels[dimension], fontsize=14, fontweight="bold")
+            ax.set_ylabel(ylabel, fontsize=14, fontweight="bold")
+            ax.grid(True, linestyle="--", alpha=0.7)
+        ax_rps.legend(title="Persistence Mode", fontsize=12)
+        fig.tight_layout()
+
+        plot_filename = os.path.join(graphs_dir, f"{name}_{dimension}.svg")
+        fig.savefig(plot_filename, bbox_inches="tight", format="svg")
+
+
+def plot_uring_heatmap(sweep, graphs_dir, name="uring_heatmap"):
+    # One heatmap of queue depth x SQPOLL per client count; each cell shows the
+    # best retry count's RPS (averaged over commands) with its p99 and CPU.
+    tunables = ["liburing-queue-depth", "liburing-sqpoll", "liburing-retry-count"]
+    if sweep.empty or not any(t in sweep.columns for t in tunables):
+        print("No liburing sweep results found, run a URING_AOF sweep with --uring-*.")
+        return
+    df = sweep.copy()
+    for tunable in tunables:
+        if tunable not in df.columns:
+            df[tunable] = "conf"
+        df[tunable] = df[tunable].fillna("conf").astype(str)
+    for other in ["pipeline", "data_size", "keyspace"]:
+        df = df[df[other] == fixed_sweep_value(df[other], other)]
+
+    cells = (
+        df.groupby(["clients"] + tunables)[["rps", "p99_latency_ms", "cpu_percent"]]
+        .mean()
+        .reset_index()
+    )
+    best = cells.loc[
+        cells.groupby(["clients", tunables[0], tunables[1]])["rps"].idxmax()
+    ]
+    best.to_csv(os.path.join(graphs_dir, f"{name}.csv"), index=False)
+
+    for clients, group in best.groupby("clients"):
+        rps = group.pivot(index=tunables[0], columns=tunables[1], values="rps")
+        rps = rps.loc[sorted(rps.index, key=sweep_sort_key)]
+        fig, ax = plt.subplots(figsize=(3 + 2 * len(rps.columns), 2 + len(rps.index)))
+        image = ax.imshow(rps.values, cmap="viridis", aspect="auto")
+        fig.colorbar(image, ax=ax, label="Requests per Second (RPS)")
+        ax.set_xticks(range(len(rps.columns)), labels=rps.columns)
+        ax.set_yticks(range(len(rps.index)), labels=rps.index)
+        ax.set_xlabel("liburing-sqpoll", fontsize=14, fontweight="bold")
+        ax.set_ylabel("liburing-queue-depth", fontsize=14, fontweight="bold")
+        ax.set_title(f"AOFUring tuning, {clients} clients", fontsize=16, fontweight="bold")
+
+        top = group.loc[group["rps"].idxmax()]
+        for _, cell in group.iterrows():
+            row = list(rps.index).index(cell[tunables[0]])
+            column = list(rps.columns).index(cell[tunables[1]])
+            ax.text(
+                column,
+                row,
+                f"{cell['rps']:.0f} rps\np99 {cell['p99_latency_ms']:.2f} ms\n"
+                f"CPU {cell['cpu_percent']:.0f}%\nretry {cell[tunables[2]]}",
+                ha="center",
+                va="center",
+                fontsize=9,
+                color="white",
+                fontweight="bold" if cell.equals(top) else "normal",
+            )
+        row = list(rps.index).index(top[tunables[0]])
+        column = list(rps.columns).index(top[tunables[1]])
+        ax.add_patch(
+            plt.Rectangle(
+                (column - 0.5, row - 0.5), 1, 1, fill=False, edgecolor="red", linewidth=3
+            )
+        )
+
+        plot_filename = os.path.join(graphs_dir, f"{name}_clients_{clients}.svg")
+        fig.savefig(plot_filename, bbox_inches="tight", format="svg")
+
+
+def plot_open_loop(steps, graphs_dir, name="open_loop"):
+    # p99 (measured from the intended send time) against offered load; the
+    # last sustainable step of each mode is its saturation knee.
+    frames = [df for df in steps.values() if not df.empty]
+    if not frames:
+        print("No open-loop results found, run run_benchmarks.py with --open-loop.")
+        return
+    tests = sorted(pd.concat(frames)["test"].unique())
+
+    fig, axes = plt.subplots(1, len(tests), figsize=(7 * len(tests), 6), squeeze=False)
+    knees = []
+    for ax, test in zip(axes[0], tests):
+        for mode, color in zip(MODES, COLORS):
+            df = steps[mode]
+            if df.empty:
+                continue
+            df = df[df["test"] == test].groupby("offered_rps").mean(numeric_only=True)
+            ax.plot(df.index, df["p99_latency_ms"], marker="o", color=color, label=mode)
+            sustainable = df[df["sustainable"] == 1]
+            if not sustainable.empty:
+                knee = sustainable["rps"].idxmax()
+                ax.scatter(
+                    knee,
+                    sustainable.loc[knee, "p99_latency_ms"],
+                    s=150,
+                    facecolors="none",
+                    edgecolors=color,
+                    linewidths=2,
+                )
+                knees.append([test, mode, round(sustainable.loc[knee, "rps"], 2)])
+        ax.set_yscale("log")
+        ax.set_title(test, fontsize=16, fontweight="bold")
+        ax.set_xlabel("Offered Load (requests/s)", fontsize=14, fontweight="bold")
+        ax.set_ylabel("p99 Latency (ms)", fontsize=14, fontweight="bold")
+        ax.grid(True, which="both", linestyle="--", alpha=0.7)
+    axes[0][0].legend(title="Persistence Mode", fontsize=12)
+    fig.tight_layout()
+
+    pd.DataFrame(knees, columns=["test", "mode", "max_sustainable_rps"]).to_csv(
+        os.path.join(graphs_dir, f"{name}_saturation.csv"), index=False
+    )
+    plot_filename = os.path.join(graphs_dir, f"{name}.svg")
+    fig.savefig(plot_filename, bbox_inches="tight", format="svg")
+
+
+def plot_restart(restarts, graphs_dir, name="restart"):
+    # Restart time against dataset size, and against the bytes the server
+    # had to load (the RDB file for RDB, the appendonlydir for AOF MODES).
+    if all(df.empty for df in restarts.values()):
+        print("No restart results found, run run_benchmarks.py with --restart.")
+        return
+
+    fig, (keys_ax, bytes_ax) = plt.subplots(1, 2, figsize=(14, 6))
+    summary = []
+    for mode, color in zip(MODES, COLORS):
+        df = restarts[mode]
+        if df.empty:
+            continue
+        df = df.groupby("keys").mean(numeric_only=True).reset_index()
+        loaded_bytes = df["rdb_bytes"] if mode == "RDB" else df["aof_bytes"]
+        keys_ax.plot(df["keys"], df["restart_seconds"], marker="o", color=color, label=mode)
+        bytes_ax.plot(
+            loaded_bytes / (1024 * 1024),
+            df["restart_seconds"],
+            marker="o",
+            color=color,
+            label=mode,
+        )
+        for row, size in zip(df.itertuples(), loaded_bytes):
+            summary.append([mode, row.keys, size, round(row.restart_seconds, 4)])
+    keys_ax.set_xlabel("Keys", fontsize=14, fontweight="bold")
+    bytes_ax.set_xlabel("Persisted Data (MB)", fontsize=14, fontweight="bold")
+    for ax in (keys_ax, bytes_ax):
+        ax.set_ylabel("Restart Time (s)", fontsize=14, fontweight="bold")
+        ax.grid(True, linestyle="--", alpha=0.7)
+    keys_ax.legend(title="Persistence Mode", fontsize=12)
+    fig.tight_layout()
+
+    pd.DataFrame(
+        summary, columns=["mode", "keys", "loaded_bytes", "restart_seconds"]
+    ).to_csv(os.path.join(graphs_dir, f"{name}.csv"), index=False)
+    plot_filename = os.path.join(graphs_dir, f"{name}.svg")
+    fig.savefig(plot_filename, bbox_inches="tight", format="svg")
+
+
+def load_mode_background(root_dir, mode_prefix=None):
+    # Latest run only: timelines of separate runs do not average meaningfully.
+    prefix = f"{mode_prefix}_" if mode_prefix else ""
+    runs = []
+    for root, _, files in os.walk(root_dir):
+        if f"{prefix}background_timeline.csv" in files:
+            runs.append(root)
+    if not runs:
+        return None
+    run = max(runs)
+    return {
+        kind: pd.read_csv(os.path.join(run, f"{prefix}background_{kind}.csv"))
+        for kind in ["timeline", "info", "summary"]
+    }
+
+
+def plot_background_save(runs, graphs_dir, name="background_save"):
+    # Per-second throughput and p99 around BGREWRITEAOF/BGSAVE, with time 0 at
+    # the trigger and the span INFO reported the child running shaded.
+    if all(run is None for run in runs.values()):
+        print(
+            "No background save results found, "
+            "run run_benchmarks.py with --background-save."
+        )
+        return
+
+    fig, (rps_ax, p99_ax) = plt.subplots(2, 1, figsize=(14, 10), sharex=True)
+    summaries = []
+    for mode, color in zip(MODES, COLORS):
+        run = runs[mode]
+        # Runs whose load ended before the trigger have no trigger time.
+        if run is None or pd.isna(run["summary"].iloc[0]["trigger_s"]):
+            continue
+        summary = run["summary"].iloc[0]
+        trigger = summary["trigger_s"]
+        timeline = run["timeline"]
+        rps_ax.plot(
+            timeline["time_s"] - trigger, timeline["rps"], color=color, label=mode
+        )
+        p99_ax.plot(
+            timeline["time_s"] - trigger,
+            timeline["p99_latency_ms"],
+            color=color,
+            label=mode,
+        )
+        info = run["info"]
+        busy = info[
+            (info["aof_rewrite_in_progress"] == 1) | (info["rdb_bgsave_in_progress"] == 1)
+        ]
+        if not busy.empty:
+            for ax in (rps_ax, p99_ax):
+                ax.axvspan(
+                    busy["time_s"].min() - trigger,
+                    busy["time_s"].max() - trigger,
+                    color=color,
+                    alpha=0.15,
+                )
+        summaries.append(summary.rename(mode))
+    for ax in (rps_ax, p99_ax):
+        ax.axvline(0, color="black", linestyle=":")
+        ax.grid(True, linestyle="--", alpha=0.7)
+    rps_ax.set_ylabel("Requests per Second", fontsize=14, fontweight="bold")
+    p99_ax.set_ylabel("p99 Latency (ms)", fontsize=14, fontweight="bold")
+    p99_ax.set_yscale("log")
+    p99_ax.set_xlabel("Seconds Since Trigger", fontsize=14, fontweight="bold")
+    rps_ax.legend(title="Persistence Mode", fontsize=12)
+    fig.tight_layout()
+
+    pd.DataFrame(summaries).to_csv(
+        os.path.join(graphs_dir, f"{name}.csv"), index_label="mode"
+    )
+    plot_filename = os.path.join(graphs_dir, f"{name}.svg")
+    fig.savefig(plot_filename, bbox_inches="tight", format="svg")
+
+
+def plot_crash(trials, graphs_dir, name="crash"):
+    # Durability/throughput tradeoff: each mode's median write throughput
+    # against the median time window of acknowledged writes lost to SIGKILL,
+    # with bars spanning the best and worst trial.
+    if all(df.empty for df in trials.values()):
+        print("No crash results found, run run_benchmarks.py with --crash.")
+        return
+
+    fig, ax = plt.subplots(figsize=(10, 7))
+    summary = []
+    for mode, color in zip(MODES, COLORS):
+        df = trials[mode]
+        if df.empty:
+            continue
+        rps = df["rps"].median()
+        window = df["loss_window_ms"].median()
+        ax.errorbar(
+            rps,
+            window,
+            yerr=[
+                [window - df["loss_window_ms"].min()],
+                [df["loss_window_ms"].max() - window],
+            ],
+            fmt="o",
+            markersize=10,
+            capsize=5,
+            color=color,
+            label=mode,
+        )
+        summary.append(
+            [
+                mode,
+                len(df),
+                round(rps, 2),
+                df["lost_writes"].median(),
+                df["lost_writes"].max(),
+                round(window, 3),
+                round(df["loss_window_ms"].max(), 3),
+            ]
+        )
+    ax.set_yscale("symlog", linthresh=1)
+    ax.set_xlabel("Write Throughput (requests/s)", fontsize=14, fontweight="bold")
+    ax.set_ylabel(
+        "Acknowledged Writes Lost (ms of traffic)", fontsize=14, fontweight="bold"
+    )
+    ax.grid(True, which="both", linestyle="--", alpha=0.7)
+    ax.legend(title="Persistence Mode", fontsize=12)
+    fig.tight_layout()
+
+    pd.DataFrame(
+        summary,
+        columns=[
+            "mode",
+            "trials",
+            "median_rps",
+            "median_lost_writes",
+            "max_lost_writes",
+            "median_loss_window_ms",
+            "max_loss_window_ms",
+        ],
+    ).to_csv(os.path.join(graphs_dir, f"{name}.csv"), index=False)
+    plot_filename = os.path.join(graphs_dir, f"{name}.svg")
+    fig.savefig(plot_filename, bbox_inches="tight", format="svg")
+
+
+def load_latest_uring_rings(root_dir, variant=None):
+    runs = []
+    for root, _, files in walk_runs(root_dir, variant):
+        if "uring_rings.csv" in files:
+            runs.append(root)
+    if not runs:
+        return None
+    return pd.read_csv(os.path.join(max(runs), "uring_rings.csv"))
+
+
+def plot_uring_rings(rings, graphs_dir, name="uring_rings"):
+    # SQ/CQ occupancy and submission rate of each ring over the combined pass
+    # of the latest URING_AOF run.
+    if rings is None or rings.empty:
+        print("No io_uring ring samples found in the URING_AOF directory.")
+        return
+    rings = rings[rings["phase"] == rings["phase"].iloc[0]].copy()
+    rings["time_s"] = rings["timestamp"] - rings["timestamp"].min()
+
+    fig, (pending_ax, rate_ax) = plt.subplots(2, 1, figsize=(14, 10), sharex=True)
+    for fd, ring in rings.groupby("fd"):
+        pending_ax.plot(ring["time_s"], ring["sq_pending"], label=f"fd {fd} SQ")
+        pending_ax.plot(
+            ring["time_s"], ring["cq_pending"], linestyle="--", label=f"fd {fd} CQ"
+        )
+        interval = ring["timestamp"].diff()
+        rate_ax.plot(
+            ring["time_s"], ring["submitted"] / interval, label=f"fd {fd} submitted"
+        )
+    pending_ax.set_ylabel("Entries Pending", fontsize=14, fontweight="bold")
+    rate_ax.set_ylabel("SQEs Submitted per Second", fontsize=14, fontweight="bold")
+    rate_ax.set_xlabel("Time (s)", fontsize=14, fontweight="bold")
+    for ax in (pending_ax, rate_ax):
+        ax.grid(True, linestyle="--", alpha=0.7)
+        ax.legend(fontsize=12)
+    fig.tight_layout()
+
+    plot_filename = os.path.join(graphs_dir, f"{name}.svg")
+    fig.savefig(plot_filename, bbox_inches="tight", format="svg")
+
+
+def plot_mode_bars(frames, metrics, graphs_dir, name):
+    # One bar chart per (column, label) in `metrics`: each mode's mean over its
+    # runs, with the std as error bar. Modes without rows are left out.
+    modes = [mode for mode in MODES if not frames[mode].empty]
+    mode_colors = dict(zip(MODES, COLORS))
+    fig, axes = plt.subplots(1, len(metrics), figsize=(6 * len(metrics), 6))
+    summary = []
+    for ax, (metric, ylabel) in zip(axes, metrics):
+        means = [pd.to_numeric(frames[mode][metric]).mean() for mode in modes]
+        stds = [pd.to_numeric(frames[mode][metric]).std() for mode in modes]
+        ax.bar(
+            modes,
+            means,
+            yerr=None if only_one else stds,
+            color=[mode_colors[mode] for mode in modes],
+            capsize=5,
+        )
+        ax.set_ylabel(ylabel, fontsize=14, fontweight="bold")
+        ax.tick_params(axis="x", rotation=20)
+        ax.grid(axis="y", linestyle="--", alpha=0.7)
+        summary.append(means)
+    fig.tight_layout()
+
+    pd.DataFrame(
+        dict(zip([metric for metric, _ in metrics], summary)), index=modes
+    ).to_csv(os.path.join(graphs_dir, f"{name}.csv"), index_label="mode")
+    plot_filename = os.path.join(graphs_dir, f"{name}.svg")
+    fig.savefig(plot_filename, bbox_inches="tight", format="svg")
+
+
+def plot_aof_analysis(analyses, graphs_dir, name="aof_analysis"):
+    if all(df.empty for df in analyses.values()):
+        print("No AOF analysis found, run the AOF benchmarks without --no-aof-analysis.")
+        return
+    # /proc accounting counts every write(2), client replies included, so only
+    # runs with the strace pass give bytes per AOF write syscall.
+    analyses = {
+        mode: df.assign(
+            bytes_per_write_syscall=df["bytes_per_write_syscall"].where(
+                df["write_syscall_source"] == "strace"
+            )
+        )
+        if not df.empty
+        else df
+        for mode, df in analyses.items()
+    }
+    plot_mode_bars(
+        analyses,
+        [
+            ("bytes_per_request", "AOF Bytes per Request"),
+            ("bytes_per_write_syscall", "AOF Bytes per Write Syscall (strace)"),
+            ("compaction_ratio", "Size after / before BGREWRITEAOF"),
+        ],
+        graphs_dir,
+        name,
+    )
+
+
+def plot_device_writes(summaries, graphs_dir, name="device_writes"):
+    # Device-level writes from /proc/diskstats: what each logical request
+    # really costs the disk once kernel writeback is included.
+    if all(df.empty for df in summaries.values()):
+        print(
+            "No diskstats summaries found "
+            "(is the data directory on a block device?)."
+        )
+        return
+    plot_mode_bars(
+        summaries,
+        [
+            ("device_bytes_per_request", "Device Bytes Written per Request"),
+            ("write_ios", "Device Write I/Os"),
+            ("avg_write_wait_ms", "Average Write Wait (ms)"),
+            ("max_dirty_kb", "Peak Dirty Page Cache (KB)"),
+        ],
+        graphs_dir,
+        name,
+    )
+
+
+def sweep_sort_key(value):
+    return (0, int(value)) if str(value).isdigit() else (1, str(value))
+
+
 def plot_cpu_comparison_all(
     rdb_usage, aof_usage, uring_usage, graphs_dir, name="cpu_comparison"
 ):
-    modes = ["RDB", "AOF (always)", "AOF (everysec)", "AOF (no)", "AOFUring"]
-    colors = ["#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd"]
 
     cpu_values = {
         "RDB": rdb_usage.loc[rdb_usage["Metric"] == "CPU Usage (%)", "mean"].values,
@@ -177,17 +858,17 @@ def plot_cpu_comparison_all(
     plt.figure(figsize=(10, 6))
     if only_one:
         plt.bar(
-            modes,
-            [cpu_values[mode][0] for mode in modes],
-            color=colors,
+            MODES,
+            [cpu_values[mode][0] for mode in MODES],
+            color=COLORS,
             capsize=5,
         )
     else:
         plt.bar(
-            modes,
-            [cpu_values[mode][0] for mode in modes],
-            color=colors,
-            yerr=[cpu_std[mode][0] for mode in modes],
+            MODES,
+            [cpu_values[mode][0] for mode in MODES],
+            color=COLORS,
+            yerr=[cpu_std[mode][0] for mode in MODES],
             capsize=5,
         )
 
@@ -202,11 +883,52 @@ def plot_cpu_comparison_all(
     plt.savefig(plot_filename, bbox_inches="tight", format="svg")
 
 
+def plot_cpu_threads(
+    rdb_usage, aof_usage, uring_usage, graphs_dir, name="cpu_threads"
+):
+    # Stacked mean CPU % per thread group (main thread, bio_*, io_uring
+    # iou-sqp/iou-wrk workers, ...) from the "Thread CPU (%): " usage rows.
+    usages = {
+        "RDB": rdb_usage,
+        "AOF (always)": aof_usage["always"],
+        "AOF (everysec)": aof_usage["everysec"],
+        "AOF (no)": aof_usage["no"],
+        "AOFUring": uring_usage,
+    }
+    breakdown = {}
+    for mode, usage in usages.items():
+        if usage.empty:
+            continue
+        rows = usage[usage["Metric"].str.startswith(THREAD_CPU_METRIC)]
+        breakdown[mode] = dict(
+            zip(rows["Metric"].str[len(THREAD_CPU_METRIC) :], rows["mean"])
+        )
+    breakdown = pd.DataFrame(breakdown).T.fillna(0)
+    if breakdown.empty:
+        print("No per-thread CPU rows found in the usage CSVs.")
+        return
+    # Largest consumers at the bottom of each bar.
+    breakdown = breakdown[breakdown.sum().sort_values(ascending=False).index]
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    bottom = pd.Series(0.0, index=breakdown.index)
+    for group in breakdown.columns:
+        ax.bar(breakdown.index, breakdown[group], bottom=bottom, label=group)
+        bottom += breakdown[group]
+    ax.set_xlabel("Persistence Mode", fontsize=14, fontweight="bold")
+    ax.set_ylabel("CPU Usage (%)", fontsize=14, fontweight="bold")
+    ax.grid(axis="y", linestyle="--", alpha=0.7)
+    ax.legend(title="Thread", fontsize=10, bbox_to_anchor=(1.02, 1), loc="upper left")
+    fig.tight_layout()
+
+    breakdown.to_csv(os.path.join(graphs_dir, f"{name}.csv"), index_label="mode")
+    plot_filename = os.path.join(graphs_dir, f"{name}.svg")
+    fig.savefig(plot_filename, bbox_inches="tight", format="svg")
+
+
 def plot_memory_comparison_all(
     rdb_usage, aof_usage, uring_usage, graphs_dir, name="memory_comparison"
 ):
-    modes = ["RDB", "AOF (always)", "AOF (everysec)", "AOF (no)", "AOFUring"]
-    colors = ["#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd"]
 
     memory_values = {
         "RDB": rdb_usage.loc[rdb_usage["Metric"] == "Memory Usage (MB)", "mean"].values,
@@ -243,17 +965,17 @@ def plot_memory_comparison_all(
     plt.figure(figsize=(10, 6))
     if only_one:
         plt.bar(
-            modes,
-            [memory_values[mode][0] for mode in modes],
-            color=colors,
+            MODES,
+            [memory_values[mode][0] for mode in MODES],
+            color=COLORS,
             capsize=5,
         )
     else:
         plt.bar(
-            modes,
-            [memory_values[mode][0] for mode in modes],
-            yerr=[memory_std[mode][0] for mode in modes],
-            color=colors,
+            MODES,
+            [memory_values[mode][0] for mode in MODES],
+            yerr=[memory_std[mode][0] for mode in MODES],
+            color=COLORS,
             capsize=5,
         )
     plt.xlabel("Persistence Mode", fontsize=14, fontweight="bold")
@@ -272,8 +994,6 @@ def plot_rps_comparison_all(
 ):
 
     tests = rdb_perf["test"].values
-    modes = ["RDB", "AOF (always)", "AOF (everysec)", "AOF (no)", "AOFUring"]
-    colors = ["#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd"]
 
     rps_values = {
         "RDB": rdb_perf.set_index("test")["rps"]["mean"].reindex(tests).values,
@@ -315,24 +1035,24 @@ def plot_rps_comparison_all(
     plt.figure(figsize=(12, 8))
 
     if only_one:
-        for i, mode in enumerate(modes):
+        for i, mode in enumerate(MODES):
             plt.bar(
                 [p + i * bar_width for p in x],
                 rps_values[mode],
                 width=bar_width,
                 label=mode,
-                color=colors[i],
+                color=COLORS[i],
                 capsize=5,
             )
     else:
-        for i, mode in enumerate(modes):
+        for i, mode in enumerate(MODES):
             plt.bar(
                 [p + i * bar_width for p in x],
                 rps_values[mode],
                 width=bar_width,
                 yerr=rps_std[mode],
                 label=mode,
-                color=colors[i],
+                color=COLORS[i],
                 capsize=5,
             )
 
@@ -358,14 +1078,10 @@ def plot_rps_comparison_all(
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Plot graphs from CSV data.")
+    parser.add_argument("--dir_rdb", help="Directory containing RDB CSV files.")
+    parser.add_argument("--dir_aof", help="Directory containing AOF CSV files.")
     parser.add_argument(
-        "--dir_rdb", help="Directory containing RDB CSV files.", required=True
-    )
-    parser.add_argument(
-        "--dir_aof", help="Directory containing AOF CSV files.", required=True
-    )
-    parser.add_argument(
-        "--dir_uring", help="Directory containing URING_AOF CSV files.", required=True
+        "--dir_uring", help="Directory containing URING_AOF CSV files."
     )
     parser.add_argument("--dir", help="Directory to save graphs.", default=".")
     parser.add_argument(
@@ -373,36 +1089,182 @@ if __name__ == "__main__":
         choices=[
             "rps",
             "cpu",
+            "cpu-threads",
             "memory",
             "latency",
+            "cdf",
+            "scaling",
+            "uring-heatmap",
+            "uring-rings",
+            "open-loop",
+            "restart",
+            "background-save",
+            "crash",
+            "aof",
+            "device-writes",
             "all",
         ],
         help="Type of graph to plot.",
         required=True,
     )
+    parser.add_argument(
+        "--db",
+        nargs="?",
+        const=DEFAULT_DB,
+        help="Read rps/cpu/cpu-threads/memory/latency data from the results "
+        "database (default benchmarks/results.db) instead of scanning the "
+        "--dir_* trees.",
+    )
+    parser.add_argument(
+        "--since", help="With --db, only runs from this time on (YYYY-MM-DD[ HH:MM:SS])."
+    )
+    parser.add_argument(
+        "--until", help="With --db, only runs up to this time (a date: that whole day)."
+    )
+    parser.add_argument(
+        "--requests", type=int, help="With --db, only runs with this request count."
+    )
+    parser.add_argument("--engine", help="With --db, only runs with this engine.")
+    parser.add_argument(
+        "--param",
+        type=key_value,
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="With --db, only runs with this load parameter (e.g. clients=50).",
+    )
+    parser.add_argument(
+        "--variant",
+        choices=list(WORKLOADS) + [TRACE_VARIANT],
+        help="Plot the runs of this --workload profile, or the --trace replays, "
+        "instead of the default runs.",
+    )
     args = parser.parse_args()
 
+    db_types = ["rps", "cpu", "cpu-threads", "memory", "latency"]
+    if not (args.db and args.type in db_types) and not (
+        args.dir_aof and args.dir_rdb and args.dir_uring
+    ):
+        parser.error(
+            f"--dir_aof, --dir_rdb and --dir_uring are required unless --db is "
+            f"used with --type {'/'.join(db_types)}"
+        )
+
+    if args.db and not os.path.exists(args.db):
+        parser.error(f"no results database at {args.db}")
+
     os.makedirs(args.dir, exist_ok=True)
+    mode_dirs = (args.dir_aof, args.dir_rdb, args.dir_uring)
 
-    (
-        aof_perf,
-        aof_usage,
-        rdb_perf,
-        rdb_usage,
-        uring_perf,
-        uring_usage,
-    ) = load_all_data(args.dir_aof, args.dir_rdb, args.dir_uring)
+    if args.db:
+        (
+            aof_perf,
+            aof_usage,
+            rdb_perf,
+            rdb_usage,
+            uring_perf,
+            uring_usage,
+        ) = load_db_data(
+            args.db,
+            requests=args.requests,
+            engine=args.engine,
+            since=args.since,
+            until=args.until,
+            parameters=dict(args.param),
+            variant=args.variant,
+        )
+    elif args.type in db_types + ["all"]:
+        (
+            aof_perf,
+            aof_usage,
+            rdb_perf,
+            rdb_usage,
+            uring_perf,
+            uring_usage,
+        ) = load_all_data(*mode_dirs, args.variant)
 
     if args.type == "rps":
         plot_rps_comparison_all(rdb_perf, aof_perf, uring_perf, args.dir)
     elif args.type == "cpu":
         plot_cpu_comparison_all(rdb_usage, aof_usage, uring_usage, args.dir)
+    elif args.type == "cpu-threads":
+        plot_cpu_threads(rdb_usage, aof_usage, uring_usage, args.dir)
     elif args.type == "memory":
         plot_memory_comparison_all(rdb_usage, aof_usage, uring_usage, args.dir)
     elif args.type == "latency":
         plot_latency_statistics_comparison(rdb_perf, aof_perf, uring_perf, args.dir)
+    elif args.type == "cdf":
+        histograms = load_all_modes(
+            load_mode_histograms, *mode_dirs, variant=args.variant
+        )
+        plot_latency_cdf(histograms, args.dir)
+        plot_tail_percentiles(histograms, args.dir)
+    elif args.type == "scaling":
+        sweeps = load_all_modes(load_mode_csv, *mode_dirs, filename="sweep.csv")
+        plot_scaling(sweeps, args.dir)
+    elif args.type == "uring-heatmap":
+        plot_uring_heatmap(load_mode_csv(args.dir_uring, "sweep.csv"), args.dir)
+    elif args.type == "uring-rings":
+        rings = load_latest_uring_rings(args.dir_uring, args.variant)
+        plot_uring_rings(rings, args.dir)
+    elif args.type == "open-loop":
+        steps = load_all_modes(load_mode_csv, *mode_dirs, filename="open_loop.csv")
+        plot_open_loop(steps, args.dir)
+    elif args.type == "restart":
+        restarts = load_all_modes(load_mode_csv, *mode_dirs, filename="restart.csv")
+        plot_restart(restarts, args.dir)
+    elif args.type == "background-save":
+        runs = load_all_modes(load_mode_background, *mode_dirs)
+        plot_background_save(runs, args.dir)
+    elif args.type == "crash":
+        trials = load_all_modes(load_mode_csv, *mode_dirs, filename="crash.csv")
+        plot_crash(trials, args.dir)
+    elif args.type == "aof":
+        plot_aof_analysis(
+            load_all_modes(
+                load_mode_csv,
+                *mode_dirs,
+                filename="aof_analysis.csv",
+                variant=args.variant,
+            ),
+            args.dir,
+        )
+    elif args.type == "device-writes":
+        plot_device_writes(
+            load_all_modes(
+                load_mode_csv,
+                *mode_dirs,
+                filename="diskstats_summary.csv",
+                variant=args.variant,
+            ),
+            args.dir,
+        )
     elif args.type == "all":
         plot_rps_comparison_all(rdb_perf, aof_perf, uring_perf, args.dir)
         plot_cpu_comparison_all(rdb_usage, aof_usage, uring_usage, args.dir)
+        plot_cpu_threads(rdb_usage, aof_usage, uring_usage, args.dir)
         plot_memory_comparison_all(rdb_usage, aof_usage, uring_usage, args.dir)
         plot_latency_statistics_comparison(rdb_perf, aof_perf, uring_perf, args.dir)
+        histograms = load_all_modes(
+            load_mode_histograms, *mode_dirs, variant=args.variant
+        )
+        plot_latency_cdf(histograms, args.dir)
+        plot_tail_percentiles(histograms, args.dir)
+        plot_aof_analysis(
+            load_all_modes(
+                load_mode_csv,
+                *mode_dirs,
+                filename="aof_analysis.csv",
+                variant=args.variant,
+            ),
+            args.dir,
+        )
+        plot_device_writes(
+            load_all_modes(
+                load_mode_csv,
+                *mode_dirs,
+                filename="diskstats_summary.csv",
+                variant=args.variant,
+            ),
+            args.dir,
+        )
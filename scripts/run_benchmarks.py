@@ -3,6 +3,20 @@ import subprocess
 import sys
 import signal
 import argparse
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+from modes import BENCHMARKS, MODES, select_modes
+from results_db import DEFAULT_DB
+from workloads import WORKLOADS
+from runner import (
+    run_background_save_mode,
+    run_crash_mode,
+    run_mode,
+    run_open_loop_mode,
+    run_restart_mode,
+    run_sweep,
+)
 
 
 def start_redis_server(command, cwd):
@@ -21,59 +35,112 @@ def stop_redis_server(process):
         process.wait()
 
 
-def run_benchmark_script(script_path, request_count, fsync=None, only_perf=False):
-    command = ["sudo", "python3", script_path, str(request_count)]
+def int_list(value):
+    return [int(item) for item in value.split(",")]
+
+
+def str_list(value):
+    return value.split(",")
 
-    if fsync:
-        command.append(fsync)
 
-    if only_perf:
-        command.append("only_performance")
+def run_benchmarks(
+    request_count,
+    modes_to_run,
+    engine="redis-benchmark",
+    sample_interval=0.5,
+    accounting="none",
+    load_options=None,
+    aof_analysis=True,
+    results_db=DEFAULT_DB,
+):
+    run_dirs = []
+    for mode_name in modes_to_run:
+        run_dirs.append(
+            run_mode(
+                mode_name,
+                request_count,
+                engine=engine,
+                sample_interval=sample_interval,
+                accounting=accounting,
+                load_options=load_options,
+                aof_analysis=aof_analysis,
+                results_db=results_db,
+            )
+        )
+    return run_dirs
 
-    result = subprocess.run(command, stdout=sys.stdout, stderr=sys.stderr)
 
-    if result.returncode != 0:
-        print(
-            f"{os.path.basename(script_path)} failed with return code {result.returncode}"
+def run_sweeps(
+    request_count,
+    modes_to_run,
+    grid,
+    engine="redis-benchmark",
+    sample_interval=0.5,
+    config_grid=None,
+):
+    sweep_dirs = []
+    for mode_name in modes_to_run:
+        # Only pass the directives the mode's server understands.
+        tunables = MODES[mode_name].get("tunables", [])
+        mode_config_grid = {
+            directive: values
+            for directive, values in (config_grid or {}).items()
+            if directive in tunables
+        }
+        sweep_dirs.append(
+            run_sweep(
+                mode_name,
+                request_count,
+                grid,
+                engine,
+                sample_interval,
+                mode_config_grid,
+            )
         )
-        sys.exit(1)
+    return sweep_dirs
+
+
+def run_open_loop(request_options, modes_to_run, load_options=None):
+    return [
+        run_open_loop_mode(mode_name, load_options=load_options, **request_options)
+        for mode_name in modes_to_run
+    ]
 
 
-def find_benchmark_scripts(path):
-    benchmark_scripts = {}
-    for root, dirs, files in os.walk(path):
-        for dir_name in dirs:
-            if dir_name in ["AOF", "RDB", "URING_AOF"]:
-                dir_path = os.path.join(root, dir_name)
-                for file in os.listdir(dir_path):
-                    if file == "benchmark.py":
-                        benchmark_scripts[dir_name] = os.path.join(dir_path, file)
-    return benchmark_scripts
+def run_restarts(dataset_keys, modes_to_run, data_size=3):
+    return [
+        run_restart_mode(mode_name, dataset_keys, data_size)
+        for mode_name in modes_to_run
+    ]
 
 
-def run_benchmarks(request_count, benchmarks_to_run, fsync="all", only_perf=False):
-    benchmark_scripts = find_benchmark_scripts("benchmarks")
+def run_background_saves(request_options, modes_to_run, load_options=None):
+    return [
+        run_background_save_mode(mode_name, load_options=load_options, **request_options)
+        for mode_name in modes_to_run
+    ]
 
-    for benchmark_name in benchmarks_to_run:
-        script_path = benchmark_scripts.get(benchmark_name)
-        if script_path:
-            print(f"Running {benchmark_name} benchmark...")
-            if benchmark_name == "AOF":
-                run_benchmark_script(script_path, request_count, fsync, only_perf)
-            else:
-                run_benchmark_script(script_path, request_count, None, only_perf)
-        else:
-            print(f"No benchmark script found for {benchmark_name}")
+
+def run_crashes(request_options, modes_to_run):
+    return [
+        run_crash_mode(mode_name, **request_options) for mode_name in modes_to_run
+    ]
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run specific benchmark scripts.")
     parser.add_argument(
         "--benchmark",
-        choices=["AOF", "RDB", "URING_AOF"],
+        choices=BENCHMARKS,
         nargs="*",
         help="Specify which benchmark to run: AOF, RDB, or URING_AOF. If not specified, runs all benchmarks.",
     )
+    parser.add_argument(
+        "--mode",
+        choices=list(MODES),
+        nargs="*",
+        help="Run these persistence modes from benchmarks/modes.py instead of --benchmark/--fsync.",
+    )
     parser.add_argument(
         "--requests", type=int, default=100000, help="Request count for the benchmark."
     )
@@ -84,18 +151,305 @@ if __name__ == "__main__":
         help="Specify the fsync mode for the AOF benchmark.",
     )
     parser.add_argument(
-        "--no-strace",
+        "--strace",
+        action="store_const",
+        const="strace",
+        dest="accounting",
+        default="none",
+        help="Shorthand for --accounting strace.",
+    )
+    parser.add_argument("--no-strace", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument(
+        "--engine",
+        choices=["redis-benchmark", "native"],
+        default="redis-benchmark",
+        help="Load generator: the redis-benchmark binary or the in-tree asyncio engine.",
+    )
+    parser.add_argument(
+        "--sample-interval",
+        type=float,
+        default=0.5,
+        help="Seconds between CPU/memory samples of the Redis server.",
+    )
+    parser.add_argument(
+        "--accounting",
+        choices=["none", "strace", "proc"],
+        default="none",
+        help="Syscall/I/O accounting: none, an opt-in separate strace pass, or /proc sampling during the combined pass.",
+    )
+    parser.add_argument(
+        "--clients",
+        type=int_list,
+        default=[50],
+        help="Client connections (comma-separated list with --sweep).",
+    )
+    parser.add_argument(
+        "--pipeline",
+        type=int_list,
+        default=[1],
+        help="Pipeline depth (comma-separated list with --sweep).",
+    )
+    parser.add_argument(
+        "--data-size",
+        type=int_list,
+        default=[3],
+        help="Value size in bytes (comma-separated list with --sweep).",
+    )
+    parser.add_argument(
+        "--keyspace",
+        type=int_list,
+        default=[0],
+        help="Random keyspace size, 0 for one key per command (comma-separated list with --sweep).",
+    )
+    parser.add_argument(
+        "--uring-queue-depth",
+        type=str_list,
+        help="liburing-queue-depth values to sweep for URING_AOF (comma-separated).",
+    )
+    parser.add_argument(
+        "--uring-sqpoll",
+        type=str_list,
+        help="liburing-sqpoll values to sweep for URING_AOF, e.g. no,yes.",
+    )
+    parser.add_argument(
+        "--uring-retry-count",
+        type=str_list,
+        help="liburing-retry-count values to sweep for URING_AOF (comma-separated).",
+    )
+    parser.add_argument(
+        "--workload",
+        choices=list(WORKLOADS),
+        help="Run a mixed workload profile from benchmarks/workloads.py (needs --engine native).",
+    )
+    parser.add_argument(
+        "--trace",
+        help="Replay this command trace (benchmarks/command_trace.py) instead of the synthetic tests (needs --engine native).",
+    )
+    parser.add_argument(
+        "--trace-timed",
+        action="store_true",
+        help="Replay --trace at its captured inter-arrival times instead of as fast as possible.",
+    )
+    parser.add_argument(
+        "--sweep",
+        action="store_true",
+        help="Run every combination of --clients/--pipeline/--data-size/--keyspace for each mode.",
+    )
+    parser.add_argument(
+        "--no-aof-analysis",
+        action="store_false",
+        dest="aof_analysis",
+        help="Skip the AOF size/command-mix analysis and BGREWRITEAOF after AOF runs.",
+    )
+    parser.add_argument(
+        "--results-db",
+        default=DEFAULT_DB,
+        help="SQLite database the runs' performance and usage are indexed in "
+        "(empty to skip).",
+    )
+    parser.add_argument(
+        "--open-loop",
+        action="store_true",
+        help="Step up a constant arrival rate per mode until p99 crosses --p99-threshold.",
+    )
+    parser.add_argument(
+        "--rate-start", type=int, default=10000, help="First offered rate (req/s)."
+    )
+    parser.add_argument(
+        "--rate-step", type=int, default=10000, help="Offered rate increment (req/s)."
+    )
+    parser.add_argument(
+        "--rate-max", type=int, default=200000, help="Highest offered rate (req/s)."
+    )
+    parser.add_argument(
+        "--p99-threshold",
+        type=float,
+        default=5.0,
+        help="p99 latency (ms) above which an offered rate is not sustainable.",
+    )
+    parser.add_argument(
+        "--step-duration",
+        type=float,
+        default=5.0,
+        help="Seconds each offered rate is held in --open-loop.",
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Measure restart time (RDB/AOF load) per mode for each --dataset-keys size.",
+    )
+    parser.add_argument(
+        "--dataset-keys",
+        type=int_list,
+        default=[100000, 1000000],
+        help="Dataset sizes (keys) loaded before each --restart measurement (comma-separated).",
+    )
+    parser.add_argument(
+        "--background-save",
+        action="store_true",
+        help="Trigger BGREWRITEAOF (BGSAVE for RDB) under a steady open-loop load and record the stall.",
+    )
+    parser.add_argument(
+        "--bg-rate",
+        type=int,
+        default=20000,
+        help="Offered rate (req/s) held during --background-save.",
+    )
+    parser.add_argument(
+        "--bg-duration",
+        type=float,
+        default=30.0,
+        help="Seconds the --background-save load runs.",
+    )
+    parser.add_argument(
+        "--bg-trigger",
+        type=float,
+        default=10.0,
+        help="Seconds into the --background-save load at which the rewrite/snapshot starts.",
+    )
+    parser.add_argument(
+        "--crash",
         action="store_true",
-        default=False,
-        help="Run benchmarks without strace.",
+        help="SIGKILL each mode under load and count the acknowledged writes lost on restart.",
+    )
+    parser.add_argument(
+        "--crash-trials", type=int, default=10, help="Kills per mode in --crash."
+    )
+    parser.add_argument(
+        "--crash-delay",
+        type=float,
+        nargs=2,
+        default=[2.0, 10.0],
+        metavar=("MIN", "MAX"),
+        help="Range (s) of the random load time before each --crash kill.",
     )
     args = parser.parse_args()
 
-    if args.benchmark:
-        benchmarks_to_run = args.benchmark
+    grid = {
+        "clients": args.clients,
+        "pipeline": args.pipeline,
+        "data_size": args.data_size,
+        "keyspace": args.keyspace,
+    }
+    if not args.sweep and any(len(values) > 1 for values in grid.values()):
+        parser.error(
+            "lists for --clients/--pipeline/--data-size/--keyspace need --sweep"
+        )
+    config_grid = {
+        directive: values
+        for directive, values in [
+            ("liburing-queue-depth", args.uring_queue_depth),
+            ("liburing-sqpoll", args.uring_sqpoll),
+            ("liburing-retry-count", args.uring_retry_count),
+        ]
+        if values
+    }
+    if config_grid and not args.sweep:
+        parser.error("--uring-* settings need --sweep")
+    if (args.workload or args.trace) and args.engine != "native":
+        parser.error("--workload and --trace need --engine native")
+    if (args.workload or args.trace) and (args.sweep or args.open_loop):
+        parser.error("--workload and --trace cannot be combined with --sweep or --open-loop")
+    if args.workload and args.trace:
+        parser.error("--workload and --trace cannot be combined")
+    if args.open_loop and args.sweep:
+        parser.error("--open-loop and --sweep cannot be combined")
+    if args.crash and (
+        args.sweep
+        or args.open_loop
+        or args.restart
+        or args.background_save
+        or args.workload
+        or args.trace
+    ):
+        parser.error(
+            "--crash cannot be combined with --sweep, --open-loop, --restart, "
+            "--background-save, --workload or --trace"
+        )
+    if args.crash and not 0 < args.crash_delay[0] <= args.crash_delay[1]:
+        parser.error("--crash-delay needs 0 < MIN <= MAX")
+    if args.background_save and (
+        args.sweep or args.open_loop or args.restart or args.workload or args.trace
+    ):
+        parser.error(
+            "--background-save cannot be combined with --sweep, --open-loop, "
+            "--restart, --workload or --trace"
+        )
+    if args.background_save and not 0 < args.bg_trigger < args.bg_duration:
+        parser.error("--bg-trigger must fall inside --bg-duration")
+    if args.restart and (args.sweep or args.open_loop or args.workload or args.trace):
+        parser.error(
+            "--restart cannot be combined with --sweep, --open-loop, --workload or --trace"
+        )
+
+    if args.mode:
+        modes_to_run = args.mode
+    elif args.benchmark:
+        modes_to_run = select_modes(args.benchmark, args.fsync)
     else:
-        benchmarks_to_run = ["RDB", "AOF", "URING_AOF"]
+        modes_to_run = select_modes(BENCHMARKS, args.fsync)
 
     subprocess.run(["sudo", "./script-cleanup.sh"], check=True)
-    run_benchmarks(args.requests, benchmarks_to_run, args.fsync, args.no_strace)
-    print("Benchmark test completed successfully.")
+    start_time = time.time()
+    if args.crash:
+        run_crashes(
+            {
+                "trials": args.crash_trials,
+                "min_delay": args.crash_delay[0],
+                "max_delay": args.crash_delay[1],
+                "clients": args.clients[0],
+                "pipeline": args.pipeline[0],
+            },
+            modes_to_run,
+        )
+    elif args.background_save:
+        run_background_saves(
+            {
+                "keys": args.dataset_keys[0],
+                "rate": args.bg_rate,
+                "duration": args.bg_duration,
+                "trigger_at": args.bg_trigger,
+            },
+            modes_to_run,
+            {"clients": args.clients[0], "data_size": args.data_size[0]},
+        )
+    elif args.restart:
+        run_restarts(args.dataset_keys, modes_to_run, args.data_size[0])
+    elif args.open_loop:
+        run_open_loop(
+            {
+                "start_rate": args.rate_start,
+                "step": args.rate_step,
+                "max_rate": args.rate_max,
+                "p99_threshold_ms": args.p99_threshold,
+                "duration": args.step_duration,
+            },
+            modes_to_run,
+            {dimension: values[0] for dimension, values in grid.items()},
+        )
+    elif args.sweep:
+        run_sweeps(
+            args.requests,
+            modes_to_run,
+            grid,
+            args.engine,
+            args.sample_interval,
+            config_grid,
+        )
+    else:
+        run_benchmarks(
+            args.requests,
+            modes_to_run,
+            args.engine,
+            args.sample_interval,
+            args.accounting,
+            {
+                **{dimension: values[0] for dimension, values in grid.items()},
+                "workload": args.workload,
+                "trace": args.trace and os.path.abspath(args.trace),
+                "trace_timed": args.trace_timed,
+            },
+            args.aof_analysis,
+            args.results_db,
+        )
+    print(f"Benchmark test completed successfully in {time.time() - start_time:.1f}s.")